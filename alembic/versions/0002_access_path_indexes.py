@@ -0,0 +1,66 @@
+"""index-backed access paths for todos, tags and todo_tags
+
+Trên PostgreSQL các index được tạo bằng CREATE INDEX CONCURRENTLY (ngoài
+transaction) để không khóa ghi bảng todos khi migrate.
+
+Revision ID: 0002_access_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_access_path_indexes'
+down_revision: Union[str, Sequence[str], None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _open_todos_where():
+    """deleted_at IS NULL AND is_done = false (khớp với filter của get_overdue/get_today)"""
+    return sa.and_(sa.column('deleted_at').is_(None), sa.column('is_done') == sa.false())
+
+
+def _create_indexes(**kw) -> None:
+    op.create_index(
+        'ix_todos_owner_id_deleted_at_created_at', 'todos',
+        ['owner_id', 'deleted_at', 'created_at'], **kw
+    )
+    op.create_index(
+        'ix_todos_owner_id_due_date_open', 'todos', ['owner_id', 'due_date'],
+        postgresql_where=_open_todos_where(),
+        sqlite_where=_open_todos_where(),
+        **kw
+    )
+    op.create_index('uq_tags_owner_id_name', 'tags', ['owner_id', 'name'], unique=True, **kw)
+    op.create_index('ix_todo_tags_tag_id_todo_id', 'todo_tags', ['tag_id', 'todo_id'], **kw)
+
+
+def _drop_indexes(**kw) -> None:
+    op.drop_index('ix_todo_tags_tag_id_todo_id', table_name='todo_tags', **kw)
+    op.drop_index('uq_tags_owner_id_name', table_name='tags', **kw)
+    op.drop_index('ix_todos_owner_id_due_date_open', table_name='todos', **kw)
+    op.drop_index('ix_todos_owner_id_deleted_at_created_at', table_name='todos', **kw)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            _create_indexes(postgresql_concurrently=True)
+    else:
+        _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            _drop_indexes(postgresql_concurrently=True)
+    else:
+        _drop_indexes()
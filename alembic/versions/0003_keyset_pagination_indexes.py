@@ -0,0 +1,75 @@
+"""keyset pagination indexes: (owner_id, deleted_at, <sort column>, id)
+
+Thay index (owner_id, deleted_at, created_at) bằng các index có id ở cuối
+cho mỗi cột sort của GET /todos để keyset pagination là index seek.
+
+Trên SQLite, created_at/updated_at của các row cũ (server_default CURRENT_TIMESTAMP)
+được ghi lại theo định dạng có microsecond mà SQLAlchemy dùng: giá trị được so sánh
+dạng chuỗi, 'YYYY-MM-DD HH:MM:SS' đứng trước cursor 'YYYY-MM-DD HH:MM:SS.000000'
+nên row cuối trang sẽ khớp lại chính cursor của nó.
+
+Revision ID: 0003_keyset_pagination_indexes
+Revises: 0002_access_path_indexes
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_keyset_pagination_indexes'
+down_revision: Union[str, Sequence[str], None] = '0002_access_path_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SORT_COLUMNS = ('created_at', 'updated_at', 'due_date', 'title')
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at')
+
+
+def _index_name(column: str) -> str:
+    return f'ix_todos_owner_id_deleted_at_{column}_id'
+
+
+def _upgrade(**kw) -> None:
+    for column in SORT_COLUMNS:
+        op.create_index(_index_name(column), 'todos', ['owner_id', 'deleted_at', column, 'id'], **kw)
+    op.drop_index('ix_todos_owner_id_deleted_at_created_at', table_name='todos', **kw)
+
+
+def _backfill_sqlite_timestamps() -> None:
+    # 'YYYY-MM-DD HH:MM:SS' (19 ký tự) -> 'YYYY-MM-DD HH:MM:SS.000000'
+    for column in TIMESTAMP_COLUMNS:
+        op.execute(f"UPDATE todos SET {column} = {column} || '.000000' WHERE length({column}) = 19")
+
+
+def _downgrade(**kw) -> None:
+    op.create_index(
+        'ix_todos_owner_id_deleted_at_created_at', 'todos',
+        ['owner_id', 'deleted_at', 'created_at'], **kw
+    )
+    for column in SORT_COLUMNS:
+        op.drop_index(_index_name(column), table_name='todos', **kw)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _backfill_sqlite_timestamps()
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            _upgrade(postgresql_concurrently=True)
+    else:
+        _upgrade()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            _downgrade(postgresql_concurrently=True)
+    else:
+        _downgrade()
@@ -0,0 +1,83 @@
+"""full-text search on todos (title + description)
+
+SQLite: bảng ảo FTS5 todos_fts + trigger đồng bộ, build lại từ dữ liệu hiện có.
+PostgreSQL: cột generated search_vector (tsvector) + GIN index tạo CONCURRENTLY.
+Lưu ý: thêm cột STORED trên PostgreSQL sẽ rewrite bảng todos.
+
+Revision ID: 0004_todo_full_text_search
+Revises: 0003_keyset_pagination_indexes
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_todo_full_text_search'
+down_revision: Union[str, Sequence[str], None] = '0003_keyset_pagination_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE todos_fts USING fts5(
+        title, description,
+        content='todos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    "INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS todos_fts_au",
+    "DROP TRIGGER IF EXISTS todos_fts_ad",
+    "DROP TRIGGER IF EXISTS todos_fts_ai",
+    "DROP TABLE IF EXISTS todos_fts",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(
+            """ALTER TABLE todos ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+            ) STORED"""
+        )
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_todos_search_vector', 'todos', ['search_vector'],
+                postgresql_using='gin', postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_todos_search_vector', table_name='todos', postgresql_concurrently=True)
+        op.drop_column('todos', 'search_vector')
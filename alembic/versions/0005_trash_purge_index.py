@@ -0,0 +1,58 @@
+"""partial index on todos.deleted_at for the trash purger
+
+Purge quét các todo có deleted_at < cutoff trên mọi owner; index chỉ chứa
+các row trong thùng rác nên nhỏ và không ảnh hưởng ghi todo đang dùng.
+Trên PostgreSQL index được tạo bằng CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0005_trash_purge_index
+Revises: 0004_todo_full_text_search
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_trash_purge_index'
+down_revision: Union[str, Sequence[str], None] = '0004_todo_full_text_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _trash_where():
+    """Chỉ các todo đang nằm trong thùng rác"""
+    return sa.column('deleted_at').isnot(None)
+
+
+def _upgrade(**kw) -> None:
+    op.create_index(
+        'ix_todos_deleted_at_trash', 'todos', ['deleted_at'],
+        postgresql_where=_trash_where(),
+        sqlite_where=_trash_where(),
+        **kw
+    )
+
+
+def _downgrade(**kw) -> None:
+    op.drop_index('ix_todos_deleted_at_trash', table_name='todos', **kw)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            _upgrade(postgresql_concurrently=True)
+    else:
+        _upgrade()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            _downgrade(postgresql_concurrently=True)
+    else:
+        _downgrade()
@@ -0,0 +1,106 @@
+"""archive tier: todos_archive table for long-completed todos
+
+- Tạo bảng todos_archive (giữ nguyên id của todos, tags lưu dạng JSON tag_ids)
+- Partial index ix_todos_updated_at_done cho job lưu trữ (CONCURRENTLY trên PostgreSQL)
+- SQLite: dựng lại bảng todos với AUTOINCREMENT để id đã chuyển sang archive
+  không bị cấp lại cho todo mới (PostgreSQL dùng sequence nên không cần).
+  Dựng lại bảng làm mất các trigger FTS nên phải tạo lại; dữ liệu todos_fts
+  (external content, cùng rowid) vẫn giữ nguyên.
+
+Revision ID: 0006_todos_archive
+Revises: 0005_trash_purge_index
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_todos_archive'
+down_revision: Union[str, Sequence[str], None] = '0005_trash_purge_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS_TRIGGERS = [
+    """CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+
+def _rebuild_sqlite_todos(autoincrement: bool) -> None:
+    """Dựng lại bảng todos (bật/tắt AUTOINCREMENT) rồi tạo lại trigger FTS"""
+    with op.batch_alter_table(
+        'todos', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}
+    ):
+        pass
+    for statement in SQLITE_FTS_TRIGGERS:
+        op.execute(statement)
+
+
+def _done_where():
+    """Chỉ các todo đã hoàn thành và chưa xóa (ứng viên lưu trữ)"""
+    return sa.and_(sa.column('deleted_at').is_(None), sa.column('is_done') == sa.true())
+
+
+def _create_done_index(**kw) -> None:
+    op.create_index(
+        'ix_todos_updated_at_done', 'todos', ['updated_at'],
+        postgresql_where=_done_where(),
+        sqlite_where=_done_where(),
+        **kw
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'todos_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('is_done', sa.Boolean(), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('tag_ids', sa.JSON(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_todos_archive_owner_id_created_at_id', 'todos_archive', ['owner_id', 'created_at', 'id']
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            _create_done_index(postgresql_concurrently=True)
+    else:
+        _create_done_index()
+        _rebuild_sqlite_todos(autoincrement=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_todos_updated_at_done', table_name='todos', postgresql_concurrently=True)
+    else:
+        _rebuild_sqlite_todos(autoincrement=False)
+        op.drop_index('ix_todos_updated_at_done', table_name='todos')
+    op.drop_index('ix_todos_archive_owner_id_created_at_id', table_name='todos_archive')
+    op.drop_table('todos_archive')
@@ -0,0 +1,138 @@
+"""per-user todo counters maintained by triggers
+
+- Tạo bảng user_todo_counters (open/done/trash theo user)
+- Trigger trên todos cập nhật bộ đếm trong cùng transaction với câu lệnh ghi
+  (SQLite: FOR EACH ROW; PostgreSQL: FOR EACH STATEMENT với transition table)
+- Backfill từ dữ liệu hiện có. Trigger được tạo trước backfill trong cùng
+  transaction: CREATE TRIGGER khóa ghi trên todos nên không mất thay đổi nào
+
+Revision ID: 0007_user_todo_counters
+Revises: 0006_todos_archive
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_user_todo_counters'
+down_revision: Union[str, Sequence[str], None] = '0006_todos_archive'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _sqlite_apply(row: str, sign: str) -> str:
+    return f"""INSERT INTO user_todo_counters(user_id, open_count, done_count, trash_count) VALUES (
+            {row}.owner_id,
+            {sign}({row}.deleted_at IS NULL AND NOT {row}.is_done),
+            {sign}({row}.deleted_at IS NULL AND {row}.is_done),
+            {sign}({row}.deleted_at IS NOT NULL)
+        )
+        ON CONFLICT(user_id) DO UPDATE SET
+            open_count = open_count + excluded.open_count,
+            done_count = done_count + excluded.done_count,
+            trash_count = trash_count + excluded.trash_count;"""
+
+
+SQLITE_UPGRADE = [
+    f"""CREATE TRIGGER user_todo_counters_ai AFTER INSERT ON todos BEGIN
+        {_sqlite_apply("new", "+")}
+    END""",
+    f"""CREATE TRIGGER user_todo_counters_ad AFTER DELETE ON todos BEGIN
+        {_sqlite_apply("old", "-")}
+    END""",
+    f"""CREATE TRIGGER user_todo_counters_au AFTER UPDATE OF is_done, deleted_at, owner_id ON todos BEGIN
+        {_sqlite_apply("old", "-")}
+        {_sqlite_apply("new", "+")}
+    END""",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS user_todo_counters_au",
+    "DROP TRIGGER IF EXISTS user_todo_counters_ad",
+    "DROP TRIGGER IF EXISTS user_todo_counters_ai",
+]
+
+
+def _postgres_function(name: str, changed_rows: str) -> str:
+    return f"""CREATE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO user_todo_counters AS c (user_id, open_count, done_count, trash_count)
+        SELECT owner_id,
+            coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND NOT is_done), 0),
+            coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND is_done), 0),
+            coalesce(sum(sign) FILTER (WHERE deleted_at IS NOT NULL), 0)
+        FROM ({changed_rows}) AS changed
+        GROUP BY owner_id
+        HAVING coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND NOT is_done), 0) <> 0
+            OR coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND is_done), 0) <> 0
+            OR coalesce(sum(sign) FILTER (WHERE deleted_at IS NOT NULL), 0) <> 0
+        ON CONFLICT (user_id) DO UPDATE SET
+            open_count = c.open_count + EXCLUDED.open_count,
+            done_count = c.done_count + EXCLUDED.done_count,
+            trash_count = c.trash_count + EXCLUDED.trash_count;
+        RETURN NULL;
+    END $$"""
+
+
+_NEW_ROWS = "SELECT owner_id, is_done, deleted_at, 1 AS sign FROM new_rows"
+_OLD_ROWS = "SELECT owner_id, is_done, deleted_at, -1 AS sign FROM old_rows"
+
+POSTGRES_UPGRADE = [
+    _postgres_function("user_todo_counters_insert", _NEW_ROWS),
+    _postgres_function("user_todo_counters_delete", _OLD_ROWS),
+    _postgres_function("user_todo_counters_update", f"{_OLD_ROWS} UNION ALL {_NEW_ROWS}"),
+    """CREATE TRIGGER user_todo_counters_ai AFTER INSERT ON todos
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION user_todo_counters_insert()""",
+    """CREATE TRIGGER user_todo_counters_ad AFTER DELETE ON todos
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION user_todo_counters_delete()""",
+    """CREATE TRIGGER user_todo_counters_au AFTER UPDATE ON todos
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION user_todo_counters_update()""",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP FUNCTION IF EXISTS user_todo_counters_update() CASCADE",
+    "DROP FUNCTION IF EXISTS user_todo_counters_delete() CASCADE",
+    "DROP FUNCTION IF EXISTS user_todo_counters_insert() CASCADE",
+]
+
+BACKFILL = """INSERT INTO user_todo_counters (user_id, open_count, done_count, trash_count)
+    SELECT owner_id,
+        sum(CASE WHEN deleted_at IS NULL AND NOT is_done THEN 1 ELSE 0 END),
+        sum(CASE WHEN deleted_at IS NULL AND is_done THEN 1 ELSE 0 END),
+        sum(CASE WHEN deleted_at IS NOT NULL THEN 1 ELSE 0 END)
+    FROM todos
+    GROUP BY owner_id"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_todo_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('open_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('done_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('trash_count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    dialect = op.get_bind().dialect.name
+    statements = {'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    statements = {'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRES_DOWNGRADE}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+    op.drop_table('user_todo_counters')
@@ -1,4 +1,7 @@
 from .config import settings
-from .database import Base, engine, get_db, SessionLocal
+from .database import Base, engine, get_db, SessionLocal, get_async_engine, get_async_db, get_async_sessionmaker
 
-__all__ = ["settings", "Base", "engine", "get_db", "SessionLocal"]
+__all__ = [
+    "settings", "Base", "engine", "get_db", "SessionLocal",
+    "get_async_engine", "get_async_db", "get_async_sessionmaker"
+]
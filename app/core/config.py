@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -12,12 +12,82 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./todo.db"
+    # URL cho engine async; mặc định suy ra từ DATABASE_URL (aiosqlite/asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Read replica (phân tách bằng dấu phẩy); rỗng = mọi truy vấn đi primary
+    READ_REPLICA_URLS: str = ""
+    # Sau khi user ghi, các request đọc của user đó đi primary trong số giây này
+    # (lớn hơn độ trễ replication; 0 = chỉ dính primary trong request đã ghi)
+    READ_AFTER_WRITE_SECONDS: float = 5
+    READ_AFTER_WRITE_MAX_USERS: int = 100000
+    
+    # Connection pool (áp dụng cho cả engine sync và async)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # Profile SQLite cho production (WAL, synchronous=NORMAL, mmap, cache, busy_timeout)
+    SQLITE_TUNED: bool = False
+    SQLITE_MMAP_SIZE: int = 268435456  # 256MB
+    SQLITE_CACHE_SIZE: int = -64000  # số âm = KB, tức ~64MB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    
+    # Chiến lược load tags của ToDo (xem benchmarks/tag_loading.py)
+    TODO_TAGS_LOADING: Literal["selectin", "joined"] = "selectin"
+    
+    # Số ToDo tối đa trong một request POST /todos/bulk
+    TODO_BULK_MAX_ITEMS: int = 1000
+    
+    # Số ToDo mỗi batch khi export streaming (GET /todos/export)
+    TODO_EXPORT_BATCH_SIZE: int = 500
+    
+    # Import streaming (POST /todos/import): số dòng mỗi chunk (một INSERT nhiều dòng),
+    # số lỗi tối đa trả về trong báo cáo và số dòng tối đa của một record CSV (ô nhiều dòng)
+    TODO_IMPORT_CHUNK_SIZE: int = 500
+    TODO_IMPORT_MAX_ERRORS: int = 1000
+    TODO_IMPORT_MAX_RECORD_LINES: int = 100
+    
+    # Thùng rác: ToDo đã xóa quá TRASH_RETENTION_DAYS ngày bị xóa vĩnh viễn bởi tác vụ nền
+    # chạy mỗi TRASH_PURGE_INTERVAL_SECONDS, mỗi transaction tối đa TRASH_PURGE_BATCH_SIZE row
+    # (0 ở retention hoặc interval = tắt purge; mặc định tắt vì purge xóa dữ liệu không khôi phục được)
+    TRASH_RETENTION_DAYS: int = 0
+    TRASH_PURGE_INTERVAL_SECONDS: int = 3600
+    TRASH_PURGE_BATCH_SIZE: int = 1000
+    # Lưu trữ: ToDo đã hoàn thành và không sửa trong ARCHIVE_DONE_AFTER_DAYS ngày được chuyển
+    # sang bảng todos_archive mỗi ARCHIVE_INTERVAL_SECONDS, mỗi transaction tối đa
+    # ARCHIVE_BATCH_SIZE row (0 ở số ngày hoặc interval = tắt lưu trữ)
+    ARCHIVE_DONE_AFTER_DAYS: int = 0
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+    ARCHIVE_BATCH_SIZE: int = 1000
     
     # JWT
     SECRET_KEY: str = "your-super-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Cache principal (user đã xác thực) theo token
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    
+    # Cache tags theo user (LRU theo số user, TTL là lưới an toàn khi chạy nhiều process)
+    TAG_CACHE_MAX_USERS: int = 10000
+    TAG_CACHE_TTL_SECONDS: int = 300
+    
+    # Password hashing (bcrypt) trong process pool riêng; 0 = dùng threadpool
+    BCRYPT_ROUNDS: int = 12
+    # Nếu đặt, work factor được hiệu chỉnh lúc khởi động theo độ trễ mục tiêu (ms), riêng
+    # từng process; nhiều worker/node nên hiệu chỉnh offline và cố định BCRYPT_ROUNDS
+    PASSWORD_HASH_TARGET_MS: Optional[int] = None
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    
+    @property
+    def read_replica_urls(self) -> list[str]:
+        """Danh sách URL read replica từ READ_REPLICA_URLS"""
+        return [url.strip() for url in self.READ_REPLICA_URLS.split(",") if url.strip()]
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,16 +1,95 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.pool import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool
+from app.core.routing import ReplicaSet, RoutingSession
+
+# Driver async tương ứng với từng backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Chuyển DATABASE_URL sync sang URL dùng driver async (aiosqlite/asyncpg)"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Không hỗ trợ async cho database '{url.get_backend_name()}'")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_engine_options(database_url: str, is_async: bool = False) -> dict:
+    """Tham số pool cho engine theo Settings (bỏ qua với SQLite in-memory)"""
+    url = make_url(database_url)
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            return options
+    options.update(
+        poolclass=InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def get_sqlite_pragmas() -> list[str]:
+    """Các PRAGMA của profile SQLite tối ưu (WAL, mmap, cache lớn, chờ khi bị lock)"""
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA foreign_keys=ON",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Chạy PRAGMA trên mỗi connection mới của pool"""
+    cursor = dbapi_connection.cursor()
+    for pragma in get_sqlite_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def enable_sqlite_tuning(sync_engine) -> None:
+    """Gắn profile SQLite tối ưu vào engine (với engine async truyền sync_engine)"""
+    event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+
 
 # Tạo engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = create_engine(settings.DATABASE_URL, **get_engine_options(settings.DATABASE_URL))
+
+# Read replica cho các method đọc của repository
+replica_engines = [
+    create_engine(url, **get_engine_options(url)) for url in settings.read_replica_urls
+]
+
+if settings.SQLITE_TUNED:
+    for _engine in (engine, *replica_engines):
+        if _engine.dialect.name == "sqlite":
+            enable_sqlite_tuning(_engine)
 
 # Tạo SessionLocal
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    replicas=ReplicaSet(replica_engines)
+)
 
 # Base class cho models
 Base = declarative_base()
@@ -23,3 +102,68 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _create_async_engine(async_url: str) -> AsyncEngine:
+    """Engine async cho URL đã có driver async (áp dụng profile SQLite nếu bật)"""
+    async_engine = create_async_engine(async_url, **get_engine_options(async_url, is_async=True))
+    if settings.SQLITE_TUNED and async_engine.dialect.name == "sqlite":
+        enable_sqlite_tuning(async_engine.sync_engine)
+    return async_engine
+
+
+# Engine async được tạo ở lần dùng đầu tiên (lifespan gọi lúc khởi động) thay vì lúc import:
+# DATABASE_URL không có driver async trong ASYNC_DRIVERS vẫn import được app (alembic,
+# script sync); lỗi cấu hình chỉ xuất hiện khi engine async thực sự được tạo.
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """Engine async cho request path (không chiếm slot threadpool khi chờ DB)"""
+    url = settings.ASYNC_DATABASE_URL
+    if not url:
+        try:
+            url = get_async_database_url(settings.DATABASE_URL)
+        except ValueError as e:
+            raise ValueError(f"{e}: hãy đặt ASYNC_DATABASE_URL (URL với driver async)") from e
+    return _create_async_engine(url)
+
+
+@lru_cache(maxsize=None)
+def get_async_replica_engines() -> list[AsyncEngine]:
+    """Engine async của các read replica (READ_REPLICA_URLS)"""
+    try:
+        urls = [get_async_database_url(url) for url in settings.read_replica_urls]
+    except ValueError as e:
+        raise ValueError(f"READ_REPLICA_URLS: {e}") from e
+    return [_create_async_engine(url) for url in urls]
+
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Factory AsyncSession (RoutingSession nhận sync_engine của các replica async).
+    
+    expire_on_commit=False: object vừa ghi bằng INSERT/UPDATE ... RETURNING không bị
+    expire sau commit nên không phát sinh SELECT refresh khi dựng response
+    """
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        autoflush=False,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=ReplicaSet([e.sync_engine for e in get_async_replica_engines()])
+    )
+
+
+async def dispose_async_engines() -> None:
+    """Đóng pool của các engine async đã được tạo"""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_async_replica_engines.cache_info().currsize:
+        for async_engine in get_async_replica_engines():
+            await async_engine.dispose()
+
+
+async def get_async_db():
+    """Dependency để lấy async database session"""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,20 @@
+import base64
+import json
+
+
+def encode_cursor(payload: dict) -> str:
+    """Mã hóa vị trí trang (sort key + id) thành cursor opaque (base64url JSON)"""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Giải mã cursor, raise ValueError nếu cursor không hợp lệ"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Cursor không hợp lệ") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Cursor không hợp lệ")
+    return payload
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.security import (
+    verify_password, get_password_hash, get_bcrypt_rounds, configure_password_hashing
+)
+
+
+class PasswordHasher:
+    """Chạy bcrypt trong process pool riêng để không chiếm threadpool/GIL của API"""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Tạo process pool khi dùng lần đầu (None = chạy trong threadpool mặc định)"""
+        if self.max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # Worker dùng cùng work factor với process chính
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=configure_password_hashing,
+                    initargs=(get_bcrypt_rounds(),)
+                )
+            return self._executor
+
+    async def _submit(self, func, *args):
+        """Gửi job vào pool, trả 503 khi hàng đợi đã đầy"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Hệ thống đang quá tải, vui lòng thử lại sau",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash password trong process pool"""
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Xác thực password trong process pool"""
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    @property
+    def pending(self) -> int:
+        """Số job đang chờ hoặc đang chạy"""
+        return self._pending
+
+    def shutdown(self) -> None:
+        """Dừng process pool (gọi khi app shutdown)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
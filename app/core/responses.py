@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(response_type: Any) -> TypeAdapter:
+    """TypeAdapter dùng chung cho mỗi kiểu response (dựng schema serializer chỉ một lần)"""
+    return TypeAdapter(response_type)
+
+
+class PydanticJSONResponse(Response):
+    """Response JSON cho giá trị đã validate, mã hóa thẳng bằng serializer của pydantic-core.
+
+    Route trả về Response thì FastAPI bỏ qua bước validate + serialize theo
+    response_model (response_model vẫn được giữ để sinh OpenAPI). response_type
+    mặc định là type(content); với list phải truyền kiểu, ví dụ list[ToDoResponse].
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, response_type: Optional[Any] = None, status_code: int = 200, **kwargs):
+        self.response_type = response_type or type(content)
+        super().__init__(content, status_code=status_code, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return get_type_adapter(self.response_type).dump_json(content)
@@ -0,0 +1,129 @@
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Optional, Sequence
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Key trong Session.info
+REPLICA_READS = "replica_reads"
+STICKY_PRIMARY = "sticky_primary"
+ROUTING_USER = "routing_user_id"
+
+# User vừa ghi: đọc của user đó đi primary trong READ_AFTER_WRITE_SECONDS giây
+# (in-process: chỉ có hiệu lực với các request cùng worker)
+recent_writers = TTLCache(
+    max_size=settings.READ_AFTER_WRITE_MAX_USERS,
+    ttl_seconds=settings.READ_AFTER_WRITE_SECONDS
+)
+
+
+class ReplicaSet:
+    """Tập read replica, chọn engine theo round-robin"""
+
+    def __init__(self, engines: Sequence[Engine]):
+        self.engines = list(engines)
+        self._cycle = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def next(self) -> Engine:
+        """Engine replica kế tiếp"""
+        with self._lock:
+            return next(self._cycle)
+
+
+class RoutingSession(Session):
+    """Session định tuyến đọc/ghi giữa primary và read replica.
+
+    - Mặc định mọi câu lệnh chạy trên primary (bind của session)
+    - Trong `replica_reads(session)` (các method đọc của repository được đánh dấu
+      `@replica_read`), SELECT chạy trên một replica chọn round-robin, cố định
+      trong suốt session để các câu lệnh của cùng request thấy cùng một snapshot
+    - Sau lần ghi đầu tiên (flush hoặc INSERT/UPDATE/DELETE) hoặc `pin_primary`,
+      session "dính" primary đến hết request để đọc lại thấy dữ liệu vừa ghi
+      bất kể độ trễ replication
+    - Với session đã gắn user (`bind_user`), lần ghi còn được ghi nhận vào
+      `recent_writers`: các request tiếp theo của user đó đọc từ primary trong
+      READ_AFTER_WRITE_SECONDS giây (read-your-writes giữa các request)
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if clause is not None and getattr(clause, "is_dml", False):
+            _mark_write(self)
+        if (
+            self.replicas
+            and self.info.get(REPLICA_READS)
+            and not self.info.get(STICKY_PRIMARY)
+            and not self._flushing
+            and not _wrote_recently(self)
+        ):
+            if self._replica is None:
+                self._replica = self.replicas.next()
+            return self._replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def _mark_write(session: Session) -> None:
+    """Đã ghi: session dính primary, user của session được ghi nhận là vừa ghi"""
+    session.info[STICKY_PRIMARY] = True
+    user_id = session.info.get(ROUTING_USER)
+    if user_id is not None:
+        recent_writers.set(user_id, True)
+
+
+def _wrote_recently(session: Session) -> bool:
+    """User của session đã ghi trong READ_AFTER_WRITE_SECONDS giây gần đây"""
+    user_id = session.info.get(ROUTING_USER)
+    return user_id is not None and recent_writers.get(user_id) is not None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary(session, flush_context):
+    """Đã ghi trong request: các lần đọc sau đi primary"""
+    _mark_write(session)
+
+
+def bind_user(session: Session, user_id: int) -> None:
+    """Gắn user của request vào session để áp dụng read-your-writes giữa các request"""
+    session.info[ROUTING_USER] = user_id
+
+
+def pin_primary(session: Session) -> None:
+    """Buộc session đọc/ghi trên primary đến hết request (dùng trước luồng read-modify-write)"""
+    session.info[STICKY_PRIMARY] = True
+
+
+@contextmanager
+def replica_reads(session: Session):
+    """Cho phép các SELECT trong block chạy trên read replica"""
+    session.info[REPLICA_READS] = session.info.get(REPLICA_READS, 0) + 1
+    try:
+        yield session
+    finally:
+        session.info[REPLICA_READS] -= 1
+
+
+def replica_read(method):
+    """Decorator cho method đọc của repository (`self.db` là Session)"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with replica_reads(self.db):
+            return method(self, *args, **kwargs)
+
+    return wrapper
@@ -1,19 +1,51 @@
+import re
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.cache import TTLCache
+from app.core.routing import bind_user
+
+
+
+def build_pwd_context(rounds: int) -> CryptContext:
+    """Tạo CryptContext bcrypt với work factor cho trước"""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_pwd_context(settings.BCRYPT_ROUNDS)
+BCRYPT_ROUNDS_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
 
 # OAuth2 scheme - dùng endpoint form cho Swagger UI
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/login/form")
 
+# Cache principal theo token để tránh query bảng users ở mọi request
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Principal của request đã xác thực (được cache theo token)"""
+    id: int
+    is_active: bool
+
+
+def invalidate_principal(user_id: int) -> int:
+    """Xóa các principal đã cache của user (gọi khi user thay đổi)"""
+    return principal_cache.delete_where(lambda _, principal: principal.id == user_id)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Xác thực password"""
@@ -25,6 +57,56 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Kiểm tra hash có work factor thấp hơn cấu hình hiện tại (cần hash lại) không.
+    
+    Hash mạnh hơn không bị hạ cấp: các process/node hiệu chỉnh ra work factor khác nhau
+    không ghi đè hash của nhau ở mỗi lần login.
+    """
+    match = BCRYPT_ROUNDS_PATTERN.match(hashed_password)
+    if match is None:
+        return pwd_context.needs_update(hashed_password)
+    return int(match.group(1)) < get_bcrypt_rounds()
+
+
+def get_bcrypt_rounds() -> int:
+    """Work factor bcrypt đang dùng"""
+    return pwd_context.to_dict()["bcrypt__rounds"]
+
+
+def configure_password_hashing(rounds: int) -> None:
+    """Đổi work factor bcrypt cho process hiện tại"""
+    global pwd_context
+    pwd_context = build_pwd_context(rounds)
+
+
+def measure_bcrypt(rounds: int, samples: int = 3) -> tuple[float, float]:
+    """Đo thời gian trung bình (ms) hash và verify với work factor cho trước"""
+    context = build_pwd_context(rounds)
+    hash_ms = verify_ms = 0.0
+    for _ in range(samples):
+        start = time.perf_counter()
+        hashed = context.hash("benchmark-password")
+        hash_ms += (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        context.verify("benchmark-password", hashed)
+        verify_ms += (time.perf_counter() - start) * 1000
+    return hash_ms / samples, verify_ms / samples
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3
+) -> int:
+    """Chọn work factor lớn nhất có thời gian verify (trung bình samples lần đo) không vượt quá target_ms"""
+    rounds = min_rounds
+    for candidate in range(min_rounds, max_rounds + 1):
+        _, verify_ms = measure_bcrypt(candidate, samples=samples)
+        if verify_ms > target_ms:
+            break
+        rounds = candidate
+    return rounds
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Tạo JWT access token"""
     to_encode = data.copy()
@@ -48,8 +130,8 @@ def decode_access_token(token: str) -> Optional[dict]:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
     """Dependency lấy user hiện tại từ token"""
     from app.models.user import User
     
@@ -67,11 +149,21 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    principal = principal_cache.get(token)
+    if principal is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        
+        principal = CurrentUser(id=user.id, is_active=user.is_active)
+        # Không cache lâu hơn thời hạn còn lại của token
+        expires_in = payload.get("exp", 0) - time.time()
+        principal_cache.set(token, principal, ttl_seconds=expires_in)
     
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="User không hoạt động")
     
-    return user
+    # Cùng session với route (dependency get_async_db được cache theo request)
+    bind_user(db.sync_session, principal.id)
+    return principal
@@ -1,4 +1,6 @@
-from .todo import ToDo, Tag, todo_tags
+from .todo import ToDo, ToDoArchive, Tag, todo_tags
+from .todo_counters import UserTodoCounters
 from .user import User
+from . import todo_search  # noqa: F401 - DDL full-text search cho create_all
 
-__all__ = ["ToDo", "Tag", "todo_tags", "User"]
+__all__ = ["ToDo", "ToDoArchive", "Tag", "todo_tags", "UserTodoCounters", "User"]
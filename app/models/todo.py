@@ -1,15 +1,27 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, Date, Index, JSON, and_, false, true
+from datetime import datetime, timezone
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
+def utcnow() -> datetime:
+    """Thời điểm hiện tại (UTC) sinh phía Python.
+    
+    Giữ cùng định dạng/độ chính xác với giá trị bind khi so sánh keyset
+    (SQLite lưu CURRENT_TIMESTAMP không có microsecond).
+    """
+    return datetime.now(timezone.utc)
+
+
 # Bảng liên kết nhiều-nhiều giữa todos và tags
 todo_tags = Table(
     "todo_tags",
     Base.metadata,
     Column("todo_id", Integer, ForeignKey("todos.id", ondelete="CASCADE"), primary_key=True),
-    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # PK (todo_id, tag_id) phục vụ todo -> tags; index ngược phục vụ tag -> todos
+    Index("ix_todo_tags_tag_id_todo_id", "tag_id", "todo_id")
 )
 
 
@@ -28,6 +40,11 @@ class Tag(Base):
     # Relationships
     owner = relationship("User", backref="tags")
     todos = relationship("ToDo", secondary=todo_tags, back_populates="tags")
+    
+    __table_args__ = (
+        # Tên tag là duy nhất trong phạm vi mỗi user
+        Index("uq_tags_owner_id_name", "owner_id", "name", unique=True),
+    )
 
 
 class ToDo(Base):
@@ -40,8 +57,8 @@ class ToDo(Base):
     description = Column(Text, nullable=True)
     is_done = Column(Boolean, default=False, nullable=False)
     due_date = Column(Date, nullable=True)  # Deadline
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)  # Soft delete
     
     # Foreign key to users
@@ -51,7 +68,68 @@ class ToDo(Base):
     owner = relationship("User", back_populates="todos")
     tags = relationship("Tag", secondary=todo_tags, back_populates="todos")
     
+    # Không map: chỉ có giá trị với ToDo đọc từ todos_archive (GET /todos?include_archived=true)
+    archived_at = None
+    
+    __table_args__ = (
+        # Keyset pagination cho danh sách todos: một index cho mỗi cột sort, id làm tie-breaker
+        Index("ix_todos_owner_id_deleted_at_created_at_id", owner_id, deleted_at, created_at, id),
+        Index("ix_todos_owner_id_deleted_at_updated_at_id", owner_id, deleted_at, updated_at, id),
+        Index("ix_todos_owner_id_deleted_at_due_date_id", owner_id, deleted_at, due_date, id),
+        Index("ix_todos_owner_id_deleted_at_title_id", owner_id, deleted_at, title, id),
+        # Partial index cho overdue/today: chỉ todos chưa xóa và chưa hoàn thành
+        Index(
+            "ix_todos_owner_id_due_date_open",
+            owner_id,
+            due_date,
+            postgresql_where=and_(deleted_at.is_(None), is_done == false()),
+            sqlite_where=and_(deleted_at.is_(None), is_done == false()),
+        ),
+        # Partial index cho purge thùng rác: chỉ todos đã xóa, theo thời điểm xóa
+        Index(
+            "ix_todos_deleted_at_trash",
+            deleted_at,
+            postgresql_where=deleted_at.isnot(None),
+            sqlite_where=deleted_at.isnot(None),
+        ),
+        # Partial index cho job lưu trữ: chỉ todos đã hoàn thành chưa xóa, theo updated_at
+        Index(
+            "ix_todos_updated_at_done",
+            updated_at,
+            postgresql_where=and_(deleted_at.is_(None), is_done == true()),
+            sqlite_where=and_(deleted_at.is_(None), is_done == true()),
+        ),
+        # Không tái sử dụng id đã xóa/lưu trữ trên SQLite (id được giữ nguyên trong todos_archive)
+        {"sqlite_autoincrement": True},
+    )
+    
     @property
     def is_deleted(self) -> bool:
         """Check if todo is soft deleted"""
         return self.deleted_at is not None
+
+
+class ToDoArchive(Base):
+    """SQLAlchemy model cho bảng todos_archive (ToDo đã hoàn thành từ lâu).
+    
+    Giữ nguyên id của todos để khôi phục; tags lưu dạng danh sách tag_ids vì
+    todo_tags chỉ tham chiếu todos.
+    """
+    
+    __tablename__ = "todos_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(100), nullable=False)
+    description = Column(Text, nullable=True)
+    is_done = Column(Boolean, nullable=False)
+    due_date = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    tag_ids = Column(JSON, nullable=False, default=list)
+    archived_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_todos_archive_owner_id_created_at_id", owner_id, created_at, id),
+    )
@@ -0,0 +1,112 @@
+"""
+Bộ đếm ToDo theo user (user_todo_counters): open, done, trash
+
+Được cập nhật bằng trigger trên `todos` trong cùng transaction với câu lệnh ghi,
+nên mọi đường ghi (create, bulk, update, soft delete, purge, lưu trữ...) đều
+giữ bộ đếm đúng mà repository không phải tự tính delta.
+
+- SQLite: trigger FOR EACH ROW (UPSERT khi insert, cộng/trừ khi update/delete)
+- PostgreSQL: trigger FOR EACH STATEMENT với transition table, mỗi câu lệnh
+  chỉ ghi một lần cho mỗi owner kể cả khi ghi hàng loạt
+
+Trigger được gắn vào `create_all` (cho test/dev) và được tạo bằng migration 0007
+trên database thật.
+"""
+from sqlalchemy import Column, Integer, ForeignKey, DDL, event
+from app.core.database import Base
+from app.models.todo import ToDo
+
+COUNTERS_TABLE = "user_todo_counters"
+
+
+class UserTodoCounters(Base):
+    """SQLAlchemy model cho bảng user_todo_counters (chỉ đọc từ app, ghi bằng trigger)"""
+
+    __tablename__ = COUNTERS_TABLE
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    open_count = Column(Integer, nullable=False, default=0, server_default="0")
+    done_count = Column(Integer, nullable=False, default=0, server_default="0")
+    trash_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+def _sqlite_apply(row: str, sign: str) -> str:
+    """UPSERT cộng (sign='+') hoặc trừ (sign='-') nhóm của row vào bộ đếm của owner"""
+    # SQLite: biểu thức so sánh trả về 0/1
+    return f"""INSERT INTO {COUNTERS_TABLE}(user_id, open_count, done_count, trash_count) VALUES (
+            {row}.owner_id,
+            {sign}({row}.deleted_at IS NULL AND NOT {row}.is_done),
+            {sign}({row}.deleted_at IS NULL AND {row}.is_done),
+            {sign}({row}.deleted_at IS NOT NULL)
+        )
+        ON CONFLICT(user_id) DO UPDATE SET
+            open_count = open_count + excluded.open_count,
+            done_count = done_count + excluded.done_count,
+            trash_count = trash_count + excluded.trash_count;"""
+
+
+SQLITE_COUNTERS_DDL = [
+    f"""CREATE TRIGGER {COUNTERS_TABLE}_ai AFTER INSERT ON todos BEGIN
+        {_sqlite_apply("new", "+")}
+    END""",
+    f"""CREATE TRIGGER {COUNTERS_TABLE}_ad AFTER DELETE ON todos BEGIN
+        {_sqlite_apply("old", "-")}
+    END""",
+    f"""CREATE TRIGGER {COUNTERS_TABLE}_au AFTER UPDATE OF is_done, deleted_at, owner_id ON todos BEGIN
+        {_sqlite_apply("old", "-")}
+        {_sqlite_apply("new", "+")}
+    END""",
+]
+
+
+def _postgres_function(name: str, changed_rows: str) -> str:
+    """Hàm trigger: gộp các row thay đổi theo owner rồi UPSERT delta vào bộ đếm"""
+    return f"""CREATE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO {COUNTERS_TABLE} AS c (user_id, open_count, done_count, trash_count)
+        SELECT owner_id,
+            coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND NOT is_done), 0),
+            coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND is_done), 0),
+            coalesce(sum(sign) FILTER (WHERE deleted_at IS NOT NULL), 0)
+        FROM ({changed_rows}) AS changed
+        GROUP BY owner_id
+        HAVING coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND NOT is_done), 0) <> 0
+            OR coalesce(sum(sign) FILTER (WHERE deleted_at IS NULL AND is_done), 0) <> 0
+            OR coalesce(sum(sign) FILTER (WHERE deleted_at IS NOT NULL), 0) <> 0
+        ON CONFLICT (user_id) DO UPDATE SET
+            open_count = c.open_count + EXCLUDED.open_count,
+            done_count = c.done_count + EXCLUDED.done_count,
+            trash_count = c.trash_count + EXCLUDED.trash_count;
+        RETURN NULL;
+    END $$"""
+
+
+_NEW_ROWS = "SELECT owner_id, is_done, deleted_at, 1 AS sign FROM new_rows"
+_OLD_ROWS = "SELECT owner_id, is_done, deleted_at, -1 AS sign FROM old_rows"
+
+POSTGRES_COUNTERS_DDL = [
+    _postgres_function(f"{COUNTERS_TABLE}_insert", _NEW_ROWS),
+    _postgres_function(f"{COUNTERS_TABLE}_delete", _OLD_ROWS),
+    _postgres_function(f"{COUNTERS_TABLE}_update", f"{_OLD_ROWS} UNION ALL {_NEW_ROWS}"),
+    f"""CREATE TRIGGER {COUNTERS_TABLE}_ai AFTER INSERT ON todos
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {COUNTERS_TABLE}_insert()""",
+    f"""CREATE TRIGGER {COUNTERS_TABLE}_ad AFTER DELETE ON todos
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {COUNTERS_TABLE}_delete()""",
+    f"""CREATE TRIGGER {COUNTERS_TABLE}_au AFTER UPDATE ON todos
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {COUNTERS_TABLE}_update()""",
+]
+
+POSTGRES_COUNTERS_DROP_DDL = [
+    f"DROP FUNCTION IF EXISTS {COUNTERS_TABLE}_{name}() CASCADE" for name in ("insert", "delete", "update")
+]
+
+# Thân trigger/hàm chỉ được kiểm tra khi chạy nên có thể tạo trước bảng bộ đếm
+for _statement in SQLITE_COUNTERS_DDL:
+    event.listen(ToDo.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_COUNTERS_DDL:
+    event.listen(ToDo.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in POSTGRES_COUNTERS_DROP_DDL:
+    event.listen(ToDo.__table__, "before_drop", DDL(_statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,67 @@
+"""
+Full-text search cho todos (title + description)
+
+- SQLite: bảng ảo FTS5 `todos_fts` (external content trỏ vào `todos`), đồng bộ bằng trigger
+- PostgreSQL: cột generated `search_vector tsvector` + GIN index
+
+Các object này không được map trong ORM; DDL được gắn vào `create_all` (cho test/dev)
+và được tạo bằng migration 0004 trên database thật.
+"""
+from sqlalchemy import DDL, event
+from app.models.todo import ToDo
+
+FTS_TABLE = "todos_fts"
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+SQLITE_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description,
+        content='todos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+SQLITE_SEARCH_DROP_DDL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_SEARCH_DDL = [
+    f"""ALTER TABLE todos ADD COLUMN {SEARCH_VECTOR_COLUMN} tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED""",
+    f"CREATE INDEX ix_todos_{SEARCH_VECTOR_COLUMN} ON todos USING gin ({SEARCH_VECTOR_COLUMN})",
+]
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(ToDo.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(ToDo.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_SEARCH_DROP_DDL:
+    event.listen(ToDo.__table__, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Bỏ qua các object search (không map trong ORM) khi Alembic autogenerate/compare"""
+    if type_ == "table" and name and name.startswith(FTS_TABLE):
+        return False
+    if type_ == "column" and name == SEARCH_VECTOR_COLUMN:
+        return False
+    if type_ == "index" and name == f"ix_todos_{SEARCH_VECTOR_COLUMN}":
+        return False
+    return True
@@ -1,37 +1,149 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from sqlalchemy import insert, lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.routing import replica_read
 from app.models.todo import Tag
 
 
+@dataclass(frozen=True)
+class CachedTag:
+    """Dữ liệu một Tag trong cache (dùng được với TagResponse.model_validate)"""
+    id: int
+    name: str
+    color: str
+    owner_id: int
+
+
+class UserTags:
+    """Snapshot tags của một user: id -> tag, name -> id"""
+
+    def __init__(self, tags: Iterable[CachedTag]):
+        self.by_id = {tag.id: tag for tag in tags}
+        self.by_name = {tag.name: tag.id for tag in self.by_id.values()}
+
+    def all(self) -> list[CachedTag]:
+        """Tất cả tags theo thứ tự id"""
+        return sorted(self.by_id.values(), key=lambda tag: tag.id)
+
+    def owned(self, tag_ids: Iterable[int]) -> list[int]:
+        """Các tag id (không trùng, giữ thứ tự) thuộc về user"""
+        return [tag_id for tag_id in dict.fromkeys(tag_ids) if tag_id in self.by_id]
+
+
+# Cache tags theo owner_id: LRU theo user, bị xóa khi user tạo/sửa/xóa tag.
+# TTL là lưới an toàn khi chạy nhiều process (invalidation chỉ trong process).
+tag_cache = TTLCache(
+    max_size=settings.TAG_CACHE_MAX_USERS,
+    ttl_seconds=settings.TAG_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_tags(owner_id: int) -> None:
+    """Xóa tags đã cache của user (gọi sau khi tags thay đổi)"""
+    tag_cache.delete(owner_id)
+
+
 class TagRepository:
     """Repository quản lý dữ liệu Tag với SQLAlchemy"""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def get_all(self, owner_id: int) -> list[Tag]:
-        """Lấy tất cả tags của owner"""
-        return self.db.query(Tag).filter(Tag.owner_id == owner_id).all()
+    def get_user_tags(self, owner_id: int, reload: bool = False) -> UserTags:
+        """Tags của owner từ cache; khi miss thì nạp bằng một SELECT.
+    
+        Luôn đọc từ primary: nạp cache từ replica có thể giữ dữ liệu trễ đến hết TTL.
+        """
+        user_tags = None if reload else tag_cache.get(owner_id)
+        if user_tags is None:
+            rows = self.db.execute(lambda_stmt(
+                lambda: select(Tag.id, Tag.name, Tag.color, Tag.owner_id).where(Tag.owner_id == owner_id)
+            )).all()
+            user_tags = UserTags(CachedTag(*row) for row in rows)
+            tag_cache.set(owner_id, user_tags)
+        return user_tags
+    
+    def get_user_tags_including(self, owner_id: int, tag_ids: Iterable[int]) -> UserTags:
+        """Tags của owner từ cache, nạp lại một lần nếu thiếu id nào trong tag_ids
+        (tag vừa tạo ở process khác, cache của process này chưa thấy)
+        """
+        user_tags = self.get_user_tags(owner_id)
+        if any(tag_id not in user_tags.by_id for tag_id in tag_ids):
+            user_tags = self.get_user_tags(owner_id, reload=True)
+        return user_tags
+    
+    def get_all(self, owner_id: int) -> list[CachedTag]:
+        """Lấy tất cả tags của owner (từ cache)"""
+        return self.get_user_tags(owner_id).all()
+    
+    def get_cached(self, tag_id: int, owner_id: int) -> Optional[CachedTag]:
+        """Lấy tag theo ID và owner_id từ cache (nạp lại một lần nếu miss)"""
+        return self.get_user_tags_including(owner_id, [tag_id]).by_id.get(tag_id)
     
+    def get_by_ids(self, tag_ids: list[int], owner_id: int) -> list[Tag]:
+        """Tag ORM (gắn vào session, không query) cho các id thuộc owner, giữ thứ tự.
+    
+        Nạp lại cache một lần nếu thiếu id (tag vừa tạo ở process khác).
+        """
+        user_tags = self.get_user_tags_including(owner_id, tag_ids)
+        tags = []
+        for tag_id in user_tags.owned(tag_ids):
+            cached = user_tags.by_id[tag_id]
+            tag = Tag(id=cached.id, name=cached.name, color=cached.color, owner_id=cached.owner_id)
+            make_transient_to_detached(tag)
+            tags.append(self.db.merge(tag, load=False))
+        return tags
+    
+    @replica_read
     def get_by_id(self, tag_id: int, owner_id: int) -> Optional[Tag]:
         """Lấy tag theo ID và owner_id"""
-        return self.db.query(Tag).filter(
-            Tag.id == tag_id,
-            Tag.owner_id == owner_id
-        ).first()
-    
-    def get_by_name(self, name: str, owner_id: int) -> Optional[Tag]:
-        """Tìm tag theo tên"""
-        return self.db.query(Tag).filter(
-            Tag.name == name,
-            Tag.owner_id == owner_id
-        ).first()
+        return self.db.scalars(lambda_stmt(
+            lambda: select(Tag).where(Tag.id == tag_id, Tag.owner_id == owner_id)
+        )).first()
+    
+    def get_by_name(self, name: str, owner_id: int) -> Optional[CachedTag]:
+        """Tìm tag theo tên (từ cache)"""
+        user_tags = self.get_user_tags(owner_id)
+        tag_id = user_tags.by_name.get(name)
+        return user_tags.by_id[tag_id] if tag_id is not None else None
+    
+    def get_or_create_by_names(self, names: Iterable[str], owner_id: int) -> tuple[dict[str, int], bool]:
+        """Map tên tag -> id, tạo các tag chưa có bằng một INSERT nhiều dòng, trả về (map, có tạo tag).
+        
+        Không commit: tag mới nằm trong transaction của caller, caller commit rồi gọi
+        invalidate_tags. INSERT chạy trong savepoint; nếu trùng tên do request khác vừa
+        tạo cùng tag (IntegrityError) thì nạp lại cache và chỉ tạo những tên còn thiếu.
+        """
+        names = list(dict.fromkeys(names))
+        user_tags = self.get_user_tags(owner_id)
+        tag_ids = {name: user_tags.by_name[name] for name in names if name in user_tags.by_name}
+        created = False
+        while len(tag_ids) < len(names):
+            missing = [name for name in names if name not in tag_ids]
+            try:
+                with self.db.begin_nested():
+                    rows = self.db.execute(
+                        insert(Tag).returning(Tag.name, Tag.id),
+                        [{"name": name, "owner_id": owner_id} for name in missing]
+                    ).all()
+            except IntegrityError:
+                user_tags = self.get_user_tags(owner_id, reload=True)
+                tag_ids.update({name: user_tags.by_name[name] for name in missing if name in user_tags.by_name})
+                continue
+            tag_ids.update(rows)
+            created = True
+        return {name: tag_ids[name] for name in names}, created
     
     def create(self, name: str, owner_id: int, color: str = "#3B82F6") -> Tag:
         """Tạo tag mới"""
         new_tag = Tag(name=name, color=color, owner_id=owner_id)
         self.db.add(new_tag)
         self.db.commit()
+        invalidate_tags(owner_id)
         self.db.refresh(new_tag)
         return new_tag
     
@@ -41,11 +153,14 @@ class TagRepository:
             if value is not None and hasattr(tag, key):
                 setattr(tag, key, value)
         self.db.commit()
+        invalidate_tags(tag.owner_id)
         self.db.refresh(tag)
         return tag
     
     def delete(self, tag: Tag) -> bool:
         """Xóa tag"""
+        owner_id = tag.owner_id
         self.db.delete(tag)
         self.db.commit()
+        invalidate_tags(owner_id)
         return True
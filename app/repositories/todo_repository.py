@@ -1,23 +1,83 @@
+import re
 from typing import Optional
 from datetime import date, datetime
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, asc
-from app.models.todo import ToDo, Tag
+from collections import defaultdict
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload, noload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import desc, asc, and_, or_, func, nulls_last, tuple_, literal, literal_column, select, table, column, insert, update, delete, null, type_coerce, union_all, lambda_stmt, cast, String
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.routing import replica_read
+from app.models.todo import ToDo, ToDoArchive, Tag, todo_tags, utcnow
+from app.models.todo_counters import UserTodoCounters
+from app.models.todo_search import FTS_TABLE, SEARCH_VECTOR_COLUMN
+from app.repositories.tag_repository import TagRepository
+
+# Các cột được phép sort (mỗi cột có index (owner_id, deleted_at, <cột>, id) cho keyset)
+SORTABLE_FIELDS = ("created_at", "updated_at", "due_date", "title")
+DEFAULT_SORT = "-created_at"
+# Sort theo độ liên quan, chỉ có hiệu lực khi có q (chỉ hỗ trợ offset pagination)
+RANK_SORT = "rank"
+
+# Các cột chung giữa todos và todos_archive
+ARCHIVED_FIELDS = (
+    "id", "title", "description", "is_done", "due_date", "created_at", "updated_at", "deleted_at", "owner_id"
+)
+
+# Các cột của export (tags được gắn thêm theo batch)
+EXPORT_FIELDS = ("id", "title", "description", "is_done", "due_date", "created_at", "updated_at")
+
+# Các section của GET /todos/dashboard
+DASHBOARD_SECTIONS = ("today", "overdue", "open")
+
+# Từ khóa tìm kiếm; mỗi từ được match theo prefix
+SEARCH_TERM = re.compile(r"\w+")
+fts_table = table(FTS_TABLE, column("rowid"), column("rank"), column(FTS_TABLE))
+
+# Chiến lược load tags: selectin = 1 query IN(...) cho cả trang, joined = LEFT JOIN
+# (nhân số row theo số tag, LIMIT bị bọc subquery), none = không load (chỉ để benchmark)
+TAGS_LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "none": noload,
+}
+
+
+def parse_sort(sort: Optional[str]) -> tuple[str, bool]:
+    """Tách sort thành (tên cột, desc); sort không hợp lệ dùng mặc định -created_at"""
+    field = (sort or "").lstrip("-")
+    if field not in SORTABLE_FIELDS:
+        sort, field = DEFAULT_SORT, DEFAULT_SORT.lstrip("-")
+    return field, sort.startswith("-")
 
 
 class ToDoRepository:
     """Repository quản lý dữ liệu ToDo với SQLAlchemy"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, tags_loading: Optional[str] = None):
         self.db = db
+        self.tags_loading = tags_loading or settings.TODO_TAGS_LOADING
     
-    def _base_query(self, owner_id: int, include_deleted: bool = False):
-        """Base query với filter owner và soft delete"""
-        query = self.db.query(ToDo).options(joinedload(ToDo.tags)).filter(ToDo.owner_id == owner_id)
-        if not include_deleted:
-            query = query.filter(ToDo.deleted_at.is_(None))
-        return query
+    def _tags_option(self, entity=ToDo):
+        """Option load ToDo.tags theo chiến lược đã cấu hình"""
+        return TAGS_LOADERS[self.tags_loading](entity.tags)
+    
+    def _select_todos(self) -> StatementLambdaElement:
+        """lambda_stmt SELECT ToDo kèm option load tags.
+        
+        Các method đọc nối thêm điều kiện bằng `stmt += lambda s: ...`: cấu trúc câu lệnh
+        và SQL đã compile được cache theo vị trí lambda, mỗi lần gọi chỉ lấy lại giá trị
+        tham số (owner_id, today...) từ closure thay vì dựng lại cả cây câu lệnh.
+        """
+        option = self._tags_option()
+        return lambda_stmt(lambda: select(ToDo).options(option))
+    
+    def _todos(self, statement) -> list[ToDo]:
+        """Chạy SELECT ToDo (unique: joinedload collection nhân số row theo tag)"""
+        return self.db.scalars(statement).unique().all()
     
+    @replica_read
     def get_all(
         self,
         owner_id: int,
@@ -25,71 +85,381 @@ class ToDoRepository:
         q: Optional[str] = None,
         sort: Optional[str] = None,
         limit: int = 10,
-        offset: int = 0
-    ) -> tuple[list[ToDo], int]:
-        """Lấy danh sách ToDo của owner với filter, search, sort và pagination từ DB"""
-        query = self._base_query(owner_id)
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+        include_archived: bool = False,
+        tag_ids: Optional[list[int]] = None,
+        tag_mode: str = "any"
+    ) -> tuple[list[ToDo], Optional[int], bool]:
+        """Lấy danh sách ToDo của owner với filter, search, sort và pagination từ DB
+        
+        Trả về (todos, total, has_more). Nếu có cursor thì dùng keyset pagination
+        (bỏ qua offset). total được tính bằng window function trong cùng query;
+        với with_total=False thì không đếm (total=None).
+        
+        include_archived=True đọc thêm todos_archive (UNION ALL); ToDo lưu trữ có
+        archived_at và tags lấy từ tag_ids. Khi đó search dùng ILIKE, không xếp hạng.
+        
+        tag_ids lọc ToDo có ít nhất một (tag_mode="any") hoặc tất cả (tag_mode="all")
+        các tag; không dùng được cùng include_archived.
+        """
+        if tag_ids and include_archived:
+            raise ValueError("Lọc theo tag không hỗ trợ include_archived")
+        source = self._with_archive(owner_id) if include_archived else None
+        entity = aliased(ToDo, source, adapt_on_names=True) if include_archived else ToDo
+        filters = [entity.owner_id == owner_id, entity.deleted_at.is_(None)]
         
         # Filter by is_done
         if is_done is not None:
-            query = query.filter(ToDo.is_done == is_done)
+            filters.append(entity.is_done == is_done)
         
-        # Search by title
+        # Full-text search trên title + description
+        rank = None
         if q:
-            query = query.filter(ToDo.title.ilike(f"%{q}%"))
+            search_filter, rank = self._search(q, entity)
+            filters.append(search_filter)
         
-        # Get total count before pagination
-        total = query.count()
+        # Filter theo tags (subquery trên todo_tags, seek bằng index (tag_id, todo_id))
+        if tag_ids:
+            filters.append(self._tag_filter(tag_ids, tag_mode))
         
-        # Sort
-        if sort:
-            if sort.startswith("-"):
-                sort_field = sort.lstrip("-")
-                if hasattr(ToDo, sort_field):
-                    query = query.order_by(desc(getattr(ToDo, sort_field)))
-            else:
-                if hasattr(ToDo, sort):
-                    query = query.order_by(asc(getattr(ToDo, sort)))
+        statement = select(entity).options(self._tags_option(entity)).where(*filters)
+        
+        # Sort (id làm tie-breaker để thứ tự ổn định)
+        field, descending = parse_sort(sort)
+        nullable = getattr(ToDo, field).nullable
+        if self.ranks(sort, q, include_archived):
+            if cursor:
+                raise ValueError("Cursor không hỗ trợ sort=rank, hãy dùng offset")
+            statement = rank(statement)
+        else:
+            sort_column = getattr(entity, field)
+            direction = desc if descending else asc
+            order_column = direction(sort_column)
+            if nullable:
+                order_column = nulls_last(order_column)
+            statement = statement.order_by(order_column, direction(entity.id))
+        
+        if include_archived:
+            statement = statement.add_columns(source.c.archived_at, source.c.tag_ids)
+        
+        # Không search/archive: total đọc từ bộ đếm theo user (O(1), không quét todos).
+        # Ngược lại COUNT(*) OVER () trong cùng round-trip, được tính trước LIMIT; với
+        # cursor, điều kiện keyset làm window chỉ đếm phần còn lại nên phải đếm riêng.
+        counted_total = with_total and not q and not include_archived and not tag_ids
+        window_total = with_total and not cursor and not counted_total
+        if window_total:
+            statement = statement.add_columns(func.count().over().label("total"))
+        
+        # Pagination (lấy thêm 1 row để biết còn trang sau)
+        if cursor:
+            value, last_id = self._decode_keyset(cursor, field, descending)
+            statement = statement.where(
+                self._keyset_filter(getattr(entity, field), entity.id, nullable, descending, value, last_id)
+            )
         else:
-            # Default sort by created_at desc
-            query = query.order_by(desc(ToDo.created_at))
+            statement = statement.offset(offset)
+        result = self.db.execute(statement.limit(limit + 1))
         
-        # Pagination
-        todos = query.offset(offset).limit(limit).all()
+        total = None
+        if include_archived or window_total:
+            # Row có cột thêm (tag_ids là list, không hash được): unique theo ToDo
+            rows = result.unique(lambda row: row[0]).all()
+            todos = [row[0] for row in rows]
+            if window_total and rows:
+                total = rows[0].total
+        else:
+            rows = todos = result.unique().scalars().all()
+        if include_archived:
+            for todo, archived_at, archived_tag_ids, *_ in rows:
+                if archived_at is not None:
+                    todo.archived_at = archived_at
+                    self._set_tags(todo, archived_tag_ids)
+        if counted_total:
+            total = self._counted_total(owner_id, is_done)
+        elif with_total and total is None:
+            total = self.db.scalar(select(func.count(entity.id)).where(*filters))
+        
+        has_more = len(todos) > limit
+        return todos[:limit], total, has_more
+    
+    @staticmethod
+    def _tag_filter(tag_ids: list[int], tag_mode: str = "any"):
+        """Điều kiện ToDo gắn với bất kỳ tag nào (any: EXISTS) hoặc tất cả các tag
+        (all: GROUP BY todo_id HAVING count = số tag) trong tag_ids
+        """
+        tag_ids = list(dict.fromkeys(tag_ids))
+        if tag_mode == "all":
+            return ToDo.id.in_(
+                select(todo_tags.c.todo_id)
+                .where(todo_tags.c.tag_id.in_(tag_ids))
+                .group_by(todo_tags.c.todo_id)
+                .having(func.count() == len(tag_ids))
+            )
+        return select(todo_tags.c.todo_id).where(
+            todo_tags.c.todo_id == ToDo.id, todo_tags.c.tag_id.in_(tag_ids)
+        ).exists()
+    
+    def _counted_total(self, owner_id: int, is_done: Optional[bool] = None) -> int:
+        """Số ToDo chưa xóa của owner (theo is_done) từ bảng user_todo_counters"""
+        columns = {
+            None: UserTodoCounters.open_count + UserTodoCounters.done_count,
+            False: UserTodoCounters.open_count,
+            True: UserTodoCounters.done_count,
+        }
+        total = self.db.scalar(select(columns[is_done]).where(UserTodoCounters.user_id == owner_id))
+        return total or 0
+    
+    @replica_read
+    def get_stats(self, owner_id: int) -> tuple[dict, list[tuple[int, int]]]:
+        """Thống kê ToDo của owner: ({open, done, overdue, due_today, trash}, [(tag_id, count)])
+        
+        Một câu lệnh UNION ALL: nhánh đầu (tag_id NULL) là một row các scalar subquery,
+        open/done/trash đọc từ bộ đếm, overdue/due_today đếm trên partial index
+        (owner_id, due_date) với cùng điều kiện như /overdue và /today (phụ thuộc ngày
+        nên không duy trì được bằng bộ đếm); nhánh sau đếm ToDo chưa xóa theo tag bằng
+        GROUP BY trên todo_tags (số đếm nằm ở cột open).
+        """
+        today = date.today()
         
-        return todos, total
+        def counter(column):
+            return func.coalesce(
+                select(column).where(UserTodoCounters.user_id == owner_id).scalar_subquery(), 0
+            )
+        
+        def count(*filters):
+            return select(func.count()).select_from(ToDo).where(
+                ToDo.owner_id == owner_id, ToDo.deleted_at.is_(None), *filters
+            ).scalar_subquery()
+        
+        totals = select(
+            null().label("tag_id"),
+            counter(UserTodoCounters.open_count).label("open"),
+            counter(UserTodoCounters.done_count).label("done"),
+            count(ToDo.due_date < today, ToDo.is_done == False).label("overdue"),
+            count(ToDo.due_date == today).label("due_today"),
+            counter(UserTodoCounters.trash_count).label("trash"),
+        )
+        by_tag = (
+            select(todo_tags.c.tag_id, func.count(), null(), null(), null(), null())
+            .join(ToDo, ToDo.id == todo_tags.c.todo_id)
+            .where(ToDo.owner_id == owner_id, ToDo.deleted_at.is_(None))
+            .group_by(todo_tags.c.tag_id)
+        )
+        counts, tag_counts = None, []
+        for row in self.db.execute(union_all(totals, by_tag)):
+            if row.tag_id is None:
+                counts = row._asdict()
+                del counts["tag_id"]
+            else:
+                tag_counts.append((row.tag_id, row.open))
+        return counts, tag_counts
+    
+    def _with_archive(self, owner_id: int):
+        """Subquery UNION ALL giữa todos và todos_archive của owner (thêm archived_at, tag_ids)"""
+        live = select(
+            *(getattr(ToDo, name) for name in ARCHIVED_FIELDS),
+            type_coerce(null(), ToDoArchive.archived_at.type).label("archived_at"),
+            type_coerce(null(), ToDoArchive.tag_ids.type).label("tag_ids"),
+        ).where(ToDo.owner_id == owner_id)
+        archived = select(
+            *(getattr(ToDoArchive, name) for name in ARCHIVED_FIELDS),
+            ToDoArchive.archived_at,
+            ToDoArchive.tag_ids,
+        ).where(ToDoArchive.owner_id == owner_id)
+        return union_all(live, archived).subquery("todos_with_archive")
+    
+    def _search(self, q: str, entity=ToDo):
+        """Điều kiện full-text search và hàm sắp xếp theo độ liên quan cho dialect hiện tại
+        
+        - SQLite: FTS5 (todos_fts), prefix match mỗi từ, xếp hạng bằng bm25
+        - PostgreSQL: search_vector @@ to_tsquery(prefix), xếp hạng bằng ts_rank
+        - Dialect khác hoặc entity không phải bảng todos (kèm archive): ILIKE trên
+          title/description, không xếp hạng
+        """
+        terms = SEARCH_TERM.findall(q) if entity is ToDo else []
+        dialect = self.db.get_bind().dialect.name
+        
+        if terms and dialect == "sqlite":
+            match = fts_table.c[FTS_TABLE].op("MATCH")(" ".join(f'"{term}"*' for term in terms))
+            
+            def order_by_rank(statement):
+                ranked = select(fts_table.c.rowid, fts_table.c.rank).where(match).subquery()
+                return statement.join(ranked, ranked.c.rowid == ToDo.id).order_by(ranked.c.rank, ToDo.id)
+            
+            return ToDo.id.in_(select(fts_table.c.rowid).where(match)), order_by_rank
+        
+        if terms and dialect == "postgresql":
+            vector = literal_column(f"todos.{SEARCH_VECTOR_COLUMN}")
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            
+            def order_by_rank(statement):
+                return statement.order_by(desc(func.ts_rank(vector, tsquery)), ToDo.id)
+            
+            return vector.op("@@")(tsquery), order_by_rank
+        
+        pattern = f"%{q}%"
+        return or_(entity.title.ilike(pattern), entity.description.ilike(pattern)), None
+    
+    @staticmethod
+    def _keyset_filter(column, id_column, nullable: bool, descending: bool, value, last_id: int):
+        """Điều kiện lấy các row nằm sau (value, last_id) theo thứ tự sort (NULL ở cuối)"""
+        if not nullable:
+            # Row-value comparison: một range seek trên index (..., column, id)
+            key, bound = tuple_(column, id_column), tuple_(literal(value, column.type), literal(last_id))
+            return key < bound if descending else key > bound
+        id_after = id_column < last_id if descending else id_column > last_id
+        if value is None:
+            return and_(column.is_(None), id_after)
+        value_after = column < value if descending else column > value
+        return or_(value_after, and_(column == value, id_after), column.is_(None))
+    
+    def ranks(self, sort: Optional[str], q: Optional[str], include_archived: bool = False) -> bool:
+        """sort=rank có thực sự xếp theo độ liên quan không (cùng điều kiện _search trả về rank):
+        cần q có từ tìm kiếm, không kèm archive và dialect có full-text search.
+        Ngược lại get_all dùng sort mặc định.
+        """
+        return (
+            sort == RANK_SORT and not include_archived and bool(SEARCH_TERM.findall(q or ""))
+            and self.db.get_bind().dialect.name in ("sqlite", "postgresql")
+        )
+    
+    @staticmethod
+    def make_cursor(todo: ToDo, sort: Optional[str] = None) -> str:
+        """Tạo cursor trỏ tới vị trí ngay sau todo theo sort (sort=rank không xếp hạng thì
+        theo sort mặc định, như get_all; khi có xếp hạng thì không dùng cursor)
+        """
+        field, descending = parse_sort(sort)
+        return encode_cursor({"s": field, "d": descending, "v": getattr(todo, field), "id": todo.id})
+    
+    @staticmethod
+    def _decode_keyset(cursor: str, field: str, descending: bool) -> tuple:
+        """Giải mã cursor thành (giá trị sort, id), raise ValueError nếu không khớp sort"""
+        payload = decode_cursor(cursor)
+        if payload.get("s") != field or payload.get("d") != descending or not isinstance(payload.get("id"), int):
+            raise ValueError("Cursor không khớp với tham số sort")
+        value = payload.get("v")
+        if value is not None:
+            python_type = getattr(ToDo, field).type.python_type
+            if python_type in (datetime, date) and isinstance(value, str):
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise ValueError("Cursor không hợp lệ")
+        return value, payload["id"]
+    
+    @replica_read
+    def get_dashboard(self, owner_id: int, overdue_limit: int, limit: int) -> dict[str, tuple[list[ToDo], int]]:
+        """Các section của màn hình chính trong một câu SELECT (UNION ALL), tags load một lần
+        
+        Trả về {section: (todos, total)} với section là:
+        - today: như get_today (total = số todos)
+        - overdue: như get_overdue, tối đa overdue_limit (total trước LIMIT)
+        - open: trang đầu của GET /todos?is_done=false (sort mặc định), lấy thêm 1 row
+          để biết has_more; total đọc từ bộ đếm
+        """
+        today = date.today()
+        live = (ToDo.owner_id == owner_id, ToDo.deleted_at.is_(None))
+        open_total = func.coalesce(
+            select(UserTodoCounters.open_count).where(UserTodoCounters.user_id == owner_id).scalar_subquery(), 0
+        )
+        
+        def section(name: str, filters, order_by, total, section_limit: Optional[int] = None):
+            branch = select(
+                *(getattr(ToDo, field) for field in ARCHIVED_FIELDS),
+                literal(name).label("section"),
+                total.label("total"),
+                func.row_number().over(order_by=order_by).label("position"),
+            ).where(*live, *filters).order_by(*order_by).limit(section_limit).subquery()
+            return select(branch)
+        
+        sections = union_all(
+            section("today", [ToDo.due_date == today], [ToDo.created_at, ToDo.id], func.count().over()),
+            section(
+                "overdue", [ToDo.due_date < today, ToDo.is_done == False], [ToDo.due_date, ToDo.id],
+                func.count().over(), overdue_limit
+            ),
+            section(
+                "open", [ToDo.is_done == False], [desc(ToDo.created_at), desc(ToDo.id)], open_total, limit + 1
+            ),
+        ).subquery("dashboard")
+        entity = aliased(ToDo, sections, adapt_on_names=True)
+        rows = self.db.execute(
+            select(entity, sections.c.section, sections.c.total)
+            .options(self._tags_option(entity))
+            .order_by(sections.c.section, sections.c.position)
+        ).unique().all()
+        
+        todos = {name: [] for name in DASHBOARD_SECTIONS}
+        totals = dict.fromkeys(DASHBOARD_SECTIONS, 0)
+        for todo, name, total in rows:
+            todos[name].append(todo)
+            totals[name] = total
+        return {name: (todos[name], totals[name]) for name in DASHBOARD_SECTIONS}
+    
+    @staticmethod
+    def export_statement(owner_id: int, batch_size: int):
+        """SELECT các ToDo chưa xóa của owner theo (created_at, id) cho export streaming
+        
+        Duyệt index (owner_id, deleted_at, created_at, id), không sort; yield_per để
+        driver fetch theo batch (server-side cursor trên PostgreSQL).
+        """
+        return (
+            select(*(getattr(ToDo, field) for field in EXPORT_FIELDS))
+            .where(ToDo.owner_id == owner_id, ToDo.deleted_at.is_(None))
+            .order_by(ToDo.created_at, ToDo.id)
+            .execution_options(yield_per=batch_size)
+        )
+    
+    @staticmethod
+    def tag_names_statement(todo_ids: list[int]):
+        """SELECT (todo_id, tên tag) cho một batch ToDo"""
+        return (
+            select(todo_tags.c.todo_id, Tag.name)
+            .join(Tag, Tag.id == todo_tags.c.tag_id)
+            .where(todo_tags.c.todo_id.in_(todo_ids))
+            .order_by(todo_tags.c.todo_id, Tag.name)
+        )
     
+    @replica_read
     def get_overdue(self, owner_id: int) -> list[ToDo]:
         """Lấy danh sách ToDo quá hạn (due_date < today và chưa done)"""
         today = date.today()
-        return self._base_query(owner_id).filter(
+        return self._todos(self._select_todos() + (lambda s: s.where(
+            ToDo.owner_id == owner_id,
+            ToDo.deleted_at.is_(None),
             ToDo.due_date < today,
             ToDo.is_done == False
-        ).order_by(ToDo.due_date).all()
+        ).order_by(ToDo.due_date)))
     
+    @replica_read
     def get_today(self, owner_id: int) -> list[ToDo]:
         """Lấy danh sách ToDo hôm nay (due_date = today)"""
         today = date.today()
-        return self._base_query(owner_id).filter(
+        return self._todos(self._select_todos() + (lambda s: s.where(
+            ToDo.owner_id == owner_id,
+            ToDo.deleted_at.is_(None),
             ToDo.due_date == today
-        ).order_by(ToDo.created_at).all()
+        ).order_by(ToDo.created_at)))
     
+    @replica_read
     def get_deleted(self, owner_id: int) -> list[ToDo]:
         """Lấy danh sách ToDo đã xóa (trash)"""
-        return self.db.query(ToDo).options(joinedload(ToDo.tags)).filter(
+        return self._todos(self._select_todos() + (lambda s: s.where(
             ToDo.owner_id == owner_id,
             ToDo.deleted_at.isnot(None)
-        ).order_by(desc(ToDo.deleted_at)).all()
+        ).order_by(desc(ToDo.deleted_at))))
     
+    @replica_read
     def get_by_id(self, todo_id: int, owner_id: int, include_deleted: bool = False) -> Optional[ToDo]:
         """Lấy ToDo theo ID và owner_id"""
-        query = self.db.query(ToDo).options(joinedload(ToDo.tags)).filter(
+        statement = self._select_todos() + (lambda s: s.where(
             ToDo.id == todo_id,
             ToDo.owner_id == owner_id
-        )
+        ))
         if not include_deleted:
-            query = query.filter(ToDo.deleted_at.is_(None))
-        return query.first()
+            statement += lambda s: s.where(ToDo.deleted_at.is_(None))
+        return self.db.scalars(statement).unique().one_or_none()
     
     def create(
         self, 
@@ -99,61 +469,295 @@ class ToDoRepository:
         due_date: Optional[date] = None,
         tag_ids: Optional[list[int]] = None
     ) -> ToDo:
-        """Tạo ToDo mới"""
-        new_todo = ToDo(
-            title=title, 
-            description=description, 
-            is_done=False, 
-            owner_id=owner_id,
-            due_date=due_date
-        )
+        """Tạo ToDo mới bằng INSERT ... RETURNING (không cần refresh)"""
+        new_todo = self.db.scalars(
+            insert(ToDo).values(
+                title=title, 
+                description=description, 
+                is_done=False, 
+                owner_id=owner_id,
+                due_date=due_date
+            ).returning(ToDo)
+        ).one()
         
-        # Thêm tags nếu có
+        # Thêm tags nếu có; không có tag thì không cần query tags
         if tag_ids:
-            tags = self.db.query(Tag).filter(Tag.id.in_(tag_ids)).all()
-            new_todo.tags = tags
+            self._replace_tags(new_todo, tag_ids)
+        else:
+            self._set_tags(new_todo, [])
         
-        self.db.add(new_todo)
         self.db.commit()
-        self.db.refresh(new_todo)
         return new_todo
     
-    def update(self, todo: ToDo, tag_ids: Optional[list[int]] = None, **kwargs) -> ToDo:
-        """Cập nhật ToDo"""
-        for key, value in kwargs.items():
-            if value is not None and hasattr(todo, key):
-                setattr(todo, key, value)
+    def _replace_tags(self, todo: ToDo, tag_ids: list[int], clear: bool = False) -> None:
+        """Ghi lại liên kết todo_tags (chỉ các tag thuộc owner) và gán todo.tags"""
+        if clear:
+            self.db.execute(delete(todo_tags).where(todo_tags.c.todo_id == todo.id))
+        if tag_ids:
+            self.db.execute(
+                insert(todo_tags).from_select(
+                    ["todo_id", "tag_id"],
+                    select(literal(todo.id), Tag.id).where(Tag.owner_id == todo.owner_id, Tag.id.in_(tag_ids))
+                )
+            )
+        self._set_tags(todo, tag_ids)
+    
+    def _tag_ids_column(self):
+        """Scalar subquery: tag id của ToDo dạng chuỗi "1,2" (đọc cùng câu lệnh ghi ... RETURNING)"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            aggregate = func.string_agg(cast(todo_tags.c.tag_id, String), ",")
+        else:
+            aggregate = func.group_concat(todo_tags.c.tag_id)
+        return select(aggregate).where(todo_tags.c.todo_id == ToDo.id).scalar_subquery()
+    
+    @staticmethod
+    def _parse_tag_ids(value: Optional[str]) -> list[int]:
+        """Tách chuỗi tag id từ _tag_ids_column"""
+        return [int(tag_id) for tag_id in value.split(",")] if value else []
+    
+    def _set_tags(self, todo: ToDo, tag_ids: list[int]) -> None:
+        """Gán todo.tags (không phát sinh thay đổi cần flush) từ tag cache"""
+        tags = TagRepository(self.db).get_by_ids(tag_ids, todo.owner_id) if tag_ids else []
+        set_committed_value(todo, "tags", tags)
+    
+    def bulk_create(self, owner_id: int, items: list[dict]) -> list[int]:
+        """Tạo nhiều ToDo trong một transaction, trả về id theo thứ tự items.
         
-        # Cập nhật tags nếu được chỉ định
+        Mỗi item gồm title, description, due_date, tag_ids (và is_done, mặc định False). Todos được insert bằng
+        một INSERT nhiều dòng (RETURNING id), liên kết todo_tags bằng executemany.
+        """
+        rows = [
+            {
+                "title": item["title"],
+                "description": item.get("description"),
+                "due_date": item.get("due_date"),
+                "is_done": item.get("is_done", False),
+                "owner_id": owner_id,
+            }
+            for item in items
+        ]
+        if self.db.get_bind().dialect.name == "sqlite":
+            # SQLite không batch được RETURNING có thứ tự (sẽ chạy từng dòng); rowid được
+            # cấp tăng dần theo thứ tự VALUES nên sắp xếp lại id là đủ
+            ids = sorted(self.db.scalars(insert(ToDo).returning(ToDo.id), rows))
+        else:
+            ids = list(self.db.scalars(
+                insert(ToDo).returning(ToDo.id, sort_by_parameter_order=True),
+                rows
+            ))
+        
+        links = [
+            {"todo_id": todo_id, "tag_id": tag_id}
+            for todo_id, item in zip(ids, items)
+            for tag_id in dict.fromkeys(item.get("tag_ids") or [])
+        ]
+        if links:
+            self.db.execute(insert(todo_tags), links)
+        
+        self.db.commit()
+        return ids
+    
+    def bulk_update(
+        self,
+        owner_id: int,
+        values: dict,
+        ids: Optional[list[int]] = None,
+        is_done: Optional[bool] = None,
+        q: Optional[str] = None,
+        due_from: Optional[date] = None,
+        due_to: Optional[date] = None,
+        deleted: bool = False
+    ) -> int:
+        """Cập nhật hàng loạt bằng một câu UPDATE ... WHERE owner_id = :uid AND ...
+        
+        Chọn ToDo theo ids hoặc theo filter (is_done, q, khoảng due_date) trong
+        phạm vi ToDo chưa xóa (deleted=True: trong thùng rác). Row đã có sẵn giá trị
+        mới được bỏ qua nên số trả về là số ToDo thực sự thay đổi.
+        """
+        filters = [
+            ToDo.owner_id == owner_id,
+            ToDo.deleted_at.isnot(None) if deleted else ToDo.deleted_at.is_(None),
+            or_(*(getattr(ToDo, key).is_distinct_from(value) for key, value in values.items())),
+        ]
+        if ids is not None:
+            filters.append(ToDo.id.in_(ids))
+        if is_done is not None:
+            filters.append(ToDo.is_done == is_done)
+        if q:
+            filters.append(self._search(q)[0])
+        if due_from is not None:
+            filters.append(ToDo.due_date >= due_from)
+        if due_to is not None:
+            filters.append(ToDo.due_date <= due_to)
+        
+        result = self.db.execute(
+            update(ToDo).where(*filters).values(**values).execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
+    
+    def get_owned_tag_ids(self, owner_id: int, tag_ids: set[int]) -> set[int]:
+        """Lọc các tag id thuộc về owner (từ tag cache, nạp lại một lần nếu thiếu id)"""
+        if not tag_ids:
+            return set()
+        return set(TagRepository(self.db).get_user_tags_including(owner_id, tag_ids).owned(tag_ids))
+    
+    def get_by_ids(self, todo_ids: list[int], owner_id: int) -> list[ToDo]:
+        """Lấy nhiều ToDo theo danh sách id (giữ thứ tự của todo_ids)"""
+        todos = self._todos(self._select_todos() + (lambda s: s.where(
+            ToDo.owner_id == owner_id,
+            ToDo.id.in_(todo_ids)
+        )))
+        by_id = {todo.id: todo for todo in todos}
+        return [by_id[todo_id] for todo_id in todo_ids if todo_id in by_id]
+    
+    def _owned(self, todo_id: int, owner_id: int, deleted: bool = False):
+        """Điều kiện WHERE chọn một ToDo của owner (chưa xóa hoặc trong thùng rác)"""
+        return (
+            ToDo.id == todo_id,
+            ToDo.owner_id == owner_id,
+            ToDo.deleted_at.isnot(None) if deleted else ToDo.deleted_at.is_(None),
+        )
+    
+    def update(
+        self, todo_id: int, owner_id: int, tag_ids: Optional[list[int]] = None, **kwargs
+    ) -> Optional[ToDo]:
+        """Cập nhật ToDo bằng UPDATE ... RETURNING; None nếu không tìm thấy
+        
+        Giá trị None được bỏ qua. tags chỉ được ghi lại khi truyền tag_ids; nếu không,
+        tag id được trả về cùng câu UPDATE (dữ liệu tag lấy từ tag cache).
+        """
+        values = {key: value for key, value in kwargs.items() if value is not None and hasattr(ToDo, key)}
+        where = self._owned(todo_id, owner_id)
+        columns = (ToDo,) if tag_ids is not None else (ToDo, self._tag_ids_column())
+        if values:
+            statement = update(ToDo).where(*where).values(**values).returning(*columns)
+        else:
+            statement = select(*columns).where(*where)
+        row = self.db.execute(statement.execution_options(populate_existing=True)).one_or_none()
+        if row is None:
+            return None
+        
+        todo = row[0]
         if tag_ids is not None:
-            tags = self.db.query(Tag).filter(Tag.id.in_(tag_ids)).all()
-            todo.tags = tags
+            self._replace_tags(todo, tag_ids, clear=True)
+        else:
+            self._set_tags(todo, self._parse_tag_ids(row[1]))
         
         self.db.commit()
-        self.db.refresh(todo)
         return todo
     
-    def soft_delete(self, todo: ToDo) -> ToDo:
-        """Soft delete ToDo (đánh dấu deleted_at)"""
-        todo.deleted_at = datetime.now()
+    def soft_delete(self, todo_id: int, owner_id: int) -> bool:
+        """Soft delete ToDo (đánh dấu deleted_at); False nếu không tìm thấy"""
+        result = self.db.execute(
+            update(ToDo).where(*self._owned(todo_id, owner_id)).values(deleted_at=utcnow())
+        )
         self.db.commit()
-        self.db.refresh(todo)
-        return todo
+        return result.rowcount > 0
     
-    def restore(self, todo: ToDo) -> ToDo:
-        """Khôi phục ToDo đã xóa"""
-        todo.deleted_at = None
+    def restore(self, todo_id: int, owner_id: int) -> Optional[ToDo]:
+        """Khôi phục ToDo trong thùng rác; None nếu không có ToDo đã xóa với id này"""
+        row = self.db.execute(
+            update(ToDo).where(*self._owned(todo_id, owner_id, deleted=True))
+            .values(deleted_at=None).returning(ToDo, self._tag_ids_column())
+            .execution_options(populate_existing=True)
+        ).one_or_none()
+        if row is None:
+            return None
+        todo, tag_ids = row
+        self._set_tags(todo, self._parse_tag_ids(tag_ids))
         self.db.commit()
-        self.db.refresh(todo)
         return todo
     
-    def hard_delete(self, todo: ToDo) -> bool:
-        """Xóa vĩnh viễn ToDo"""
-        self.db.delete(todo)
+    def _delete_todos(self, todo_ids) -> int:
+        """Xóa vĩnh viễn các todo (todo_ids: list hoặc subquery id) cùng liên kết todo_tags.
+        
+        Không dựa vào ON DELETE CASCADE vì SQLite chỉ thực thi FK khi bật PRAGMA foreign_keys.
+        """
+        self.db.execute(delete(todo_tags).where(todo_tags.c.todo_id.in_(todo_ids)))
+        return self.db.execute(delete(ToDo).where(ToDo.id.in_(todo_ids))).rowcount
+    
+    def hard_delete(self, todo_id: int, owner_id: int) -> bool:
+        """Xóa vĩnh viễn ToDo (kể cả trong thùng rác); False nếu không tìm thấy"""
+        deleted = self._delete_todos(select(ToDo.id).where(ToDo.id == todo_id, ToDo.owner_id == owner_id))
         self.db.commit()
-        return True
+        return deleted > 0
+    
+    def empty_trash(self, owner_id: int) -> int:
+        """Xóa vĩnh viễn toàn bộ thùng rác của owner, trả về số ToDo đã xóa"""
+        deleted = self._delete_todos(
+            select(ToDo.id).where(ToDo.owner_id == owner_id, ToDo.deleted_at.isnot(None))
+        )
+        self.db.commit()
+        return deleted
+    
+    def purge_expired(self, cutoff: datetime, batch_size: int) -> int:
+        """Xóa vĩnh viễn tối đa batch_size ToDo bị xóa trước cutoff (mọi owner) trong một transaction"""
+        todo_ids = list(self.db.scalars(
+            select(ToDo.id)
+            .where(ToDo.deleted_at.isnot(None), ToDo.deleted_at < cutoff)
+            .order_by(ToDo.deleted_at)
+            .limit(batch_size)
+        ))
+        if not todo_ids:
+            return 0
+        deleted = self._delete_todos(todo_ids)
+        self.db.commit()
+        return deleted
+    
+    def archive_completed(self, cutoff: datetime, batch_size: int) -> int:
+        """Chuyển tối đa batch_size ToDo đã hoàn thành, không sửa từ trước cutoff (mọi owner)
+        sang todos_archive trong một transaction, trả về số ToDo đã chuyển.
+        
+        updated_at là mốc hoàn thành (không có cột completed_at); ToDo trong thùng rác
+        không được lưu trữ.
+        """
+        rows = self.db.execute(
+            select(*(getattr(ToDo, name) for name in ARCHIVED_FIELDS))
+            .where(ToDo.is_done == True, ToDo.deleted_at.is_(None), ToDo.updated_at < cutoff)
+            .order_by(ToDo.updated_at)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return 0
+        todo_ids = [row["id"] for row in rows]
+        
+        tag_ids = defaultdict(list)
+        for todo_id, tag_id in self.db.execute(
+            select(todo_tags.c.todo_id, todo_tags.c.tag_id)
+            .where(todo_tags.c.todo_id.in_(todo_ids))
+            .order_by(todo_tags.c.todo_id, todo_tags.c.tag_id)
+        ):
+            tag_ids[todo_id].append(tag_id)
+        
+        archived_at = utcnow()
+        self.db.execute(
+            insert(ToDoArchive),
+            [{**row, "tag_ids": tag_ids[row["id"]], "archived_at": archived_at} for row in rows]
+        )
+        archived = self._delete_todos(todo_ids)
+        self.db.commit()
+        return archived
+    
+    def unarchive(self, todo_id: int, owner_id: int) -> Optional[ToDo]:
+        """Đưa ToDo từ todos_archive về todos (giữ id, gắn lại các tag còn tồn tại);
+        None nếu không có ToDo lưu trữ với id này.
+        """
+        archived = self.db.execute(
+            delete(ToDoArchive)
+            .where(ToDoArchive.id == todo_id, ToDoArchive.owner_id == owner_id)
+            .returning(*(getattr(ToDoArchive, name) for name in ARCHIVED_FIELDS), ToDoArchive.tag_ids)
+        ).mappings().one_or_none()
+        if archived is None:
+            return None
+        # updated_at mới: ToDo không bị job lưu trữ chuyển đi lại ngay
+        values = {name: archived[name] for name in ARCHIVED_FIELDS} | {"updated_at": utcnow()}
+        todo = self.db.scalars(insert(ToDo).values(**values).returning(ToDo)).one()
+        tag_ids = TagRepository(self.db).get_user_tags(owner_id).owned(archived["tag_ids"])
+        self._replace_tags(todo, tag_ids)
+        self.db.commit()
+        return todo
     
-    def delete(self, todo: ToDo) -> bool:
+    def delete(self, todo_id: int, owner_id: int) -> bool:
         """Xóa ToDo (soft delete)"""
-        self.soft_delete(todo)
-        return True
+        return self.soft_delete(todo_id, owner_id)
@@ -1,7 +1,9 @@
 from typing import Optional
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.security import invalidate_principal
 
 
 class UserRepository:
@@ -12,15 +14,14 @@ class UserRepository:
     
     def get_by_id(self, user_id: int) -> Optional[User]:
         """Lấy User theo ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.scalars(lambda_stmt(lambda: select(User).where(User.id == user_id))).first()
     
     def get_by_email(self, email: str) -> Optional[User]:
         """Lấy User theo email"""
-        return self.db.query(User).filter(User.email == email).first()
+        return self.db.scalars(lambda_stmt(lambda: select(User).where(User.email == email))).first()
     
-    def create(self, email: str, password: str) -> User:
-        """Tạo User mới"""
-        hashed_password = get_password_hash(password)
+    def create(self, email: str, hashed_password: str) -> User:
+        """Tạo User mới (password đã được hash)"""
         new_user = User(email=email, hashed_password=hashed_password)
         self.db.add(new_user)
         self.db.commit()
@@ -34,4 +35,39 @@ class UserRepository:
                 setattr(user, key, value)
         self.db.commit()
         self.db.refresh(user)
+        invalidate_principal(user.id)
+        return user
+
+
+class AsyncUserRepository:
+    """Repository quản lý dữ liệu User trên AsyncSession"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """Lấy User theo ID"""
+        return await self.db.get(User, user_id)
+    
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Lấy User theo email"""
+        result = await self.db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+    
+    async def create(self, email: str, hashed_password: str) -> User:
+        """Tạo User mới (password đã được hash)"""
+        new_user = User(email=email, hashed_password=hashed_password)
+        self.db.add(new_user)
+        await self.db.commit()
+        await self.db.refresh(new_user)
+        return new_user
+    
+    async def update(self, user: User, **kwargs) -> User:
+        """Cập nhật User"""
+        for key, value in kwargs.items():
+            if value is not None and hasattr(user, key):
+                setattr(user, key, value)
+        await self.db.commit()
+        await self.db.refresh(user)
+        invalidate_principal(user.id)
         return user
@@ -1,4 +1,12 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import engine, get_async_engine, get_async_replica_engines, get_async_db
+from app.core.pool import pool_status
+from app.core.security import principal_cache
+from app.repositories.tag_repository import tag_cache
 
 router = APIRouter(tags=["Health"])
 
@@ -13,3 +21,28 @@ def root():
 def health_check():
     """Endpoint kiểm tra trạng thái server"""
     return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness_check(db: AsyncSession = Depends(get_async_db)):
+    """Endpoint kiểm tra kết nối database và trạng thái connection pool"""
+    pools = {
+        "async": pool_status(get_async_engine().pool),
+        "sync": pool_status(engine.pool),
+    }
+    if get_async_replica_engines():
+        pools["replicas"] = [pool_status(e.pool) for e in get_async_replica_engines()]
+    try:
+        await db.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": str(e.__class__.__name__), "pools": pools}
+        )
+    return {"status": "ok", "database": "ok", "pools": pools}
+
+
+@router.get("/health/cache")
+def cache_stats():
+    """Thống kê hit/miss của các cache in-process"""
+    return {"principal": principal_cache.stats(), "tags": tag_cache.stats()}
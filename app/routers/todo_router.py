@@ -1,140 +1,285 @@
-from typing import Optional
-from fastapi import APIRouter, Query, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.schemas.todo import ToDoCreate, ToDoUpdate, ToDoPatch, ToDoResponse, ToDoListResponse
-from app.services.todo_service import ToDoService
-from app.models.user import User
+from typing import Literal, Optional
+from fastapi import APIRouter, Query, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.responses import PydanticJSONResponse
+from app.core.security import get_current_user, CurrentUser
+from app.schemas.todo import (
+    ToDoCreate, ToDoUpdate, ToDoPatch, ToDoResponse, ToDoListResponse, ToDoBulkCreate, ToDoBulkCreateResponse,
+    ToDoBulkSelection, ToDoBulkUpdate, ToDoBulkResult, ToDoDashboard, ToDoStats, ToDoImportResult
+)
+from app.services.todo_export import EXPORTERS, EXPORT_FORMATS
+from app.services.todo_import import import_todo_stream
+from app.services.todo_service import AsyncToDoService
 
 router = APIRouter(prefix="/todos", tags=["ToDos"])
 
+# Các route trả về ToDo (danh sách và từng ToDo) trả về PydanticJSONResponse: service đã
+# validate ToDoResponse một lần, response được mã hóa thẳng thành JSON mà không validate
+# lại theo response_model
 
-def get_todo_service(db: Session = Depends(get_db)) -> ToDoService:
+
+def get_todo_service(db: AsyncSession = Depends(get_async_db)) -> AsyncToDoService:
     """Dependency để lấy ToDoService"""
-    return ToDoService(db)
+    return AsyncToDoService(db)
+
+
+@router.get("/stats", response_model=ToDoStats)
+async def get_todo_stats(
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Thống kê số ToDo: open, done, overdue, due_today, trash và theo từng tag"""
+    return await service.get_stats(owner_id=current_user.id)
+
+
+@router.get("/export")
+async def export_todos(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="ndjson hoặc csv"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export toàn bộ ToDo (chưa xóa) dạng stream, bộ nhớ không phụ thuộc số ToDo"""
+    return StreamingResponse(
+        EXPORTERS[export_format](db, owner_id=current_user.id),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="todos.{export_format}"'}
+    )
+
+
+@router.post("/import", response_model=ToDoImportResult)
+async def import_todos(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="ndjson hoặc csv"),
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Import ToDo từ body NDJSON/CSV (đọc dạng stream, ghi theo chunk), trả về báo cáo lỗi theo dòng
+    
+    Mỗi dòng gồm title, description, due_date, is_done, tags (tên tag, tag chưa có sẽ được
+    tạo) hoặc tag_ids; cùng định dạng với GET /todos/export.
+    """
+    return await import_todo_stream(
+        request.stream(), import_format, service, owner_id=current_user.id
+    )
+
+
+@router.get("/dashboard", response_model=ToDoDashboard)
+async def get_dashboard(
+    overdue_limit: int = Query(20, ge=1, le=100, description="Số ToDo quá hạn tối đa"),
+    limit: int = Query(10, ge=1, le=100, description="Số ToDo chưa hoàn thành trong trang đầu"),
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Màn hình chính: ToDo hôm nay, quá hạn và trang đầu ToDo chưa hoàn thành (một query)
+    
+    Trang tiếp theo của open: GET /todos?is_done=false&cursor=<open.next_cursor>
+    """
+    return PydanticJSONResponse(
+        await service.get_dashboard(owner_id=current_user.id, overdue_limit=overdue_limit, limit=limit)
+    )
 
 
 @router.get("/overdue", response_model=list[ToDoResponse])
-def get_overdue_todos(
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+async def get_overdue_todos(
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Lấy danh sách ToDo quá hạn (due_date < today và chưa hoàn thành)"""
-    return service.get_overdue_todos(owner_id=current_user.id)
+    return PydanticJSONResponse(await service.get_overdue_todos(owner_id=current_user.id), list[ToDoResponse])
 
 
 @router.get("/today", response_model=list[ToDoResponse])
-def get_today_todos(
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+async def get_today_todos(
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Lấy danh sách ToDo hôm nay (due_date = today)"""
-    return service.get_today_todos(owner_id=current_user.id)
+    return PydanticJSONResponse(await service.get_today_todos(owner_id=current_user.id), list[ToDoResponse])
 
 
 @router.get("/trash", response_model=list[ToDoResponse])
-def get_deleted_todos(
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+async def get_deleted_todos(
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Lấy danh sách ToDo đã xóa (thùng rác)"""
-    return service.get_deleted_todos(owner_id=current_user.id)
+    return PydanticJSONResponse(await service.get_deleted_todos(owner_id=current_user.id), list[ToDoResponse])
+
+
+@router.delete("/trash", response_model=ToDoBulkResult)
+async def empty_trash(
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Dọn sạch thùng rác (xóa vĩnh viễn mọi ToDo đã xóa)"""
+    return await service.empty_trash(owner_id=current_user.id)
+
+
+@router.post("/bulk", response_model=ToDoBulkCreateResponse, status_code=201)
+async def bulk_create_todos(
+    data: ToDoBulkCreate,
+    compact: bool = Query(True, description="Chỉ trả về id; false để trả về đầy đủ các ToDo đã tạo"),
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Tạo nhiều ToDo trong một transaction (đồng bộ offline, import)"""
+    return await service.bulk_create_todos(data, owner_id=current_user.id, compact=compact)
+
+
+@router.patch("/bulk", response_model=ToDoBulkResult)
+async def bulk_update_todos(
+    data: ToDoBulkUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Cập nhật is_done/due_date cho nhiều ToDo (theo ids hoặc filter)"""
+    return await service.bulk_update_todos(data, owner_id=current_user.id)
+
+
+@router.post("/bulk/complete", response_model=ToDoBulkResult)
+async def bulk_complete_todos(
+    selection: ToDoBulkSelection,
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Đánh dấu hoàn thành nhiều ToDo (theo ids hoặc filter)"""
+    return await service.bulk_complete_todos(selection, owner_id=current_user.id)
+
+
+@router.post("/bulk/delete", response_model=ToDoBulkResult)
+async def bulk_delete_todos(
+    selection: ToDoBulkSelection,
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Chuyển nhiều ToDo vào thùng rác (theo ids hoặc filter)"""
+    return await service.bulk_delete_todos(selection, owner_id=current_user.id)
+
+
+@router.post("/bulk/restore", response_model=ToDoBulkResult)
+async def bulk_restore_todos(
+    selection: ToDoBulkSelection,
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Khôi phục nhiều ToDo từ thùng rác (theo ids hoặc filter)"""
+    return await service.bulk_restore_todos(selection, owner_id=current_user.id)
 
 
 @router.post("/{todo_id}/restore", response_model=ToDoResponse)
-def restore_todo(
+async def restore_todo(
     todo_id: int,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Khôi phục ToDo từ thùng rác"""
-    return service.restore_todo(todo_id, owner_id=current_user.id)
+    return PydanticJSONResponse(await service.restore_todo(todo_id, owner_id=current_user.id))
+
+
+@router.post("/{todo_id}/unarchive", response_model=ToDoResponse)
+async def unarchive_todo(
+    todo_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
+):
+    """Khôi phục ToDo từ kho lưu trữ về danh sách chính"""
+    return PydanticJSONResponse(await service.unarchive_todo(todo_id, owner_id=current_user.id))
 
 
 @router.delete("/{todo_id}/permanent", status_code=204)
-def hard_delete_todo(
+async def hard_delete_todo(
     todo_id: int,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Xóa vĩnh viễn ToDo (không thể khôi phục)"""
-    service.hard_delete_todo(todo_id, owner_id=current_user.id)
+    await service.hard_delete_todo(todo_id, owner_id=current_user.id)
     return None
 
 
 @router.post("", response_model=ToDoResponse, status_code=201)
-def create_todo(
+async def create_todo(
     todo: ToDoCreate,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Tạo ToDo mới (yêu cầu đăng nhập)"""
-    return service.create_todo(todo, owner_id=current_user.id)
+    return PydanticJSONResponse(await service.create_todo(todo, owner_id=current_user.id), status_code=201)
 
 
 @router.get("", response_model=ToDoListResponse)
-def get_todos(
+async def get_todos(
     is_done: Optional[bool] = Query(None, description="Lọc theo trạng thái hoàn thành"),
     q: Optional[str] = Query(None, description="Tìm kiếm theo tiêu đề"),
-    sort: Optional[str] = Query(None, description="Sắp xếp: created_at, -created_at, updated_at, -updated_at"),
+    sort: Optional[str] = Query(None, description="Sắp xếp: created_at, updated_at, due_date, title (thêm '-' để giảm dần)"),
     limit: int = Query(10, ge=1, le=100, description="Số lượng kết quả trả về"),
     offset: int = Query(0, ge=0, description="Vị trí bắt đầu"),
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    cursor: Optional[str] = Query(None, description="Cursor từ next_cursor của trang trước (bỏ qua offset)"),
+    with_total: bool = Query(True, description="Trả về total; false để bỏ qua việc đếm và chỉ dùng has_more"),
+    include_archived: bool = Query(False, description="Gồm cả ToDo đã lưu trữ (todos_archive)"),
+    tag_ids: Optional[str] = Query(None, pattern=r"^\d+(,\d+)*$", description="Lọc theo tag, ví dụ 1,2"),
+    tag_mode: Literal["any", "all"] = Query("any", description="any: có ít nhất một tag; all: có đủ các tag"),
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Lấy danh sách ToDo của user hiện tại"""
-    return service.get_todos(owner_id=current_user.id, is_done=is_done, q=q, sort=sort, limit=limit, offset=offset)
+    return PydanticJSONResponse(await service.get_todos(
+        owner_id=current_user.id, is_done=is_done, q=q, sort=sort, limit=limit, offset=offset, cursor=cursor,
+        with_total=with_total, include_archived=include_archived,
+        tag_ids=[int(tag_id) for tag_id in tag_ids.split(",")] if tag_ids else None, tag_mode=tag_mode
+    ))
 
 
 @router.get("/{todo_id}", response_model=ToDoResponse)
-def get_todo(
+async def get_todo(
     todo_id: int,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Lấy chi tiết một ToDo theo ID (chỉ của user hiện tại)"""
-    return service.get_todo(todo_id, owner_id=current_user.id)
+    return PydanticJSONResponse(await service.get_todo(todo_id, owner_id=current_user.id))
 
 
 @router.put("/{todo_id}", response_model=ToDoResponse)
-def update_todo(
+async def update_todo(
     todo_id: int,
     todo_update: ToDoUpdate,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Cập nhật toàn bộ ToDo theo ID (PUT)"""
-    return service.update_todo(todo_id, todo_update, owner_id=current_user.id)
+    return PydanticJSONResponse(await service.update_todo(todo_id, todo_update, owner_id=current_user.id))
 
 
 @router.patch("/{todo_id}", response_model=ToDoResponse)
-def patch_todo(
+async def patch_todo(
     todo_id: int,
     todo_patch: ToDoPatch,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Cập nhật một phần ToDo theo ID (PATCH)"""
-    return service.patch_todo(todo_id, todo_patch, owner_id=current_user.id)
+    return PydanticJSONResponse(await service.patch_todo(todo_id, todo_patch, owner_id=current_user.id))
 
 
 @router.post("/{todo_id}/complete", response_model=ToDoResponse)
-def complete_todo(
+async def complete_todo(
     todo_id: int,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Đánh dấu ToDo hoàn thành"""
-    return service.complete_todo(todo_id, owner_id=current_user.id)
+    return PydanticJSONResponse(await service.complete_todo(todo_id, owner_id=current_user.id))
 
 
 @router.delete("/{todo_id}", status_code=204)
-def delete_todo(
+async def delete_todo(
     todo_id: int,
-    current_user: User = Depends(get_current_user),
-    service: ToDoService = Depends(get_todo_service)
+    current_user: CurrentUser = Depends(get_current_user),
+    service: AsyncToDoService = Depends(get_todo_service)
 ):
     """Xóa ToDo theo ID (chỉ của user hiện tại)"""
-    service.delete_todo(todo_id, owner_id=current_user.id)
+    await service.delete_todo(todo_id, owner_id=current_user.id)
     return None
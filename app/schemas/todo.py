@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Annotated, Optional
 from datetime import datetime, date
+from app.core.config import settings
 
 
 # ============== Tag Schemas ==============
@@ -29,6 +30,86 @@ class ToDoCreate(BaseModel):
     tag_ids: Optional[list[int]] = Field(None, description="Danh sách ID các tag")
 
 
+class ToDoBulkCreate(BaseModel):
+    """Model để tạo nhiều ToDo trong một request"""
+    items: list[ToDoCreate] = Field(
+        ..., min_length=1, max_length=settings.TODO_BULK_MAX_ITEMS,
+        description=f"Danh sách ToDo cần tạo (tối đa {settings.TODO_BULK_MAX_ITEMS})"
+    )
+
+
+class ToDoImportRow(ToDoCreate):
+    """Một dòng của file import (cột thừa như id, created_at bị bỏ qua)"""
+    is_done: bool = False
+    tags: list[Annotated[str, Field(min_length=1, max_length=50)]] = Field(
+        default_factory=list, description="Tên tag, tag chưa có sẽ được tạo"
+    )
+
+
+class ToDoImportError(BaseModel):
+    """Lỗi của một dòng import"""
+    line: int
+    error: str
+
+
+class ToDoImportResult(BaseModel):
+    """Model response cho import: số dòng đã tạo, số dòng lỗi và chi tiết lỗi"""
+    imported: int
+    failed: int
+    errors: list[ToDoImportError] = []
+    errors_truncated: bool = False  # True khi chỉ trả về TODO_IMPORT_MAX_ERRORS lỗi đầu tiên
+
+
+class ToDoBulkFilter(BaseModel):
+    """Điều kiện chọn ToDo cho thao tác hàng loạt (cùng filter với GET /todos)"""
+    is_done: Optional[bool] = None
+    q: Optional[str] = Field(None, description="Tìm kiếm full-text trên title + description")
+    due_from: Optional[date] = Field(None, description="due_date >= due_from")
+    due_to: Optional[date] = Field(None, description="due_date <= due_to")
+
+
+class ToDoBulkSelection(BaseModel):
+    """Chọn ToDo theo danh sách id hoặc theo filter (đúng một trong hai)"""
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=settings.TODO_BULK_MAX_ITEMS)
+    filter: Optional[ToDoBulkFilter] = None
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Cần truyền đúng một trong hai: ids hoặc filter")
+        return self
+
+
+class ToDoBulkChanges(BaseModel):
+    """Các trường được phép cập nhật hàng loạt (due_date = null để bỏ deadline)"""
+    is_done: Optional[bool] = None
+    due_date: Optional[date] = None
+    
+    @field_validator("is_done")
+    @classmethod
+    def check_is_done(cls, value):
+        # is_done là NOT NULL: bỏ qua trường thay vì gửi null
+        if value is None:
+            raise ValueError("is_done không được là null")
+        return value
+
+
+class ToDoBulkUpdate(ToDoBulkSelection):
+    """Model để cập nhật hàng loạt (PATCH /todos/bulk)"""
+    changes: ToDoBulkChanges
+    
+    @model_validator(mode="after")
+    def check_changes(self):
+        if not self.changes.model_fields_set:
+            raise ValueError("changes phải có ít nhất một trường")
+        return self
+
+
+class ToDoBulkResult(BaseModel):
+    """Model response cho thao tác hàng loạt"""
+    affected: int
+
+
 class ToDoUpdate(BaseModel):
     """Model để cập nhật toàn bộ ToDo (PUT)"""
     title: Optional[str] = Field(None, min_length=3, max_length=100, description="Tiêu đề ToDo (3-100 ký tự)")
@@ -57,15 +138,51 @@ class ToDoResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     deleted_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
     tags: list[TagResponse] = []
     
     class Config:
         from_attributes = True
 
 
+class ToDoBulkCreateResponse(BaseModel):
+    """Model response cho bulk create (items chỉ có khi compact=false)"""
+    created: int
+    ids: list[int]
+    items: Optional[list[ToDoResponse]] = None
+
+
 class ToDoListResponse(BaseModel):
     """Model response cho danh sách ToDo với pagination"""
     items: list[ToDoResponse]
-    total: int
+    total: Optional[int] = None  # None khi with_total=false
     limit: int
     offset: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+
+
+class ToDoDashboard(BaseModel):
+    """Model response cho màn hình chính: hôm nay, quá hạn và trang đầu ToDo chưa xong"""
+    today: list[ToDoResponse]
+    overdue: list[ToDoResponse]
+    overdue_total: int  # tổng số ToDo quá hạn (overdue bị giới hạn theo overdue_limit)
+    open: ToDoListResponse
+
+
+class ToDoTagCount(BaseModel):
+    """Số ToDo chưa xóa gắn với một tag"""
+    id: int
+    name: str
+    color: str
+    count: int
+
+
+class ToDoStats(BaseModel):
+    """Model response cho thống kê ToDo (badge)"""
+    open: int
+    done: int
+    overdue: int
+    due_today: int
+    trash: int
+    tags: list[ToDoTagCount] = []
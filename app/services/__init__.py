@@ -1,4 +1,4 @@
-from .todo_service import ToDoService
-from .tag_service import TagService
+from .todo_service import ToDoService, AsyncToDoService
+from .tag_service import TagService, AsyncTagService
 
-__all__ = ["ToDoService", "TagService"]
+__all__ = ["ToDoService", "AsyncToDoService", "TagService", "AsyncTagService"]
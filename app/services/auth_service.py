@@ -1,39 +1,41 @@
 from datetime import timedelta
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
-from app.repositories.user_repository import UserRepository
-from app.core.security import verify_password, create_access_token
+from app.repositories.user_repository import AsyncUserRepository
+from app.core.security import create_access_token, password_needs_rehash
+from app.core.password_hasher import password_hasher
 from app.core.config import settings
 
 
 class AuthService:
     """Service xử lý authentication"""
     
-    def __init__(self, db: Session):
-        self.repository = UserRepository(db)
+    def __init__(self, db: AsyncSession):
+        self.repository = AsyncUserRepository(db)
     
-    def register(self, user_data: UserCreate) -> UserResponse:
+    async def register(self, user_data: UserCreate) -> UserResponse:
         """Đăng ký user mới"""
         # Kiểm tra email đã tồn tại
-        existing_user = self.repository.get_by_email(user_data.email)
+        existing_user = await self.repository.get_by_email(user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email đã được sử dụng"
             )
         
-        user = self.repository.create(
+        hashed_password = await password_hasher.hash(user_data.password)
+        user = await self.repository.create(
             email=user_data.email,
-            password=user_data.password
+            hashed_password=hashed_password
         )
         return UserResponse.model_validate(user)
     
-    def login(self, user_data: UserLogin) -> Token:
+    async def login(self, user_data: UserLogin) -> Token:
         """Đăng nhập và trả về token"""
-        user = self.repository.get_by_email(user_data.email)
+        user = await self.repository.get_by_email(user_data.email)
         
-        if not user or not verify_password(user_data.password, user.hashed_password):
+        if not user or not await password_hasher.verify(user_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email hoặc mật khẩu không đúng",
@@ -46,6 +48,11 @@ class AuthService:
                 detail="Tài khoản đã bị vô hiệu hóa"
             )
         
+        # Hash lại password nếu được tạo với work factor thấp hơn hiện tại
+        if password_needs_rehash(user.hashed_password):
+            hashed_password = await password_hasher.hash(user_data.password)
+            await self.repository.update(user, hashed_password=hashed_password)
+        
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.id},
@@ -54,6 +61,12 @@ class AuthService:
         
         return Token(access_token=access_token, token_type="bearer")
     
-    def get_current_user_info(self, user) -> UserResponse:
+    async def get_current_user_info(self, user_id: int) -> UserResponse:
         """Lấy thông tin user hiện tại"""
+        user = await self.repository.get_by_id(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User không tìm thấy"
+            )
         return UserResponse.model_validate(user)
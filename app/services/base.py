@@ -0,0 +1,28 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class AsyncServiceBridge:
+    """Chạy service sync trên AsyncSession.
+    
+    Mỗi method của service_class được thực thi trong AsyncSession.run_sync: code
+    repository/ORM giữ nguyên, còn I/O đi qua driver async (aiosqlite/asyncpg)
+    nên route async không chiếm slot threadpool khi chờ DB. Kết quả trả về đã là
+    schema Pydantic nên không còn lazy load ngoài greenlet.
+    """
+    
+    service_class: type = None
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def __getattr__(self, name: str):
+        # Raise AttributeError sớm nếu service không có method này
+        getattr(self.service_class, name)
+        
+        async def method(*args, **kwargs):
+            return await self.db.run_sync(
+                lambda session: getattr(self.service_class(session), name)(*args, **kwargs)
+            )
+        
+        method.__name__ = name
+        return method
@@ -1,15 +1,25 @@
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.schemas.todo import TagCreate, TagResponse
-from app.repositories.tag_repository import TagRepository
+from app.repositories.tag_repository import TagRepository, invalidate_tags
+from app.core.routing import pin_primary
+from app.services.base import AsyncServiceBridge
 
 
 class TagService:
     """Service xử lý business logic cho Tag"""
     
     def __init__(self, db: Session):
+        self.db = db
         self.repository = TagRepository(db)
     
+    def _rollback_duplicate(self, name: str, owner_id: int):
+        """Rollback khi vi phạm unique (owner_id, name) và raise 400"""
+        self.db.rollback()
+        invalidate_tags(owner_id)
+        raise HTTPException(status_code=400, detail=f"Tag '{name}' đã tồn tại")
+    
     def get_tag_or_404(self, tag_id: int, owner_id: int):
         """Lấy Tag theo ID và owner hoặc raise 404"""
         tag = self.repository.get_by_id(tag_id, owner_id)
@@ -23,26 +33,34 @@ class TagService:
         return [TagResponse.model_validate(tag) for tag in tags]
     
     def get_tag(self, tag_id: int, owner_id: int) -> TagResponse:
-        """Lấy chi tiết một tag"""
-        tag = self.get_tag_or_404(tag_id, owner_id)
+        """Lấy chi tiết một tag (từ tag cache)"""
+        tag = self.repository.get_cached(tag_id, owner_id)
+        if not tag:
+            raise HTTPException(status_code=404, detail=f"Tag với id={tag_id} không tìm thấy")
         return TagResponse.model_validate(tag)
     
     def create_tag(self, tag_data: TagCreate, owner_id: int) -> TagResponse:
         """Tạo tag mới"""
+        pin_primary(self.db)
         # Kiểm tra tag trùng tên
         existing = self.repository.get_by_name(tag_data.name, owner_id)
         if existing:
             raise HTTPException(status_code=400, detail=f"Tag '{tag_data.name}' đã tồn tại")
         
-        tag = self.repository.create(
-            name=tag_data.name,
-            color=tag_data.color,
-            owner_id=owner_id
-        )
+        try:
+            tag = self.repository.create(
+                name=tag_data.name,
+                color=tag_data.color,
+                owner_id=owner_id
+            )
+        except IntegrityError:
+            # Cache có thể chưa thấy tag vừa tạo ở process khác; unique index là chốt chặn cuối
+            self._rollback_duplicate(tag_data.name, owner_id)
         return TagResponse.model_validate(tag)
     
     def update_tag(self, tag_id: int, tag_data: TagCreate, owner_id: int) -> TagResponse:
         """Cập nhật tag"""
+        pin_primary(self.db)
         tag = self.get_tag_or_404(tag_id, owner_id)
         
         # Kiểm tra trùng tên với tag khác
@@ -50,14 +68,24 @@ class TagService:
         if existing and existing.id != tag_id:
             raise HTTPException(status_code=400, detail=f"Tag '{tag_data.name}' đã tồn tại")
         
-        updated_tag = self.repository.update(
-            tag,
-            name=tag_data.name,
-            color=tag_data.color
-        )
+        try:
+            updated_tag = self.repository.update(
+                tag,
+                name=tag_data.name,
+                color=tag_data.color
+            )
+        except IntegrityError:
+            self._rollback_duplicate(tag_data.name, owner_id)
         return TagResponse.model_validate(updated_tag)
     
     def delete_tag(self, tag_id: int, owner_id: int) -> None:
         """Xóa tag"""
+        pin_primary(self.db)
         tag = self.get_tag_or_404(tag_id, owner_id)
         self.repository.delete(tag)
+
+
+class AsyncTagService(AsyncServiceBridge):
+    """TagService cho route async"""
+    
+    service_class = TagService
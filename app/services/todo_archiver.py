@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+from app.core.database import get_async_sessionmaker
+from app.models.todo import utcnow
+from app.repositories.todo_repository import ToDoRepository
+
+logger = logging.getLogger(__name__)
+
+
+def archive_cutoff(done_after_days: int) -> datetime:
+    """Mốc thời gian: ToDo đã hoàn thành, không sửa từ trước mốc này được lưu trữ"""
+    # Cùng quy ước thời gian với updated_at (UTC)
+    return utcnow() - timedelta(days=done_after_days)
+
+
+async def archive_completed_todos(
+    session_factory: Optional[async_sessionmaker] = None,
+    done_after_days: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> int:
+    """Chuyển ToDo đã hoàn thành từ lâu sang todos_archive theo từng batch, trả về tổng số.
+    
+    Mỗi batch là một transaction ngắn để không giữ lock lâu trên bảng todos.
+    """
+    session_factory = session_factory or get_async_sessionmaker()
+    cutoff = archive_cutoff(settings.ARCHIVE_DONE_AFTER_DAYS if done_after_days is None else done_after_days)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    
+    total = 0
+    while True:
+        async with session_factory() as db:
+            archived = await db.run_sync(
+                lambda session: ToDoRepository(session).archive_completed(cutoff, batch_size)
+            )
+        total += archived
+        if archived < batch_size:
+            return total
+
+
+async def run_todo_archiver(interval_seconds: float) -> None:
+    """Tác vụ nền: lưu trữ ToDo đã hoàn thành mỗi interval_seconds (dừng khi bị cancel)"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            archived = await archive_completed_todos()
+        except Exception:
+            logger.exception("Lưu trữ ToDo đã hoàn thành thất bại")
+        else:
+            if archived:
+                logger.info("Đã chuyển %d ToDo đã hoàn thành sang todos_archive", archived)
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import date, datetime
+from typing import AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.routing import replica_reads
+from app.repositories.todo_repository import EXPORT_FIELDS, ToDoRepository
+
+# Định dạng export -> media type
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CSV_COLUMNS = (*EXPORT_FIELDS, "tags")
+# Phân tách tên tag trong cột tags của CSV
+CSV_TAG_SEPARATOR = ";"
+
+
+def _json_default(value):
+    """Mã hóa date/datetime theo ISO 8601"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Không mã hóa được {type(value).__name__}")
+
+
+def _csv_value(value):
+    """Giá trị một ô CSV (date/datetime theo ISO 8601, None là ô trống)"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def iter_todo_batches(
+    db: AsyncSession, owner_id: int, batch_size: Optional[int] = None
+) -> AsyncIterator[list[dict]]:
+    """Duyệt ToDo của owner theo batch (dict gồm EXPORT_FIELDS và tags là danh sách tên tag).
+    
+    Dùng một result streaming (yield_per) cho todos; tags của mỗi batch được lấy bằng
+    một query IN(...) nên bộ nhớ chỉ phụ thuộc batch_size, không phụ thuộc số ToDo.
+    """
+    batch_size = batch_size or settings.TODO_EXPORT_BATCH_SIZE
+    with replica_reads(db.sync_session):
+        result = await db.stream(ToDoRepository.export_statement(owner_id, batch_size))
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            tags = defaultdict(list)
+            links = await db.execute(ToDoRepository.tag_names_statement([row["id"] for row in rows]))
+            for todo_id, name in links:
+                tags[todo_id].append(name)
+            for row in rows:
+                row["tags"] = tags[row["id"]]
+            yield rows
+
+
+async def export_ndjson(db: AsyncSession, owner_id: int, batch_size: Optional[int] = None) -> AsyncIterator[str]:
+    """Export NDJSON: mỗi dòng là một ToDo, mỗi batch là một chunk"""
+    async for rows in iter_todo_batches(db, owner_id, batch_size):
+        yield "".join(
+            json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in rows
+        )
+
+
+async def export_csv(db: AsyncSession, owner_id: int, batch_size: Optional[int] = None) -> AsyncIterator[str]:
+    """Export CSV có header; cột tags là tên tag nối bằng CSV_TAG_SEPARATOR"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+    async for rows in iter_todo_batches(db, owner_id, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            row["tags"] = CSV_TAG_SEPARATOR.join(row["tags"])
+            writer.writerow([_csv_value(row[column]) for column in CSV_COLUMNS])
+        yield buffer.getvalue()
+
+
+EXPORTERS = {
+    "ndjson": export_ndjson,
+    "csv": export_csv,
+}
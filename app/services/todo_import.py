@@ -0,0 +1,142 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Optional
+from pydantic import ValidationError
+from app.core.config import settings
+from app.schemas.todo import ToDoImportRow, ToDoImportError, ToDoImportResult
+from app.services.todo_export import CSV_TAG_SEPARATOR
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Tách stream bytes (UTF-8) thành từng dòng (bỏ ký tự xuống dòng), không đọc hết body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, object]]:
+    """(số dòng, object JSON hoặc ValueError) cho mỗi dòng không trống"""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"JSON không hợp lệ: {e}")
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[str], max_record_lines: Optional[int] = None
+) -> AsyncIterator[tuple[int, object]]:
+    """(số dòng bắt đầu record, dict theo header) cho mỗi record CSV.
+    
+    Record có ô trong ngoặc kép chứa xuống dòng được gom đến khi số dấu " là chẵn;
+    ô trống được bỏ qua (dùng giá trị mặc định), cột tags tách bằng CSV_TAG_SEPARATOR.
+    Record gom quá max_record_lines dòng (dấu " không đóng) bị báo lỗi ở dòng bắt đầu,
+    các dòng sau được đọc lại như record mới nên bộ nhớ không tăng theo body.
+    """
+    max_record_lines = max_record_lines or settings.TODO_IMPORT_MAX_RECORD_LINES
+    header = None
+    record, start, line_number = [], 0, 0
+    pending = deque()
+    async for line in lines:
+        line_number += 1
+        pending.append((line_number, line))
+        while pending:
+            number, line = pending.popleft()
+            if not record:
+                start = number
+            record.append(line)
+            text = "\n".join(record)
+            if text.count('"') % 2:
+                if len(record) >= max_record_lines:
+                    yield start, ValueError(
+                        f"CSV không hợp lệ: record quá {max_record_lines} dòng (thiếu dấu \" đóng?)"
+                    )
+                    pending.extendleft(reversed(list(enumerate(record[1:], start + 1))))
+                    record = []
+                continue
+            record = []
+            if not text.strip():
+                continue
+            values = next(csv.reader([text]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row = {name: value for name, value in zip(header, values) if value != ""}
+            if "tags" in row:
+                row["tags"] = [name.strip() for name in row["tags"].split(CSV_TAG_SEPARATOR) if name.strip()]
+            yield start, row
+    if record:
+        yield start, ValueError("CSV không hợp lệ: thiếu dấu \" đóng")
+
+
+RECORD_READERS = {
+    "ndjson": iter_ndjson_records,
+    "csv": iter_csv_records,
+}
+
+
+def _validate(record: object) -> ToDoImportRow:
+    """Validate một record, raise ValueError với thông báo ngắn gọn"""
+    if isinstance(record, ValueError):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("Mỗi dòng phải là một object JSON")
+    try:
+        return ToDoImportRow.model_validate(record)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(map(str, error["loc"]))
+        raise ValueError(f"{field}: {error['msg']}" if field else error["msg"]) from e
+
+
+async def import_todo_stream(
+    chunks: AsyncIterator[bytes],
+    import_format: str,
+    service,
+    owner_id: int,
+    chunk_size: Optional[int] = None
+) -> ToDoImportResult:
+    """Import ToDo từ stream NDJSON/CSV: validate và ghi theo chunk, trả về báo cáo lỗi theo dòng.
+    
+    service là AsyncToDoService; mỗi chunk là một lần import_todos_chunk (INSERT nhiều
+    dòng trong một transaction) nên bộ nhớ chỉ phụ thuộc chunk_size.
+    """
+    chunk_size = chunk_size or settings.TODO_IMPORT_CHUNK_SIZE
+    result = ToDoImportResult(imported=0, failed=0)
+    
+    def report(errors: list[ToDoImportError]) -> None:
+        result.failed += len(errors)
+        room = settings.TODO_IMPORT_MAX_ERRORS - len(result.errors)
+        result.errors.extend(errors[:max(room, 0)])
+        result.errors_truncated = result.errors_truncated or len(errors) > room
+    
+    async def flush(rows: list[tuple[int, ToDoImportRow]]) -> None:
+        imported, errors = await service.import_todos_chunk(rows, owner_id=owner_id)
+        result.imported += imported
+        report(errors)
+    
+    rows = []
+    async for line, record in RECORD_READERS[import_format](iter_lines(chunks)):
+        try:
+            rows.append((line, _validate(record)))
+        except ValueError as e:
+            report([ToDoImportError(line=line, error=str(e))])
+        if len(rows) >= chunk_size:
+            await flush(rows)
+            rows = []
+    if rows:
+        await flush(rows)
+    result.errors.sort(key=lambda error: error.line)
+    return result
@@ -1,22 +1,66 @@
-from typing import Optional
+from typing import Iterable, Optional
 from fastapi import HTTPException
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from app.schemas.todo import ToDoCreate, ToDoUpdate, ToDoPatch, ToDoResponse, ToDoListResponse
+from app.schemas.todo import (
+    TagResponse, ToDoCreate, ToDoUpdate, ToDoPatch, ToDoResponse, ToDoListResponse, ToDoBulkCreate, ToDoBulkCreateResponse,
+    ToDoBulkSelection, ToDoBulkUpdate, ToDoBulkResult, ToDoDashboard, ToDoStats, ToDoTagCount,
+    ToDoImportRow, ToDoImportError
+)
+from app.repositories.tag_repository import TagRepository, invalidate_tags
 from app.repositories.todo_repository import ToDoRepository
+from app.models.todo import utcnow
 from app.models.user import User
+from app.services.base import AsyncServiceBridge
+
+# Các trường của response đọc từ ORM object (tags xử lý riêng)
+TODO_RESPONSE_FIELDS = tuple(name for name in ToDoResponse.model_fields if name != "tags")
+TAG_RESPONSE_FIELDS = tuple(TagResponse.model_fields)
+todo_responses_adapter = TypeAdapter(list[ToDoResponse])
+
+
+def _loaded_values(obj, fields: tuple[str, ...]) -> dict:
+    """Giá trị các trường từ state đã load (__dict__) của ORM object.
+    
+    Đọc qua descriptor của SQLAlchemy tốn hơn cả bước validate; trường chưa load
+    hoặc đã expire vẫn đi qua getattr để ORM tự load.
+    """
+    state = obj.__dict__
+    return {name: state[name] if name in state else getattr(obj, name) for name in fields}
+
+
+def to_todo_responses(todos: Iterable) -> list[ToDoResponse]:
+    """ToDoResponse cho danh sách ToDo: dựng dict từ state đã load, validate một lần cho cả list"""
+    rows = []
+    for todo in todos:
+        row = _loaded_values(todo, TODO_RESPONSE_FIELDS)
+        row["tags"] = [_loaded_values(tag, TAG_RESPONSE_FIELDS) for tag in todo.tags]
+        rows.append(row)
+    return todo_responses_adapter.validate_python(rows)
+
+
+def to_todo_response(todo) -> ToDoResponse:
+    """ToDoResponse cho một ToDo"""
+    return to_todo_responses([todo])[0]
 
 
 class ToDoService:
     """Service xử lý business logic cho ToDo"""
     
     def __init__(self, db: Session):
+        self.db = db
         self.repository = ToDoRepository(db)
     
+    @staticmethod
+    def _not_found(todo_id: int) -> HTTPException:
+        """Lỗi 404 cho ToDo không tồn tại (hoặc không thuộc owner)"""
+        return HTTPException(status_code=404, detail=f"ToDo với id={todo_id} không tìm thấy")
+    
     def get_todo_or_404(self, todo_id: int, owner_id: int):
         """Lấy ToDo theo ID và owner hoặc raise 404"""
         todo = self.repository.get_by_id(todo_id, owner_id)
         if not todo:
-            raise HTTPException(status_code=404, detail=f"ToDo với id={todo_id} không tìm thấy")
+            raise self._not_found(todo_id)
         return todo
     
     def get_todos(
@@ -26,40 +70,95 @@ class ToDoService:
         q: Optional[str] = None,
         sort: Optional[str] = None,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+        include_archived: bool = False,
+        tag_ids: Optional[list[int]] = None,
+        tag_mode: str = "any"
     ) -> ToDoListResponse:
         """Lấy danh sách ToDo của owner với filter, search, sort và pagination"""
-        todos, total = self.repository.get_all(
-            owner_id=owner_id,
-            is_done=is_done,
-            q=q,
-            sort=sort,
+        try:
+            todos, total, has_more = self.repository.get_all(
+                owner_id=owner_id,
+                is_done=is_done,
+                q=q,
+                sort=sort,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                with_total=with_total,
+                include_archived=include_archived,
+                tag_ids=tag_ids,
+                tag_mode=tag_mode
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        items = to_todo_responses(todos)
+        # sort=rank có xếp hạng chỉ hỗ trợ offset; không xếp hạng thì cursor theo sort mặc định
+        ranked = self.repository.ranks(sort, q, include_archived)
+        next_cursor = self.repository.make_cursor(todos[-1], sort) if has_more and not ranked else None
+        return ToDoListResponse(
+            items=items,
+            total=total,
             limit=limit,
-            offset=offset
+            offset=0 if cursor else offset,
+            has_more=has_more,
+            next_cursor=next_cursor
+        )
+    
+    def get_stats(self, owner_id: int) -> ToDoStats:
+        """Thống kê số ToDo theo trạng thái và theo tag (tên/màu tag lấy từ tag cache)"""
+        counts, tag_counts = self.repository.get_stats(owner_id)
+        by_tag = dict(tag_counts)
+        tags = [
+            ToDoTagCount(id=tag.id, name=tag.name, color=tag.color, count=by_tag.get(tag.id, 0))
+            for tag in TagRepository(self.db).get_all(owner_id)
+        ]
+        return ToDoStats(**counts, tags=tags)
+    
+    def get_dashboard(self, owner_id: int, overdue_limit: int = 20, limit: int = 10) -> ToDoDashboard:
+        """Dữ liệu màn hình chính (today, overdue, trang đầu ToDo chưa hoàn thành)"""
+        sections = self.repository.get_dashboard(owner_id, overdue_limit=overdue_limit, limit=limit)
+        today, _ = sections["today"]
+        overdue, overdue_total = sections["overdue"]
+        open_todos, open_total = sections["open"]
+        has_more = len(open_todos) > limit
+        open_todos = open_todos[:limit]
+        return ToDoDashboard(
+            today=to_todo_responses(today),
+            overdue=to_todo_responses(overdue),
+            overdue_total=overdue_total,
+            open=ToDoListResponse(
+                items=to_todo_responses(open_todos),
+                total=open_total,
+                limit=limit,
+                offset=0,
+                has_more=has_more,
+                next_cursor=self.repository.make_cursor(open_todos[-1]) if has_more else None
+            )
         )
-        
-        items = [ToDoResponse.model_validate(todo) for todo in todos]
-        return ToDoListResponse(items=items, total=total, limit=limit, offset=offset)
     
     def get_overdue_todos(self, owner_id: int) -> list[ToDoResponse]:
         """Lấy danh sách ToDo quá hạn"""
         todos = self.repository.get_overdue(owner_id)
-        return [ToDoResponse.model_validate(todo) for todo in todos]
+        return to_todo_responses(todos)
     
     def get_today_todos(self, owner_id: int) -> list[ToDoResponse]:
         """Lấy danh sách ToDo hôm nay"""
         todos = self.repository.get_today(owner_id)
-        return [ToDoResponse.model_validate(todo) for todo in todos]
+        return to_todo_responses(todos)
     
     def get_deleted_todos(self, owner_id: int) -> list[ToDoResponse]:
         """Lấy danh sách ToDo đã xóa (trash)"""
         todos = self.repository.get_deleted(owner_id)
-        return [ToDoResponse.model_validate(todo) for todo in todos]
+        return to_todo_responses(todos)
     
     def get_todo(self, todo_id: int, owner_id: int) -> ToDoResponse:
         """Lấy chi tiết một ToDo"""
         todo = self.get_todo_or_404(todo_id, owner_id)
-        return ToDoResponse.model_validate(todo)
+        return to_todo_response(todo)
     
     def create_todo(self, todo_data: ToDoCreate, owner_id: int) -> ToDoResponse:
         """Tạo ToDo mới"""
@@ -70,54 +169,148 @@ class ToDoService:
             due_date=todo_data.due_date,
             tag_ids=todo_data.tag_ids
         )
-        return ToDoResponse.model_validate(todo)
+        return to_todo_response(todo)
+    
+    def bulk_create_todos(self, data: ToDoBulkCreate, owner_id: int, compact: bool = True) -> ToDoBulkCreateResponse:
+        """Tạo nhiều ToDo trong một transaction (validate toàn bộ trước khi ghi)"""
+        tag_ids = {tag_id for item in data.items for tag_id in item.tag_ids or []}
+        unknown = tag_ids - self.repository.get_owned_tag_ids(owner_id, tag_ids)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tag không tồn tại: {', '.join(map(str, sorted(unknown)))}"
+            )
+        
+        ids = self.repository.bulk_create(owner_id, [item.model_dump() for item in data.items])
+        items = None
+        if not compact:
+            items = to_todo_responses(self.repository.get_by_ids(ids, owner_id))
+        return ToDoBulkCreateResponse(created=len(ids), ids=ids, items=items)
+    
+    def import_todos_chunk(
+        self, rows: list[tuple[int, ToDoImportRow]], owner_id: int
+    ) -> tuple[int, list[ToDoImportError]]:
+        """Tạo một chunk ToDo đã validate (một INSERT nhiều dòng), trả về (số đã tạo, lỗi).
+        
+        Tên tag được map sang id, tag chưa có được tạo trong cùng transaction với ToDo
+        (chunk không ghi được dòng nào thì không tạo tag); dòng có tag_ids không thuộc
+        user bị báo lỗi và bỏ qua.
+        """
+        requested = {tag_id for _, row in rows for tag_id in row.tag_ids or []}
+        owned = self.repository.get_owned_tag_ids(owner_id, requested)
+        tag_ids_by_name, created = TagRepository(self.db).get_or_create_by_names(
+            (name for _, row in rows for name in row.tags), owner_id
+        )
+        
+        items, errors = [], []
+        for line, row in rows:
+            unknown = set(row.tag_ids or []) - owned
+            if unknown:
+                errors.append(ToDoImportError(
+                    line=line, error=f"Tag không tồn tại: {', '.join(map(str, sorted(unknown)))}"
+                ))
+                continue
+            item = row.model_dump(exclude={"tags"})
+            item["tag_ids"] = [*(row.tag_ids or []), *(tag_ids_by_name[name] for name in row.tags)]
+            items.append(item)
+        if not items:
+            self.db.rollback()
+            return 0, errors
+        self.repository.bulk_create(owner_id, items)
+        if created:
+            invalidate_tags(owner_id)
+        return len(items), errors
+    
+    def _bulk_update(
+        self, selection: ToDoBulkSelection, owner_id: int, values: dict, deleted: bool = False
+    ) -> ToDoBulkResult:
+        """Chạy một câu UPDATE cho các ToDo được chọn theo ids hoặc filter"""
+        criteria = selection.filter.model_dump() if selection.filter else {}
+        affected = self.repository.bulk_update(
+            owner_id, values, ids=selection.ids, deleted=deleted, **criteria
+        )
+        return ToDoBulkResult(affected=affected)
+    
+    def bulk_update_todos(self, data: ToDoBulkUpdate, owner_id: int) -> ToDoBulkResult:
+        """Cập nhật hàng loạt is_done/due_date"""
+        return self._bulk_update(data, owner_id, data.changes.model_dump(exclude_unset=True))
+    
+    def bulk_complete_todos(self, selection: ToDoBulkSelection, owner_id: int) -> ToDoBulkResult:
+        """Đánh dấu hoàn thành hàng loạt"""
+        return self._bulk_update(selection, owner_id, {"is_done": True})
+    
+    def bulk_delete_todos(self, selection: ToDoBulkSelection, owner_id: int) -> ToDoBulkResult:
+        """Chuyển hàng loạt ToDo vào thùng rác (soft delete)"""
+        return self._bulk_update(selection, owner_id, {"deleted_at": utcnow()})
+    
+    def bulk_restore_todos(self, selection: ToDoBulkSelection, owner_id: int) -> ToDoBulkResult:
+        """Khôi phục hàng loạt ToDo từ thùng rác"""
+        return self._bulk_update(selection, owner_id, {"deleted_at": None}, deleted=True)
     
     def update_todo(self, todo_id: int, todo_data: ToDoUpdate, owner_id: int) -> ToDoResponse:
         """Cập nhật toàn bộ ToDo (PUT)"""
-        todo = self.get_todo_or_404(todo_id, owner_id)
         updated_todo = self.repository.update(
-            todo,
+            todo_id,
+            owner_id,
             tag_ids=todo_data.tag_ids,
             title=todo_data.title,
             description=todo_data.description,
             is_done=todo_data.is_done,
             due_date=todo_data.due_date
         )
-        return ToDoResponse.model_validate(updated_todo)
+        if not updated_todo:
+            raise self._not_found(todo_id)
+        return to_todo_response(updated_todo)
     
     def patch_todo(self, todo_id: int, todo_data: ToDoPatch, owner_id: int) -> ToDoResponse:
         """Cập nhật một phần ToDo (PATCH)"""
-        todo = self.get_todo_or_404(todo_id, owner_id)
-        
         update_data = todo_data.model_dump(exclude_unset=True)
         tag_ids = update_data.pop('tag_ids', None)
-        updated_todo = self.repository.update(todo, tag_ids=tag_ids, **update_data)
-        return ToDoResponse.model_validate(updated_todo)
+        updated_todo = self.repository.update(todo_id, owner_id, tag_ids=tag_ids, **update_data)
+        if not updated_todo:
+            raise self._not_found(todo_id)
+        return to_todo_response(updated_todo)
     
     def complete_todo(self, todo_id: int, owner_id: int) -> ToDoResponse:
         """Đánh dấu ToDo hoàn thành"""
-        todo = self.get_todo_or_404(todo_id, owner_id)
-        updated_todo = self.repository.update(todo, is_done=True)
-        return ToDoResponse.model_validate(updated_todo)
+        updated_todo = self.repository.update(todo_id, owner_id, is_done=True)
+        if not updated_todo:
+            raise self._not_found(todo_id)
+        return to_todo_response(updated_todo)
     
     def delete_todo(self, todo_id: int, owner_id: int) -> None:
         """Xóa ToDo (soft delete)"""
-        todo = self.get_todo_or_404(todo_id, owner_id)
-        self.repository.delete(todo)
+        if not self.repository.delete(todo_id, owner_id):
+            raise self._not_found(todo_id)
     
     def restore_todo(self, todo_id: int, owner_id: int) -> ToDoResponse:
         """Khôi phục ToDo đã xóa"""
-        todo = self.repository.get_by_id(todo_id, owner_id, include_deleted=True)
+        restored_todo = self.repository.restore(todo_id, owner_id)
+        if not restored_todo:
+            # Chỉ truy vấn thêm khi thất bại để phân biệt 404 và 400
+            if self.repository.get_by_id(todo_id, owner_id):
+                raise HTTPException(status_code=400, detail="ToDo chưa bị xóa")
+            raise self._not_found(todo_id)
+        return to_todo_response(restored_todo)
+    
+    def unarchive_todo(self, todo_id: int, owner_id: int) -> ToDoResponse:
+        """Khôi phục ToDo từ kho lưu trữ"""
+        todo = self.repository.unarchive(todo_id, owner_id)
         if not todo:
-            raise HTTPException(status_code=404, detail=f"ToDo với id={todo_id} không tìm thấy")
-        if todo.deleted_at is None:
-            raise HTTPException(status_code=400, detail="ToDo chưa bị xóa")
-        restored_todo = self.repository.restore(todo)
-        return ToDoResponse.model_validate(restored_todo)
+            raise self._not_found(todo_id)
+        return to_todo_response(todo)
+    
+    def empty_trash(self, owner_id: int) -> ToDoBulkResult:
+        """Xóa vĩnh viễn toàn bộ thùng rác"""
+        return ToDoBulkResult(affected=self.repository.empty_trash(owner_id))
     
     def hard_delete_todo(self, todo_id: int, owner_id: int) -> None:
         """Xóa vĩnh viễn ToDo"""
-        todo = self.repository.get_by_id(todo_id, owner_id, include_deleted=True)
-        if not todo:
-            raise HTTPException(status_code=404, detail=f"ToDo với id={todo_id} không tìm thấy")
-        self.repository.hard_delete(todo)
+        if not self.repository.hard_delete(todo_id, owner_id):
+            raise self._not_found(todo_id)
+
+
+class AsyncToDoService(AsyncServiceBridge):
+    """ToDoService cho route async"""
+    
+    service_class = ToDoService
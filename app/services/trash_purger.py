@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+from app.core.database import get_async_sessionmaker
+from app.models.todo import utcnow
+from app.repositories.todo_repository import ToDoRepository
+
+logger = logging.getLogger(__name__)
+
+
+def trash_cutoff(retention_days: int) -> datetime:
+    """Mốc thời gian: ToDo bị xóa trước mốc này đã hết hạn lưu trong thùng rác"""
+    # Cùng quy ước thời gian với soft delete (deleted_at = utcnow())
+    return utcnow() - timedelta(days=retention_days)
+
+
+async def purge_expired_trash(
+    session_factory: Optional[async_sessionmaker] = None,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> int:
+    """Xóa vĩnh viễn ToDo quá hạn trong thùng rác theo từng batch, trả về tổng số đã xóa.
+    
+    Mỗi batch là một transaction ngắn để không giữ lock lâu trên bảng todos.
+    retention_days = 0 (mặc định của TRASH_RETENTION_DAYS) nghĩa là tắt purge: không xóa gì.
+    """
+    retention_days = settings.TRASH_RETENTION_DAYS if retention_days is None else retention_days
+    if retention_days <= 0:
+        return 0
+    session_factory = session_factory or get_async_sessionmaker()
+    cutoff = trash_cutoff(retention_days)
+    batch_size = batch_size or settings.TRASH_PURGE_BATCH_SIZE
+    
+    total = 0
+    while True:
+        async with session_factory() as db:
+            deleted = await db.run_sync(
+                lambda session: ToDoRepository(session).purge_expired(cutoff, batch_size)
+            )
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+async def run_trash_purger(interval_seconds: float) -> None:
+    """Tác vụ nền: purge thùng rác mỗi interval_seconds (dừng khi bị cancel)"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = await purge_expired_trash()
+        except Exception:
+            logger.exception("Purge thùng rác thất bại")
+        else:
+            if deleted:
+                logger.info("Đã xóa vĩnh viễn %d ToDo quá hạn trong thùng rác", deleted)
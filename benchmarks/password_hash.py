@@ -0,0 +1,34 @@
+"""
+Benchmark thời gian hash/verify bcrypt theo từng work factor
+
+Chạy: python -m benchmarks.password_hash --min-rounds 8 --max-rounds 14 --samples 3
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.security import measure_bcrypt, calibrate_bcrypt_rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt hash/verify theo work factor")
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--target-ms", type=float, default=None, help="Độ trễ verify mục tiêu để gợi ý BCRYPT_ROUNDS")
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6} {'hash_ms':>10} {'verify_ms':>10} {'verify/s/core':>14}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        hash_ms, verify_ms = measure_bcrypt(rounds, samples=args.samples)
+        print(f"{rounds:>6} {hash_ms:>10.1f} {verify_ms:>10.1f} {1000 / verify_ms:>14.1f}")
+
+    print(f"\nBCRYPT_ROUNDS hiện tại: {settings.BCRYPT_ROUNDS}")
+    if args.target_ms:
+        rounds = calibrate_bcrypt_rounds(
+            args.target_ms, min_rounds=args.min_rounds, max_rounds=args.max_rounds, samples=args.samples
+        )
+        print(f"Gợi ý BCRYPT_ROUNDS cho target {args.target_ms:.0f} ms: {rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark thời gian Python cho việc dựng câu lệnh của các query nóng:
+Query legacy (db.query(...).filter(...)) vs select() 2.0 vs lambda_stmt (đang dùng trong repository)
+
+Mỗi biến thể được đo hai lần:
+- build: chỉ dựng câu lệnh và lấy cache key (phần việc Python trước khi chạm DB)
+- call: dựng + chạy trên SQLite tạm và lấy kết quả
+
+Chạy: python -m benchmarks.query_construction --todos 2000 --repeat 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.orm import Query, Session, selectinload, sessionmaker
+
+from app.core.database import Base
+from app.models import User, ToDo, Tag
+from app.repositories.tag_repository import TagRepository
+from app.repositories.todo_repository import ToDoRepository
+
+
+def build_database(todos: int) -> tuple[sessionmaker, int, int, object]:
+    """Tạo DB SQLite tạm với một user, một tag và `todos` ToDo (một phần quá hạn)"""
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    today = date.today()
+    with Session() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        tag = Tag(name="bench", owner_id=user.id)
+        db.add(tag)
+        db.execute(
+            ToDo.__table__.insert(),
+            [
+                {
+                    "title": f"Todo {i}",
+                    "owner_id": user.id,
+                    "is_done": False,
+                    "due_date": today - timedelta(days=i % 30 - 10),
+                }
+                for i in range(todos)
+            ]
+        )
+        db.commit()
+        user_id, tag_id = user.id, tag.id
+    return Session, user_id, tag_id, engine
+
+
+def legacy_queries(db: Session, user_id: int, tag_id: int, todo_id: int) -> dict:
+    """Các query nóng viết bằng Query legacy (cách repository dựng trước khi chuyển sang 2.0)"""
+    today = date.today()
+    base = lambda: db.query(ToDo).options(selectinload(ToDo.tags))
+    return {
+        "todo get_by_id": lambda: base().filter(
+            ToDo.id == todo_id, ToDo.owner_id == user_id, ToDo.deleted_at.is_(None)
+        ),
+        "todo get_overdue": lambda: base().filter(
+            ToDo.owner_id == user_id, ToDo.deleted_at.is_(None),
+            ToDo.due_date < today, ToDo.is_done.is_(False)
+        ).order_by(ToDo.due_date.asc()),
+        "todo get_today": lambda: base().filter(
+            ToDo.owner_id == user_id, ToDo.deleted_at.is_(None), ToDo.due_date == today
+        ),
+        "tag get_by_id": lambda: db.query(Tag).filter(Tag.id == tag_id, Tag.owner_id == user_id),
+    }
+
+
+def select_queries(user_id: int, tag_id: int, todo_id: int) -> dict:
+    """Cùng các query viết bằng select() 2.0 (dựng lại cây câu lệnh mỗi lần gọi)"""
+    today = date.today()
+    base = lambda: select(ToDo).options(selectinload(ToDo.tags))
+    return {
+        "todo get_by_id": lambda: base().where(
+            ToDo.id == todo_id, ToDo.owner_id == user_id, ToDo.deleted_at.is_(None)
+        ),
+        "todo get_overdue": lambda: base().where(
+            ToDo.owner_id == user_id, ToDo.deleted_at.is_(None),
+            ToDo.due_date < today, ToDo.is_done.is_(False)
+        ).order_by(ToDo.due_date.asc()),
+        "todo get_today": lambda: base().where(
+            ToDo.owner_id == user_id, ToDo.deleted_at.is_(None), ToDo.due_date == today
+        ),
+        "tag get_by_id": lambda: select(Tag).where(Tag.id == tag_id, Tag.owner_id == user_id),
+    }
+
+
+def lambda_queries(user_id: int, tag_id: int, todo_id: int) -> dict:
+    """Cùng các query viết bằng lambda_stmt (cache theo vị trí lambda)"""
+    today = date.today()
+    option = selectinload(ToDo.tags)
+    base = lambda: lambda_stmt(lambda: select(ToDo).options(option))
+    return {
+        "todo get_by_id": lambda: base() + (lambda s: s.where(
+            ToDo.id == todo_id, ToDo.owner_id == user_id, ToDo.deleted_at.is_(None)
+        )),
+        "todo get_overdue": lambda: base() + (lambda s: s.where(
+            ToDo.owner_id == user_id, ToDo.deleted_at.is_(None),
+            ToDo.due_date < today, ToDo.is_done.is_(False)
+        ).order_by(ToDo.due_date.asc())),
+        "todo get_today": lambda: base() + (lambda s: s.where(
+            ToDo.owner_id == user_id, ToDo.deleted_at.is_(None), ToDo.due_date == today
+        )),
+        "tag get_by_id": lambda: lambda_stmt(
+            lambda: select(Tag).where(Tag.id == tag_id, Tag.owner_id == user_id)
+        ),
+    }
+
+
+def repository_calls(db: Session, user_id: int, tag_id: int, todo_id: int) -> dict:
+    """Các method thật của repository (để đối chiếu với biến thể lambda_stmt)"""
+    todos, tags = ToDoRepository(db), TagRepository(db)
+    return {
+        "todo get_by_id": lambda: todos.get_by_id(todo_id, user_id),
+        "todo get_overdue": lambda: todos.get_overdue(user_id),
+        "todo get_today": lambda: todos.get_today(user_id),
+        "tag get_by_id": lambda: tags.get_by_id(tag_id, user_id),
+    }
+
+
+def statement_of(built):
+    """Câu lệnh Core từ kết quả build (Query legacy -> select tương ứng)"""
+    return built.statement if isinstance(built, Query) else built
+
+
+def time_build(build, repeat: int) -> float:
+    """µs trung bình cho việc dựng câu lệnh + tính cache key (không chạy SQL)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        statement_of(build())._generate_cache_key()
+    return (time.perf_counter() - start) * 1_000_000 / repeat
+
+
+def time_call(db: Session, build, repeat: int) -> float:
+    """µs trung bình cho dựng + chạy + lấy kết quả"""
+    def run():
+        built = build()
+        if isinstance(built, Query):
+            return built.all()
+        return db.scalars(built).all()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) * 1_000_000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dựng câu lệnh: Query legacy vs select() vs lambda_stmt")
+    parser.add_argument("--todos", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    Session, user_id, tag_id, engine = build_database(args.todos)
+    todo_id = 1
+    variants = ("legacy", "select", "lambda")
+    with Session() as db:
+        builders = {
+            "legacy": legacy_queries(db, user_id, tag_id, todo_id),
+            "select": select_queries(user_id, tag_id, todo_id),
+            "lambda": lambda_queries(user_id, tag_id, todo_id),
+        }
+        print(f"{'query':<18} " + " ".join(f"{name + ' build':>13}" for name in variants)
+              + " " + " ".join(f"{name + ' call':>12}" for name in variants) + f" {'repo call':>10}")
+        for name in builders["legacy"]:
+            # Warm-up: compiled cache và cache lambda được tạo ở lần gọi đầu
+            for variant in variants:
+                time_call(db, builders[variant][name], 10)
+            builds = [time_build(builders[variant][name], args.repeat) for variant in variants]
+            calls = [time_call(db, builders[variant][name], args.repeat // 10 or 1) for variant in variants]
+            repo = repository_calls(db, user_id, tag_id, todo_id)[name]
+            repo()
+            start = time.perf_counter()
+            for _ in range(args.repeat // 10 or 1):
+                repo()
+            repo_us = (time.perf_counter() - start) * 1_000_000 / (args.repeat // 10 or 1)
+            print(f"{name:<18} " + " ".join(f"{us:>10.1f} µs" for us in builds)
+                  + " " + " ".join(f"{us:>9.1f} µs" for us in calls) + f" {repo_us:>7.1f} µs")
+        db.rollback()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
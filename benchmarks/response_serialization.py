@@ -0,0 +1,89 @@
+"""
+Benchmark dựng + mã hóa response danh sách ToDo:
+model_validate(from_attributes) từng item + validate/serialize lại theo response_model
+vs to_todo_responses (validate một lần) + PydanticJSONResponse
+
+Chạy: python -m benchmarks.response_serialization --tags 3 --repeat 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.responses import PydanticJSONResponse, get_type_adapter
+from app.models import User, ToDo, Tag
+from app.repositories.todo_repository import ToDoRepository
+from app.schemas.todo import ToDoListResponse, ToDoResponse
+from app.services.todo_service import to_todo_responses
+
+
+def build_database(tags_per_todo: int, todos: int) -> tuple[sessionmaker, int]:
+    """Tạo DB SQLite tạm với một user, `todos` ToDo, mỗi ToDo có `tags_per_todo` tags"""
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        tags = [Tag(name=f"tag {i}", color="#3B82F6", owner_id=user.id) for i in range(tags_per_todo)]
+        db.add_all(
+            ToDo(title=f"Todo {i}", description="Mô tả " * 10, owner_id=user.id, tags=tags)
+            for i in range(todos)
+        )
+        db.commit()
+        user_id = user.id
+    return Session, user_id
+
+
+def legacy_response(todos: list) -> bytes:
+    """Cách cũ: model_validate từng item, FastAPI validate lại theo response_model rồi dump_json"""
+    page = ToDoListResponse(
+        items=[ToDoResponse.model_validate(todo) for todo in todos], total=len(todos), limit=len(todos), offset=0
+    )
+    adapter = get_type_adapter(ToDoListResponse)
+    return adapter.dump_json(adapter.validate_python(page))
+
+
+def fast_response(todos: list) -> bytes:
+    """Cách mới: validate một lần từ state đã load, mã hóa thẳng"""
+    page = ToDoListResponse(items=to_todo_responses(todos), total=len(todos), limit=len(todos), offset=0)
+    return PydanticJSONResponse(page).body
+
+
+def measure(function, todos: list, repeat: int) -> float:
+    """Thời gian trung bình (ms) cho một response"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(todos)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dựng + mã hóa response danh sách ToDo")
+    parser.add_argument("--tags", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    Session, user_id = build_database(args.tags, 100)
+    print(f"{'page':>5} {'query ms':>9} {'legacy ms':>10} {'fast ms':>8}")
+    with Session() as db:
+        repository = ToDoRepository(db)
+        for page_size in (10, 50, 100):
+            start = time.perf_counter()
+            for _ in range(args.repeat // 10 or 1):
+                todos, _, _ = repository.get_all(user_id, limit=page_size, with_total=False)
+            query_ms = (time.perf_counter() - start) * 1000 / (args.repeat // 10 or 1)
+            assert legacy_response(todos) == fast_response(todos)
+            legacy_ms = measure(legacy_response, todos, args.repeat)
+            fast_ms = measure(fast_response, todos, args.repeat)
+            print(f"{page_size:>5} {query_ms:>9.2f} {legacy_ms:>10.2f} {fast_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
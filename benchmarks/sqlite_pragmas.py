@@ -0,0 +1,96 @@
+"""
+Benchmark throughput đọc/ghi đồng thời của SQLite: mặc định vs profile tối ưu (SQLITE_TUNED)
+
+Chạy: python -m benchmarks.sqlite_pragmas --threads 8 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import get_engine_options, enable_sqlite_tuning
+
+
+def run(tuned: bool, threads: int, seconds: float, write_ratio: float, rows: int) -> dict:
+    """Chạy workload hỗn hợp trên một file SQLite mới và trả về số liệu"""
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite:///{path}"
+    options = get_engine_options(url)
+    options.update(pool_size=threads, max_overflow=0)
+    engine = create_engine(url, **options)
+    if tuned:
+        enable_sqlite_tuning(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, owner_id INTEGER, title TEXT)"))
+        conn.execute(text("CREATE INDEX ix_items_owner ON items (owner_id)"))
+        conn.execute(
+            text("INSERT INTO items (owner_id, title) VALUES (:owner_id, :title)"),
+            [{"owner_id": i % 100, "title": f"item {i}"} for i in range(rows)]
+        )
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        local = {"reads": 0, "writes": 0, "locked": 0}
+        while time.perf_counter() < deadline:
+            owner_id = random.randrange(100)
+            try:
+                if random.random() < write_ratio:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            text("INSERT INTO items (owner_id, title) VALUES (:owner_id, 'new')"),
+                            {"owner_id": owner_id}
+                        )
+                    local["writes"] += 1
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(
+                            text("SELECT id, title FROM items WHERE owner_id = :owner_id LIMIT 50"),
+                            {"owner_id": owner_id}
+                        ).fetchall()
+                    local["reads"] += 1
+            except OperationalError:
+                local["locked"] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    engine.dispose()
+
+    return {
+        "reads/s": counts["reads"] / seconds,
+        "writes/s": counts["writes"] / seconds,
+        "locked errors": counts["locked"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SQLite mặc định vs profile tối ưu")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'profile':>8} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+    for tuned in (False, True):
+        result = run(tuned, args.threads, args.seconds, args.write_ratio, args.rows)
+        name = "tuned" if tuned else "default"
+        print(f"{name:>8} {result['reads/s']:>10.0f} {result['writes/s']:>10.0f} {result['locked errors']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark chiến lược load tags cho danh sách ToDo: joined vs selectin vs không load tags
+
+Chạy: python -m benchmarks.tag_loading --todos 2000 --repeat 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import User, ToDo, Tag, todo_tags
+from app.repositories.todo_repository import ToDoRepository, TAGS_LOADERS
+
+
+def build_database(tags_per_todo: int, todos: int) -> sessionmaker:
+    """Tạo DB SQLite tạm với một user, `todos` ToDo, mỗi ToDo có `tags_per_todo` tags"""
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        tags = [Tag(name=f"tag {i}", owner_id=user.id) for i in range(max(tags_per_todo, 1) * 2)]
+        db.add_all(tags)
+        db.flush()
+        db.execute(
+            ToDo.__table__.insert(),
+            [{"title": f"Todo {i}", "owner_id": user.id, "is_done": False} for i in range(todos)]
+        )
+        todo_ids = [row.id for row in db.query(ToDo.id)]
+        links = [
+            {"todo_id": todo_id, "tag_id": tag.id}
+            for todo_id in todo_ids
+            for tag in random.sample(tags, tags_per_todo)
+        ]
+        if links:
+            db.execute(todo_tags.insert(), links)
+        db.commit()
+        user_id = user.id
+    return Session, user_id, engine
+
+
+def measure(Session, user_id: int, engine, strategy: str, page_size: int, repeat: int) -> tuple[float, float]:
+    """Thời gian trung bình (ms) và số statement cho một lần get_all"""
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with Session() as db:
+            ToDoRepository(db, tags_loading=strategy).get_all(user_id, limit=page_size, with_total=False)
+    elapsed = (time.perf_counter() - start) * 1000 / repeat
+    event.remove(engine, "before_cursor_execute", count)
+    return elapsed, statements / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chiến lược load ToDo.tags")
+    parser.add_argument("--todos", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'tags/todo':>9} {'page':>5} " + " ".join(f"{name + ' ms':>12}" for name in TAGS_LOADERS))
+    for tags_per_todo in (0, 5, 20):
+        Session, user_id, engine = build_database(tags_per_todo, args.todos)
+        for page_size in (10, 100):
+            results = [
+                measure(Session, user_id, engine, strategy, page_size, args.repeat)
+                for strategy in TAGS_LOADERS
+            ]
+            cells = " ".join(f"{ms:>7.2f} ({stmts:.0f}q)" for ms, stmts in results)
+            print(f"{tags_per_todo:>9} {page_size:>5} {cells}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
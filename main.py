@@ -1,15 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import dispose_async_engines, get_async_sessionmaker
+from app.core.password_hasher import password_hasher
+from app.core.security import calibrate_bcrypt_rounds, configure_password_hashing
+from app.services.todo_archiver import run_todo_archiver
+from app.services.trash_purger import run_trash_purger
 from app.routers import todo_router, health_router, auth_router, tag_router
 
-# Tạo tất cả tables
-Base.metadata.create_all(bind=engine)
+# Schema được quản lý bằng Alembic: chạy `alembic upgrade head` trước khi khởi động
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Khởi tạo và giải phóng tài nguyên theo vòng đời app"""
+    # Tạo engine async ngay khi khởi động: cấu hình sai (driver không hỗ trợ) báo lỗi tại đây
+    get_async_sessionmaker()
+    if settings.PASSWORD_HASH_TARGET_MS:
+        configure_password_hashing(calibrate_bcrypt_rounds(settings.PASSWORD_HASH_TARGET_MS))
+    tasks = []
+    if settings.TRASH_RETENTION_DAYS > 0 and settings.TRASH_PURGE_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_trash_purger(settings.TRASH_PURGE_INTERVAL_SECONDS)))
+    if settings.ARCHIVE_DONE_AFTER_DAYS > 0 and settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_todo_archiver(settings.ARCHIVE_INTERVAL_SECONDS)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hasher.shutdown()
+    await dispose_async_engines()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Include routers
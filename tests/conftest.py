@@ -1,28 +1,43 @@
 """
 Test configuration and fixtures
 """
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from main import app
-from app.core.database import Base, get_db
-from app.core.security import get_password_hash
+from app.core.database import Base, get_db, get_async_db
+from app.core.routing import RoutingSession, recent_writers
+from app.core.security import get_password_hash, principal_cache
 from app.models import User, ToDo, Tag
+from app.repositories.tag_repository import tag_cache
 
 
-# Test database - SQLite in memory
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database - SQLite file tạm, dùng chung cho engine sync (fixtures) và async (app)
+TEST_DB_PATH = os.path.join(tempfile.gettempdir(), f"todo_test_{os.getpid()}.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: mỗi TestClient chạy event loop riêng nên không tái sử dụng connection async
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+# RoutingSession như app (không có replica): giữ nguyên việc ghi nhận user vừa ghi
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
+)
+
 
 def override_get_db():
     """Override database dependency for testing"""
@@ -33,6 +48,21 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_database_file():
+    """Remove the temporary database file after the test session"""
+    yield
+    engine.dispose()
+    if os.path.exists(TEST_DB_PATH):
+        os.remove(TEST_DB_PATH)
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create fresh database for each test"""
@@ -47,7 +77,11 @@ def db_session():
 def client(db_session):
     """Create test client with overridden database"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    tag_cache.clear()
+    recent_writers.clear()
     
     with TestClient(app) as c:
         yield c
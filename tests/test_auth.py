@@ -99,3 +99,112 @@ class TestAuthMe:
             headers={"Authorization": "Bearer invalid_token"}
         )
         assert response.status_code == 401
+
+
+class TestPrincipalCache:
+    """Tests for principal cache in get_current_user"""
+    
+    def test_principal_cached_per_token(self, client, auth_headers):
+        """Test repeated requests with the same token hit the cache"""
+        from app.core.security import principal_cache
+        
+        client.get("/api/v1/todos", headers=auth_headers)
+        client.get("/api/v1/todos", headers=auth_headers)
+        stats = principal_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+    
+    def test_principal_invalidated_on_user_update(self, client, auth_headers, db_session, test_user):
+        """Test deactivating a user drops the cached principal"""
+        from app.repositories.user_repository import UserRepository
+        
+        assert client.get("/api/v1/todos", headers=auth_headers).status_code == 200
+        
+        UserRepository(db_session).update(test_user, is_active=False)
+        
+        response = client.get("/api/v1/todos", headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestPasswordHasher:
+    """Tests for the process-pool password hasher"""
+    
+    def test_hash_and_verify_in_pool(self):
+        """Test hashing round-trips through the worker pool"""
+        import asyncio
+        from app.core.password_hasher import PasswordHasher
+        
+        hasher = PasswordHasher(max_workers=1, max_pending=4)
+        try:
+            hashed = asyncio.run(hasher.hash("password123"))
+            assert asyncio.run(hasher.verify("password123", hashed)) is True
+            assert asyncio.run(hasher.verify("wrong", hashed)) is False
+        finally:
+            hasher.shutdown()
+    
+    def test_login_returns_503_when_saturated(self, client, test_user, monkeypatch):
+        """Test login is rejected with 503 when the hashing queue is full"""
+        from app.core.password_hasher import password_hasher
+        
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "password123"}
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+class TestPasswordRehash:
+    """Tests for transparent rehash on login"""
+    
+    def test_login_rehashes_outdated_hash(self, client, db_session):
+        """Test a hash with outdated rounds is upgraded on successful login"""
+        from app.core.security import build_pwd_context, get_bcrypt_rounds
+        from app.models import User
+        
+        user = User(
+            email="legacy@example.com",
+            hashed_password=build_pwd_context(4).hash("password123"),
+            is_active=True
+        )
+        db_session.add(user)
+        db_session.commit()
+        
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "legacy@example.com", "password": "password123"}
+        )
+        assert response.status_code == 200
+        
+        db_session.refresh(user)
+        assert user.hashed_password.startswith(f"$2b${get_bcrypt_rounds()}$")
+    
+    def test_login_keeps_stronger_hash(self, client, db_session, test_user):
+        """Test a hash with more rounds than configured is not rewritten on login"""
+        from app.core.security import configure_password_hashing, get_bcrypt_rounds
+        
+        hashed_password = test_user.hashed_password
+        rounds = get_bcrypt_rounds()
+        configure_password_hashing(rounds - 1)
+        try:
+            response = client.post(
+                "/api/v1/auth/login",
+                json={"email": test_user.email, "password": "password123"}
+            )
+        finally:
+            configure_password_hashing(rounds)
+        assert response.status_code == 200
+        
+        db_session.refresh(test_user)
+        assert test_user.hashed_password == hashed_password
+    
+    def test_needs_rehash_only_below_configured_rounds(self):
+        """Test only weaker bcrypt hashes are flagged, in either calibration direction"""
+        from app.core.security import get_bcrypt_rounds, password_needs_rehash
+        
+        rounds = get_bcrypt_rounds()
+        salt_and_hash = "." * 53
+        assert password_needs_rehash(f"$2b${rounds - 1:02d}${salt_and_hash}")
+        assert not password_needs_rehash(f"$2b${rounds:02d}${salt_and_hash}")
+        assert not password_needs_rehash(f"$2b${rounds + 1:02d}${salt_and_hash}")
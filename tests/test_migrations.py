@@ -0,0 +1,84 @@
+"""
+Tests for Alembic migrations
+"""
+import os
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.todo_search import include_name
+from app.repositories.todo_repository import ToDoRepository
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini")
+
+
+def _alembic_config(connection) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    return config
+
+
+class TestMigrations:
+    """Tests for upgrade/downgrade of the migration chain"""
+    
+    def test_upgrade_head_matches_models(self, tmp_path):
+        """Test migrated schema has no drift from the SQLAlchemy models"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+        with engine.begin() as connection:
+            command.upgrade(_alembic_config(connection), "head")
+            context = MigrationContext.configure(connection, opts={"include_name": include_name})
+            diff = compare_metadata(context, Base.metadata)
+        assert diff == []
+        
+        indexes = {ix["name"] for ix in inspect(engine).get_indexes("todos")}
+        assert "ix_todos_owner_id_deleted_at_created_at_id" in indexes
+        assert "ix_todos_owner_id_due_date_open" in indexes
+        assert "ix_todos_deleted_at_trash" in indexes
+        assert "ix_todos_updated_at_done" in indexes
+        assert "todos_archive" in inspect(engine).get_table_names()
+        assert "user_todo_counters" in inspect(engine).get_table_names()
+        assert "todos_fts" in inspect(engine).get_table_names()
+        engine.dispose()
+    
+    def test_downgrade_to_base(self, tmp_path):
+        """Test the migration chain can be fully reverted"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+        with engine.begin() as connection:
+            config = _alembic_config(connection)
+            command.upgrade(config, "head")
+            command.downgrade(config, "base")
+        assert set(inspect(engine).get_table_names()) <= {"alembic_version"}
+        engine.dispose()
+    
+    def test_cursor_walks_rows_with_server_default_timestamps(self, tmp_path):
+        """Test keyset pagination terminates over rows written with CURRENT_TIMESTAMP before 0003"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+        with engine.begin() as connection:
+            config = _alembic_config(connection)
+            command.upgrade(config, "0002_access_path_indexes")
+            connection.execute(text(
+                "INSERT INTO users (id, email, hashed_password, is_active) VALUES (1, 'old@example.com', 'x', 1)"
+            ))
+            for i in range(3):
+                connection.execute(text(
+                    "INSERT INTO todos (title, is_done, owner_id) VALUES (:title, 0, 1)"
+                ), {"title": f"Old {i}"})
+            command.upgrade(config, "head")
+        
+        with Session(engine) as db:
+            repository = ToDoRepository(db)
+            for sort, expected in (("-created_at", [3, 2, 1]), ("updated_at", [1, 2, 3])):
+                seen, cursor = [], None
+                while len(seen) <= len(expected):
+                    todos, _, has_more = repository.get_all(1, sort=sort, limit=1, cursor=cursor, with_total=False)
+                    seen += [todo.id for todo in todos]
+                    if not has_more:
+                        break
+                    cursor = repository.make_cursor(todos[-1], sort)
+                assert seen == expected
+        engine.dispose()
@@ -147,3 +147,101 @@ class TestDeleteTag:
             headers=auth_headers
         )
         assert response.status_code == 404
+
+
+class TestTagCache:
+    """Tests for the per-user tag cache"""
+    
+    @pytest.fixture
+    def tag_queries(self, client, auth_headers):
+        """Count SQL statements that read the tags table"""
+        from sqlalchemy import event
+        from tests.conftest import async_engine
+        
+        recorded = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT") and "FROM tags" in statement:
+                recorded.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        yield recorded
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    
+    def test_listing_served_from_cache(self, client, auth_headers, test_tag, tag_queries):
+        """Test repeated tag reads hit the database once"""
+        for _ in range(3):
+            assert len(client.get("/api/v1/tags", headers=auth_headers).json()) == 1
+        assert client.get(f"/api/v1/tags/{test_tag.id}", headers=auth_headers).status_code == 200
+        assert len(tag_queries) == 1
+        
+        stats = client.get("/health/cache").json()["tags"]
+        assert stats["hits"] == 3
+        assert stats["misses"] == 1
+    
+    def test_writes_invalidate(self, client, auth_headers, test_tag):
+        """Test create/update/delete are visible on the next read"""
+        client.get("/api/v1/tags", headers=auth_headers)
+        
+        created = client.post("/api/v1/tags", json={"name": "Home"}, headers=auth_headers).json()
+        names = [tag["name"] for tag in client.get("/api/v1/tags", headers=auth_headers).json()]
+        assert names == ["Test Tag", "Home"]
+        
+        client.put(f"/api/v1/tags/{created['id']}", json={"name": "House"}, headers=auth_headers)
+        assert client.get(f"/api/v1/tags/{created['id']}", headers=auth_headers).json()["name"] == "House"
+        
+        client.delete(f"/api/v1/tags/{created['id']}", headers=auth_headers)
+        assert client.get(f"/api/v1/tags/{created['id']}", headers=auth_headers).status_code == 404
+    
+    def test_todo_tags_resolved_from_cache(self, client, auth_headers, test_tag, tag_queries):
+        """Test creating todos with tag_ids does not query the tags table once cached"""
+        client.get("/api/v1/tags", headers=auth_headers)
+        tag_queries.clear()
+        
+        response = client.post(
+            "/api/v1/todos",
+            json={"title": "Cached tags", "tag_ids": [test_tag.id]},
+            headers=auth_headers
+        )
+        assert response.json()["tags"] == [{"id": test_tag.id, "name": "Test Tag", "color": "#FF5733"}]
+        response = client.post(
+            "/api/v1/todos/bulk",
+            json={"items": [{"title": "Bulk cached", "tag_ids": [test_tag.id]}]},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+        assert tag_queries == []
+    
+    def test_stale_cache_duplicate_name(self, client, auth_headers, db_session, test_user):
+        """Test the unique index still rejects duplicates the cache has not seen"""
+        from app.models import Tag
+        
+        client.get("/api/v1/tags", headers=auth_headers)
+        db_session.add(Tag(name="Elsewhere", owner_id=test_user.id))
+        db_session.commit()
+        
+        response = client.post("/api/v1/tags", json={"name": "Elsewhere"}, headers=auth_headers)
+        assert response.status_code == 400
+        names = [tag["name"] for tag in client.get("/api/v1/tags", headers=auth_headers).json()]
+        assert names == ["Elsewhere"]
+    
+    def test_tag_created_elsewhere_reloads_once(self, client, auth_headers, db_session, test_user, tag_queries):
+        """Test a tag missing from a warm cache (created by another worker) triggers one reload"""
+        from app.models import Tag
+        
+        client.get("/api/v1/tags", headers=auth_headers)
+        tag = Tag(name="Other worker", owner_id=test_user.id)
+        db_session.add(tag)
+        db_session.commit()
+        tag_queries.clear()
+        
+        assert client.get(f"/api/v1/tags/{tag.id}", headers=auth_headers).json()["name"] == "Other worker"
+        response = client.post(
+            "/api/v1/todos/bulk",
+            json={"items": [{"title": "Bulk elsewhere", "tag_ids": [tag.id]}]},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+        assert len(tag_queries) == 1
+        
+        assert client.get("/api/v1/tags/9999", headers=auth_headers).status_code == 404
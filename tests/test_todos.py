@@ -73,6 +73,168 @@ class TestCreateTodo:
         assert response.status_code == 401
 
 
+class TestBulkCreateTodos:
+    """Tests for POST /todos/bulk"""
+    
+    def test_bulk_create_compact(self, client, auth_headers, test_tag):
+        """Test bulk create returns ids in input order and links tags"""
+        items = [{"title": f"Bulk todo {i}", "tag_ids": [test_tag.id]} for i in range(5)]
+        response = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers)
+        assert response.status_code == 201
+        data = response.json()
+        assert data["created"] == 5
+        assert data["items"] is None
+        assert data["ids"] == sorted(data["ids"])
+        
+        todo = client.get(f"/api/v1/todos/{data['ids'][2]}", headers=auth_headers).json()
+        assert todo["title"] == "Bulk todo 2"
+        assert todo["is_done"] is False
+        assert todo["tags"][0]["id"] == test_tag.id
+    
+    def test_bulk_create_full_items(self, client, auth_headers):
+        """Test compact=false returns the created todos"""
+        items = [{"title": "First bulk", "due_date": "2030-01-01"}, {"title": "Second bulk"}]
+        response = client.post("/api/v1/todos/bulk?compact=false", json={"items": items}, headers=auth_headers)
+        assert response.status_code == 201
+        data = response.json()
+        assert [item["title"] for item in data["items"]] == ["First bulk", "Second bulk"]
+        assert data["items"][0]["due_date"] == "2030-01-01"
+        assert [item["id"] for item in data["items"]] == data["ids"]
+    
+    def test_bulk_create_is_searchable(self, client, auth_headers):
+        """Test bulk-inserted todos are indexed for search"""
+        client.post("/api/v1/todos/bulk", json={"items": [{"title": "Offline sync note"}]}, headers=auth_headers)
+        response = client.get("/api/v1/todos?q=offline", headers=auth_headers)
+        assert response.json()["total"] == 1
+    
+    def test_bulk_create_validation_is_atomic(self, client, auth_headers):
+        """Test one invalid item rejects the whole batch"""
+        items = [{"title": "Valid todo"}, {"title": "x"}]
+        response = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers)
+        assert response.status_code == 422
+        assert client.get("/api/v1/todos", headers=auth_headers).json()["total"] == 0
+    
+    def test_bulk_create_unknown_tag(self, client, auth_headers):
+        """Test tag ids not owned by the user are rejected"""
+        items = [{"title": "Valid todo", "tag_ids": [9999]}]
+        response = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers)
+        assert response.status_code == 400
+        assert "9999" in response.json()["detail"]
+        assert client.get("/api/v1/todos", headers=auth_headers).json()["total"] == 0
+    
+    def test_bulk_create_limits(self, client, auth_headers):
+        """Test empty and oversized batches are rejected"""
+        from app.core.config import settings
+        
+        response = client.post("/api/v1/todos/bulk", json={"items": []}, headers=auth_headers)
+        assert response.status_code == 422
+        items = [{"title": "Too many"}] * (settings.TODO_BULK_MAX_ITEMS + 1)
+        response = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers)
+        assert response.status_code == 422
+
+
+class TestBulkActions:
+    """Tests for set-based bulk update/complete/delete/restore"""
+    
+    @pytest.fixture
+    def todo_ids(self, client, auth_headers):
+        items = [
+            {"title": "Viết báo cáo", "due_date": "2030-01-05"},
+            {"title": "Gửi báo cáo", "due_date": "2030-01-20"},
+            {"title": "Đi chợ", "due_date": "2030-02-01"},
+            {"title": "Tập thể dục"},
+        ]
+        response = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers)
+        return response.json()["ids"]
+    
+    def list_titles(self, client, auth_headers, query=""):
+        response = client.get(f"/api/v1/todos?limit=100{query}", headers=auth_headers)
+        return sorted(item["title"] for item in response.json()["items"])
+    
+    def test_complete_by_ids(self, client, auth_headers, todo_ids):
+        """Test bulk complete by ids reports only rows that changed"""
+        body = {"ids": todo_ids[:2]}
+        response = client.post("/api/v1/todos/bulk/complete", json=body, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == {"affected": 2}
+        assert self.list_titles(client, auth_headers, "&is_done=true") == ["Gửi báo cáo", "Viết báo cáo"]
+        
+        response = client.post("/api/v1/todos/bulk/complete", json=body, headers=auth_headers)
+        assert response.json() == {"affected": 0}
+    
+    def test_complete_by_search_filter(self, client, auth_headers, todo_ids):
+        """Test bulk complete selected by full-text search"""
+        body = {"filter": {"q": "báo cáo"}}
+        response = client.post("/api/v1/todos/bulk/complete", json=body, headers=auth_headers)
+        assert response.json() == {"affected": 2}
+    
+    def test_delete_by_due_date_range_and_restore(self, client, auth_headers, todo_ids):
+        """Test bulk soft delete by due-date range then restore"""
+        body = {"filter": {"due_from": "2030-01-01", "due_to": "2030-01-31"}}
+        response = client.post("/api/v1/todos/bulk/delete", json=body, headers=auth_headers)
+        assert response.json() == {"affected": 2}
+        assert self.list_titles(client, auth_headers) == ["Tập thể dục", "Đi chợ"]
+        assert len(client.get("/api/v1/todos/trash", headers=auth_headers).json()) == 2
+        
+        response = client.post("/api/v1/todos/bulk/restore", json={"filter": {}}, headers=auth_headers)
+        assert response.json() == {"affected": 2}
+        assert len(self.list_titles(client, auth_headers)) == 4
+    
+    def test_update_changes(self, client, auth_headers, todo_ids):
+        """Test bulk PATCH sets and clears fields"""
+        body = {"ids": todo_ids, "changes": {"due_date": None}}
+        response = client.patch("/api/v1/todos/bulk", json=body, headers=auth_headers)
+        assert response.json() == {"affected": 3}
+        
+        body = {"filter": {"is_done": False}, "changes": {"is_done": True, "due_date": "2031-01-01"}}
+        response = client.patch("/api/v1/todos/bulk", json=body, headers=auth_headers)
+        assert response.json() == {"affected": 4}
+        todo = client.get(f"/api/v1/todos/{todo_ids[0]}", headers=auth_headers).json()
+        assert todo["is_done"] is True
+        assert todo["due_date"] == "2031-01-01"
+    
+    def test_only_own_todos(self, client, auth_headers, todo_ids, db_session):
+        """Test bulk actions never touch another user's todos"""
+        from app.models import User, ToDo
+        
+        other = User(email="other@example.com", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        db_session.add(ToDo(title="Other todo", owner_id=other.id))
+        db_session.commit()
+        
+        response = client.post("/api/v1/todos/bulk/complete", json={"filter": {}}, headers=auth_headers)
+        assert response.json() == {"affected": 4}
+        db_session.expire_all()
+        assert db_session.query(ToDo).filter(ToDo.owner_id == other.id).one().is_done is False
+    
+    @pytest.mark.parametrize("body", [
+        {},
+        {"ids": [1], "filter": {}},
+        {"ids": []},
+    ])
+    def test_invalid_selection(self, client, auth_headers, body):
+        """Test exactly one non-empty selection is required"""
+        response = client.post("/api/v1/todos/bulk/complete", json=body, headers=auth_headers)
+        assert response.status_code == 422
+    
+    def test_update_requires_changes(self, client, auth_headers):
+        """Test bulk PATCH without changes is rejected"""
+        response = client.patch("/api/v1/todos/bulk", json={"ids": [1], "changes": {}}, headers=auth_headers)
+        assert response.status_code == 422
+    
+    def test_update_rejects_null_is_done(self, client, auth_headers, todo_ids):
+        """Test is_done cannot be set to null while due_date null clears the deadline"""
+        body = {"ids": todo_ids[:1], "changes": {"is_done": None}}
+        response = client.patch("/api/v1/todos/bulk", json=body, headers=auth_headers)
+        assert response.status_code == 422
+        
+        body = {"ids": todo_ids[:1], "changes": {"due_date": None}}
+        response = client.patch("/api/v1/todos/bulk", json=body, headers=auth_headers)
+        assert response.json() == {"affected": 1}
+        assert client.get(f"/api/v1/todos/{todo_ids[0]}", headers=auth_headers).json()["due_date"] is None
+
+
 class TestGetTodos:
     """Tests for GET /api/v1/todos"""
     
@@ -141,6 +303,243 @@ class TestGetTodos:
         assert data["total"] == 5
 
 
+class TestFullTextSearch:
+    """Tests for full-text search with q on GET /api/v1/todos"""
+    
+    def _titles(self, client, auth_headers, **params):
+        data = client.get("/api/v1/todos", headers=auth_headers, params=params).json()
+        return [item["title"] for item in data["items"]]
+    
+    def test_search_title_and_description(self, client, auth_headers):
+        """Test q matches words in the description as well as the title"""
+        client.post("/api/v1/todos", headers=auth_headers, json={"title": "Buy milk"})
+        client.post(
+            "/api/v1/todos",
+            headers=auth_headers,
+            json={"title": "Shopping", "description": "milk and bread"}
+        )
+        assert sorted(self._titles(client, auth_headers, q="milk")) == ["Buy milk", "Shopping"]
+    
+    def test_search_prefix_and_diacritics(self, client, auth_headers):
+        """Test prefix matching and accent-insensitive matching"""
+        client.post("/api/v1/todos", headers=auth_headers, json={"title": "Hoàn thành báo cáo"})
+        assert self._titles(client, auth_headers, q="báo") == ["Hoàn thành báo cáo"]
+        assert self._titles(client, auth_headers, q="bao cao") == ["Hoàn thành báo cáo"]
+        assert self._titles(client, auth_headers, q="hoan th") == ["Hoàn thành báo cáo"]
+    
+    def test_search_follows_updates_and_deletes(self, client, auth_headers):
+        """Test the search index is kept in sync with writes"""
+        todo_id = client.post("/api/v1/todos", headers=auth_headers, json={"title": "Old title"}).json()["id"]
+        client.patch(f"/api/v1/todos/{todo_id}", headers=auth_headers, json={"title": "New title"})
+        assert self._titles(client, auth_headers, q="old") == []
+        assert self._titles(client, auth_headers, q="new") == ["New title"]
+        
+        client.delete(f"/api/v1/todos/{todo_id}/permanent", headers=auth_headers)
+        assert self._titles(client, auth_headers, q="new") == []
+    
+    def test_search_sort_by_rank(self, client, auth_headers):
+        """Test sort=rank orders by relevance"""
+        client.post(
+            "/api/v1/todos",
+            headers=auth_headers,
+            json={"title": "Weekly report", "description": "send it"}
+        )
+        client.post(
+            "/api/v1/todos",
+            headers=auth_headers,
+            json={"title": "Report report report", "description": "report"}
+        )
+        titles = self._titles(client, auth_headers, q="report", sort="rank")
+        assert titles == ["Report report report", "Weekly report"]
+        
+        page = client.get("/api/v1/todos", params={"q": "report", "sort": "rank", "limit": 1}, headers=auth_headers)
+        assert page.json()["has_more"] is True
+        assert page.json()["next_cursor"] is None
+    
+    def test_rank_without_query_pages_by_cursor(self, client, auth_headers):
+        """Test sort=rank without a usable q falls back to the default sort and still returns cursors"""
+        for title in ("First --", "Second --", "Third --"):
+            client.post("/api/v1/todos", headers=auth_headers, json={"title": title})
+        
+        # No q, punctuation-only q (ILIKE, unranked), include_archived
+        for extra in ({}, {"q": "--"}, {"include_archived": True}):
+            titles, cursor = [], None
+            while True:
+                params = {"sort": "rank", "limit": 1, **extra, **({"cursor": cursor} if cursor else {})}
+                data = client.get("/api/v1/todos", params=params, headers=auth_headers).json()
+                titles += [todo["title"] for todo in data["items"]]
+                if not data["has_more"]:
+                    break
+                cursor = data["next_cursor"]
+                assert cursor is not None
+            assert titles == ["Third --", "Second --", "First --"], extra
+
+
+class TestListTotal:
+    """Tests for total/has_more on GET /api/v1/todos"""
+    
+    def _create_todos(self, client, auth_headers, count):
+        for i in range(count):
+            client.post("/api/v1/todos", headers=auth_headers, json={"title": f"Todo {i + 1}"})
+    
+    def test_without_total(self, client, auth_headers):
+        """Test with_total=false skips the count and reports has_more"""
+        self._create_todos(client, auth_headers, 3)
+        data = client.get("/api/v1/todos?limit=2&with_total=false", headers=auth_headers).json()
+        assert data["total"] is None
+        assert data["has_more"] is True
+        assert len(data["items"]) == 2
+        
+        data = client.get("/api/v1/todos?limit=2&offset=2&with_total=false", headers=auth_headers).json()
+        assert data["has_more"] is False
+        assert len(data["items"]) == 1
+    
+    def test_total_with_offset_past_end(self, client, auth_headers):
+        """Test total is still reported when the page is empty"""
+        self._create_todos(client, auth_headers, 2)
+        data = client.get("/api/v1/todos?offset=10", headers=auth_headers).json()
+        assert data["items"] == []
+        assert data["total"] == 2
+        assert data["has_more"] is False
+    
+    def test_total_with_cursor(self, client, auth_headers):
+        """Test total counts all matching todos on cursor pages"""
+        self._create_todos(client, auth_headers, 3)
+        cursor = client.get("/api/v1/todos?limit=1", headers=auth_headers).json()["next_cursor"]
+        data = client.get(f"/api/v1/todos?limit=1&cursor={cursor}", headers=auth_headers).json()
+        assert data["total"] == 3
+        assert data["has_more"] is True
+
+
+class TestCursorPagination:
+    """Tests for keyset pagination on GET /api/v1/todos"""
+    
+    def _create_todos(self, client, auth_headers, count=7):
+        today = date.today()
+        for i in range(count):
+            payload = {"title": f"Todo {i % 3}"}
+            if i % 2 == 0:
+                payload["due_date"] = (today + timedelta(days=i % 3)).isoformat()
+            client.post("/api/v1/todos", headers=auth_headers, json=payload)
+    
+    def _walk(self, client, auth_headers, sort):
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 3, "sort": sort}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/api/v1/todos", headers=auth_headers, params=params).json()
+            ids.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids
+    
+    @pytest.mark.parametrize("sort", [
+        "created_at", "-created_at", "updated_at", "-updated_at",
+        "due_date", "-due_date", "title", "-title"
+    ])
+    def test_cursor_walks_every_todo_once(self, client, auth_headers, sort):
+        """Test following next_cursor returns each todo once in sort order"""
+        self._create_todos(client, auth_headers)
+        expected = [
+            item["id"] for item in client.get(
+                "/api/v1/todos", headers=auth_headers, params={"limit": 100, "sort": sort}
+            ).json()["items"]
+        ]
+        assert len(expected) == 7
+        assert self._walk(client, auth_headers, sort) == expected
+    
+    def test_invalid_cursor(self, client, auth_headers):
+        """Test malformed cursor returns 400"""
+        response = client.get("/api/v1/todos?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_cursor_sort_mismatch(self, client, auth_headers):
+        """Test cursor from another sort order returns 400"""
+        self._create_todos(client, auth_headers, count=3)
+        cursor = client.get("/api/v1/todos?limit=1", headers=auth_headers).json()["next_cursor"]
+        response = client.get(
+            "/api/v1/todos", headers=auth_headers, params={"cursor": cursor, "sort": "title"}
+        )
+        assert response.status_code == 400
+
+
+class TestTagLoading:
+    """Tests for configurable ToDo.tags loading strategy"""
+    
+    @pytest.mark.parametrize("strategy", ["selectin", "joined"])
+    def test_list_includes_tags(self, client, auth_headers, test_tag, monkeypatch, strategy):
+        """Test list pages carry tags with either loading strategy"""
+        from app.core.config import settings
+        
+        monkeypatch.setattr(settings, "TODO_TAGS_LOADING", strategy)
+        for i in range(3):
+            client.post(
+                "/api/v1/todos",
+                headers=auth_headers,
+                json={"title": f"Tagged {i}", "tag_ids": [test_tag.id]}
+            )
+        data = client.get("/api/v1/todos?limit=2", headers=auth_headers).json()
+        assert len(data["items"]) == 2
+        assert data["total"] == 3
+        assert all(item["tags"][0]["name"] == "Test Tag" for item in data["items"])
+
+
+class TestResponseSerialization:
+    """Tests for the single-validation JSON response path"""
+    
+    def test_list_routes_return_json(self, client, auth_headers, test_tag):
+        """Test list routes encode the validated page directly as JSON"""
+        today = date.today().isoformat()
+        client.post(
+            "/api/v1/todos",
+            headers=auth_headers,
+            json={"title": "Serialized", "due_date": today, "tag_ids": [test_tag.id]}
+        )
+        for path in ("/api/v1/todos", "/api/v1/todos/today", "/api/v1/todos/dashboard"):
+            response = client.get(path, headers=auth_headers)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+        item = client.get("/api/v1/todos", headers=auth_headers).json()["items"][0]
+        assert item["due_date"] == today
+        assert item["archived_at"] is None
+        assert item["tags"] == [{"id": test_tag.id, "name": "Test Tag", "color": "#FF5733"}]
+    
+    def test_single_item_routes_return_json(self, client, auth_headers, test_tag):
+        """Test single-todo routes encode ToDoResponse directly with the route status code"""
+        created = client.post(
+            "/api/v1/todos", headers=auth_headers, json={"title": "Single", "tag_ids": [test_tag.id]}
+        )
+        assert created.status_code == 201
+        assert created.headers["content-type"] == "application/json"
+        todo_id = created.json()["id"]
+        
+        responses = [
+            client.get(f"/api/v1/todos/{todo_id}", headers=auth_headers),
+            client.put(f"/api/v1/todos/{todo_id}", headers=auth_headers, json={"title": "Renamed"}),
+            client.patch(f"/api/v1/todos/{todo_id}", headers=auth_headers, json={"description": "Patched"}),
+            client.post(f"/api/v1/todos/{todo_id}/complete", headers=auth_headers),
+        ]
+        client.delete(f"/api/v1/todos/{todo_id}", headers=auth_headers)
+        responses.append(client.post(f"/api/v1/todos/{todo_id}/restore", headers=auth_headers))
+        assert [response.status_code for response in responses] == [200] * 5
+        assert all(response.headers["content-type"] == "application/json" for response in responses)
+        restored = responses[-1].json()
+        assert (restored["title"], restored["description"], restored["is_done"]) == ("Renamed", "Patched", True)
+        assert restored["tags"] == [{"id": test_tag.id, "name": "Test Tag", "color": "#FF5733"}]
+    
+    def test_matches_model_validate(self, db_session, test_todo, test_tag):
+        """Test ORM -> ToDoResponse matches from_attributes validation, including expired attributes"""
+        from app.schemas.todo import ToDoResponse
+        from app.services.todo_service import to_todo_responses
+        
+        test_todo.tags = [test_tag]
+        test_todo.due_date = date.today()
+        db_session.commit()
+        db_session.expire(test_todo, ["description", "tags"])
+        assert to_todo_responses([test_todo]) == [ToDoResponse.model_validate(test_todo)]
+
+
 class TestGetTodoById:
     """Tests for GET /api/v1/todos/{id}"""
     
@@ -162,6 +561,88 @@ class TestGetTodoById:
         assert response.status_code == 404
 
 
+class TestWriteRoundTrips:
+    """Tests for the RETURNING-based write path"""
+    
+    @pytest.fixture
+    def statements(self, client, auth_headers):
+        """Record SQL statements issued by the app after auth is warmed up"""
+        from sqlalchemy import event
+        from tests.conftest import async_engine
+        
+        client.get("/api/v1/todos", headers=auth_headers)
+        recorded = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            recorded.append(statement.split()[0].upper())
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        yield recorded
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    
+    def test_create_is_single_insert(self, client, auth_headers, statements):
+        """Test create without tags issues only INSERT ... RETURNING"""
+        response = client.post("/api/v1/todos", json={"title": "One round trip"}, headers=auth_headers)
+        assert response.status_code == 201
+        assert response.json()["tags"] == []
+        assert statements == ["INSERT"]
+    
+    def test_complete_skips_select_and_refresh(self, client, auth_headers, test_todo, statements):
+        """Test complete is one UPDATE ... RETURNING that also returns the tag ids"""
+        response = client.post(f"/api/v1/todos/{test_todo.id}/complete", headers=auth_headers)
+        assert response.json()["is_done"] is True
+        assert statements == ["UPDATE"]
+    
+    def test_patch_with_tags_replaces_links(self, client, auth_headers, test_todo, test_tag, statements):
+        """Test tag links are rewritten only when tag_ids is given"""
+        response = client.patch(
+            f"/api/v1/todos/{test_todo.id}",
+            json={"title": "Tagged title", "tag_ids": [test_tag.id]},
+            headers=auth_headers
+        )
+        assert response.json()["tags"][0]["id"] == test_tag.id
+        assert statements == ["UPDATE", "DELETE", "INSERT", "SELECT"]
+        
+        statements.clear()
+        response = client.patch(f"/api/v1/todos/{test_todo.id}", json={"title": "Keep tags"}, headers=auth_headers)
+        assert response.json()["tags"][0]["id"] == test_tag.id
+        # Tag id trả về cùng câu UPDATE, dữ liệu tag lấy từ tag cache
+        assert statements == ["UPDATE"]
+    
+    def test_restore_returns_tags_in_one_statement(self, client, auth_headers, test_tag, statements):
+        """Test restore reads the tag ids in the same UPDATE ... RETURNING"""
+        todo = client.post(
+            "/api/v1/todos", json={"title": "Restore me", "tag_ids": [test_tag.id]}, headers=auth_headers
+        ).json()
+        client.delete(f"/api/v1/todos/{todo['id']}", headers=auth_headers)
+        statements.clear()
+        response = client.post(f"/api/v1/todos/{todo['id']}/restore", headers=auth_headers)
+        assert [tag["id"] for tag in response.json()["tags"]] == [test_tag.id]
+        assert statements == ["UPDATE"]
+    
+    def test_foreign_tags_are_ignored(self, client, auth_headers, db_session):
+        """Test tag ids owned by another user are not linked"""
+        from app.models import User, Tag
+        
+        other = User(email="other@example.com", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        tag = Tag(name="Foreign", owner_id=other.id)
+        db_session.add(tag)
+        db_session.commit()
+        
+        response = client.post("/api/v1/todos", json={"title": "Mine", "tag_ids": [tag.id]}, headers=auth_headers)
+        assert response.json()["tags"] == []
+    
+    def test_writes_on_deleted_todo_return_404(self, client, auth_headers, test_todo):
+        """Test UPDATE row count detects deleted todos"""
+        client.delete(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+        assert client.post(f"/api/v1/todos/{test_todo.id}/complete", headers=auth_headers).status_code == 404
+        assert client.delete(f"/api/v1/todos/{test_todo.id}", headers=auth_headers).status_code == 404
+        assert client.post(f"/api/v1/todos/{test_todo.id}/restore", headers=auth_headers).status_code == 200
+        assert client.post(f"/api/v1/todos/{test_todo.id}/restore", headers=auth_headers).status_code == 400
+
+
 class TestUpdateTodo:
     """Tests for PUT /api/v1/todos/{id}"""
     
@@ -340,3 +821,579 @@ class TestSoftDelete:
         response = client.get("/api/v1/todos/trash", headers=auth_headers)
         assert response.status_code == 200
         assert response.json() == []
+
+
+class TestTrashPurge:
+    """Tests for emptying the trash and the background purger"""
+    
+    @pytest.fixture
+    def trashed(self, client, auth_headers, test_tag):
+        """Two trashed todos (one tagged) and one live todo"""
+        items = [
+            {"title": "Trashed tagged", "tag_ids": [test_tag.id]},
+            {"title": "Trashed plain"},
+            {"title": "Still here"},
+        ]
+        ids = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers).json()["ids"]
+        client.post("/api/v1/todos/bulk/delete", json={"ids": ids[:2]}, headers=auth_headers)
+        return ids
+    
+    @staticmethod
+    def link_count(db_session):
+        from sqlalchemy import func, select
+        from app.models.todo import todo_tags
+        return db_session.execute(select(func.count()).select_from(todo_tags)).scalar()
+    
+    def test_empty_trash(self, client, auth_headers, trashed, db_session):
+        """Test DELETE /todos/trash removes only trashed todos and their tag links"""
+        response = client.delete("/api/v1/todos/trash", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == {"affected": 2}
+        assert client.get("/api/v1/todos/trash", headers=auth_headers).json() == []
+        assert client.get("/api/v1/todos", headers=auth_headers).json()["total"] == 1
+        assert self.link_count(db_session) == 0
+    
+    def test_purge_expired_in_batches(self, client, auth_headers, trashed, db_session):
+        """Test the purger deletes only trash older than the retention period"""
+        import asyncio
+        from datetime import timedelta
+        from sqlalchemy import update
+        from app.models import ToDo
+        from app.models.todo import utcnow
+        from app.services.trash_purger import purge_expired_trash
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        db_session.execute(
+            update(ToDo).where(ToDo.id.in_(trashed[:2])).values(deleted_at=utcnow() - timedelta(days=40))
+        )
+        db_session.commit()
+        
+        purge = purge_expired_trash(TestingAsyncSessionLocal, retention_days=30, batch_size=1)
+        assert asyncio.run(purge) == 2
+        assert client.get("/api/v1/todos/trash", headers=auth_headers).json() == []
+        assert self.link_count(db_session) == 0
+    
+    def test_purge_disabled_by_default(self, client, auth_headers, trashed, db_session):
+        """Test the default retention keeps trash forever, however old"""
+        import asyncio
+        from datetime import timedelta
+        from sqlalchemy import update
+        from app.core.config import settings
+        from app.models import ToDo
+        from app.models.todo import utcnow
+        from app.services.trash_purger import purge_expired_trash
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        db_session.execute(update(ToDo).where(ToDo.id.in_(trashed[:2])).values(deleted_at=utcnow() - timedelta(days=400)))
+        db_session.commit()
+        
+        assert settings.TRASH_RETENTION_DAYS == 0
+        assert asyncio.run(purge_expired_trash(TestingAsyncSessionLocal)) == 0
+        assert len(client.get("/api/v1/todos/trash", headers=auth_headers).json()) == 2
+    
+    def test_purge_keeps_recent_trash(self, client, auth_headers, trashed):
+        """Test trash newer than the retention period is kept"""
+        import asyncio
+        from app.services.trash_purger import purge_expired_trash
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        assert asyncio.run(purge_expired_trash(TestingAsyncSessionLocal, retention_days=30)) == 0
+        assert len(client.get("/api/v1/todos/trash", headers=auth_headers).json()) == 2
+
+
+class TestArchive:
+    """Tests for the archive tier of long-completed todos"""
+    
+    @pytest.fixture
+    def archived(self, client, auth_headers, test_tag, db_session):
+        """Two old completed todos (one tagged) archived, one recent completed and one open todo kept"""
+        import asyncio
+        from datetime import timedelta
+        from sqlalchemy import update
+        from app.models import ToDo
+        from app.models.todo import utcnow
+        from app.services.todo_archiver import archive_completed_todos
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        items = [
+            {"title": "Old tagged", "tag_ids": [test_tag.id]},
+            {"title": "Old plain"},
+            {"title": "Done recently"},
+            {"title": "Open"},
+        ]
+        ids = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers).json()["ids"]
+        client.post("/api/v1/todos/bulk/complete", json={"ids": ids[:3]}, headers=auth_headers)
+        db_session.execute(
+            update(ToDo).where(ToDo.id.in_(ids[:2])).values(updated_at=utcnow() - timedelta(days=40))
+        )
+        db_session.commit()
+        
+        archive = archive_completed_todos(TestingAsyncSessionLocal, done_after_days=30, batch_size=1)
+        assert asyncio.run(archive) == 2
+        return ids
+    
+    def test_archived_hidden_from_default_list(self, client, auth_headers, archived):
+        """Test archived todos leave the main table and the default list"""
+        data = client.get("/api/v1/todos", headers=auth_headers).json()
+        assert {item["id"] for item in data["items"]} == set(archived[2:])
+        assert data["total"] == 2
+        assert client.get(f"/api/v1/todos/{archived[0]}", headers=auth_headers).status_code == 404
+    
+    def test_include_archived(self, client, auth_headers, archived, test_tag):
+        """Test include_archived lists archived todos with archived_at and their tags"""
+        response = client.get(
+            "/api/v1/todos", params={"include_archived": True, "sort": "title"}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 4
+        by_id = {item["id"]: item for item in data["items"]}
+        assert by_id[archived[0]]["archived_at"] is not None
+        assert [tag["id"] for tag in by_id[archived[0]]["tags"]] == [test_tag.id]
+        assert by_id[archived[3]]["archived_at"] is None
+        assert [item["title"] for item in data["items"]] == ["Done recently", "Old plain", "Old tagged", "Open"]
+    
+    def test_include_archived_search_and_cursor(self, client, auth_headers, archived):
+        """Test search and keyset pagination over the union of todos and archive"""
+        params = {"include_archived": True, "q": "old"}
+        data = client.get("/api/v1/todos", params=params, headers=auth_headers).json()
+        assert {item["id"] for item in data["items"]} == set(archived[:2])
+        
+        seen = []
+        params = {"include_archived": True, "sort": "title", "limit": 3}
+        page = client.get("/api/v1/todos", params=params, headers=auth_headers).json()
+        seen += [item["id"] for item in page["items"]]
+        page = client.get(
+            "/api/v1/todos", params={**params, "cursor": page["next_cursor"]}, headers=auth_headers
+        ).json()
+        seen += [item["id"] for item in page["items"]]
+        assert sorted(seen) == sorted(archived)
+        assert page["has_more"] is False
+    
+    def test_unarchive(self, client, auth_headers, archived, test_tag):
+        """Test unarchiving restores the todo with its id and tags"""
+        response = client.post(f"/api/v1/todos/{archived[0]}/unarchive", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == archived[0]
+        assert data["is_done"] is True
+        assert [tag["id"] for tag in data["tags"]] == [test_tag.id]
+        
+        fetched = client.get(f"/api/v1/todos/{archived[0]}", headers=auth_headers).json()
+        assert [tag["id"] for tag in fetched["tags"]] == [test_tag.id]
+        params = {"include_archived": True}
+        assert client.get("/api/v1/todos", params=params, headers=auth_headers).json()["total"] == 4
+    
+    def test_unarchive_not_found(self, client, auth_headers, archived):
+        """Test unarchiving a live or unknown todo returns 404"""
+        assert client.post(f"/api/v1/todos/{archived[3]}/unarchive", headers=auth_headers).status_code == 404
+        assert client.post("/api/v1/todos/99999/unarchive", headers=auth_headers).status_code == 404
+    
+    def test_archive_ids_not_reused(self, client, auth_headers, archived):
+        """Test new todos never take the id of an archived todo"""
+        created = client.post("/api/v1/todos", json={"title": "New"}, headers=auth_headers).json()
+        assert created["id"] > max(archived)
+
+
+class TestTodoStats:
+    """Tests for GET /todos/stats and the trigger-maintained counters"""
+    
+    def stats(self, client, auth_headers):
+        response = client.get("/api/v1/todos/stats", headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+    
+    def test_stats_empty(self, client, auth_headers, test_tag):
+        """Test stats for a user without todos"""
+        assert self.stats(client, auth_headers) == {
+            "open": 0, "done": 0, "overdue": 0, "due_today": 0, "trash": 0,
+            "tags": [{"id": test_tag.id, "name": test_tag.name, "color": test_tag.color, "count": 0}],
+        }
+    
+    def test_stats_follow_writes(self, client, auth_headers, test_tag):
+        """Test counters stay correct across create, bulk, complete, delete, restore and purge"""
+        from datetime import date, timedelta
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        items = [
+            {"title": "Overdue", "due_date": yesterday, "tag_ids": [test_tag.id]},
+            {"title": "Today", "due_date": date.today().isoformat(), "tag_ids": [test_tag.id]},
+            {"title": "Plain"},
+        ]
+        ids = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers).json()["ids"]
+        single = client.post("/api/v1/todos", json={"title": "Single"}, headers=auth_headers).json()["id"]
+        
+        client.post(f"/api/v1/todos/{ids[1]}/complete", headers=auth_headers)
+        client.delete(f"/api/v1/todos/{ids[2]}", headers=auth_headers)
+        client.post("/api/v1/todos/bulk/delete", json={"ids": [single]}, headers=auth_headers)
+        client.post(f"/api/v1/todos/{single}/restore", headers=auth_headers)
+        client.delete(f"/api/v1/todos/{ids[2]}/permanent", headers=auth_headers)
+        
+        stats = self.stats(client, auth_headers)
+        assert {key: stats[key] for key in ("open", "done", "overdue", "due_today", "trash")} == {
+            "open": 2, "done": 1, "overdue": 1, "due_today": 1, "trash": 0,
+        }
+        assert stats["tags"][0]["count"] == 2
+        
+        client.delete(f"/api/v1/todos/{ids[0]}", headers=auth_headers)
+        stats = self.stats(client, auth_headers)
+        assert (stats["open"], stats["overdue"], stats["trash"], stats["tags"][0]["count"]) == (1, 0, 1, 1)
+    
+    def test_list_total_from_counters(self, client, auth_headers):
+        """Test unfiltered list totals come from the counters and match the rows"""
+        ids = client.post(
+            "/api/v1/todos/bulk", json={"items": [{"title": f"Todo {i}"} for i in range(5)]}, headers=auth_headers
+        ).json()["ids"]
+        client.post("/api/v1/todos/bulk/complete", json={"ids": ids[:2]}, headers=auth_headers)
+        client.delete(f"/api/v1/todos/{ids[4]}", headers=auth_headers)
+        
+        totals = {
+            is_done: client.get("/api/v1/todos", params=params, headers=auth_headers).json()["total"]
+            for is_done, params in ((None, {"limit": 1}), (True, {"is_done": True}), (False, {"is_done": False}))
+        }
+        assert totals == {None: 4, True: 2, False: 2}
+    
+    def test_stats_isolated_per_user(self, client, auth_headers, db_session):
+        """Test another user's todos are not counted"""
+        from app.core.security import get_password_hash
+        from app.models import ToDo, User
+        other = User(email="other@example.com", hashed_password=get_password_hash("password123"))
+        db_session.add(other)
+        db_session.commit()
+        db_session.add(ToDo(title="Not mine", owner_id=other.id))
+        db_session.commit()
+        assert self.stats(client, auth_headers)["open"] == 0
+    
+    def test_stats_single_statement(self, client, auth_headers, test_tag):
+        """Test counters and per-tag counts come from one statement"""
+        from sqlalchemy import event
+        from tests.conftest import async_engine
+        
+        client.post("/api/v1/todos", json={"title": "Tagged", "tag_ids": [test_tag.id]}, headers=auth_headers)
+        self.stats(client, auth_headers)
+        recorded = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            recorded.append(statement.split()[0].upper())
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            stats = self.stats(client, auth_headers)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        assert recorded == ["SELECT"]
+        assert (stats["open"], stats["tags"][0]["count"]) == (1, 1)
+
+
+class TestDashboard:
+    """Tests for GET /todos/dashboard"""
+    
+    @pytest.fixture
+    def todos(self, client, auth_headers, test_tag):
+        """Overdue, today (one done) and undated todos"""
+        from datetime import date, timedelta
+        today = date.today()
+        items = [
+            {"title": "Overdue old", "due_date": (today - timedelta(days=3)).isoformat()},
+            {"title": "Overdue new", "due_date": (today - timedelta(days=1)).isoformat(), "tag_ids": [test_tag.id]},
+            {"title": "Today open", "due_date": today.isoformat(), "tag_ids": [test_tag.id]},
+            {"title": "Today done", "due_date": today.isoformat()},
+            {"title": "Someday"},
+        ]
+        ids = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers).json()["ids"]
+        client.post(f"/api/v1/todos/{ids[3]}/complete", headers=auth_headers)
+        return ids
+    
+    def test_dashboard_matches_endpoints(self, client, auth_headers, todos):
+        """Test sections match /today, /overdue and the open list"""
+        response = client.get("/api/v1/todos/dashboard", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["today"] == client.get("/api/v1/todos/today", headers=auth_headers).json()
+        assert data["overdue"] == client.get("/api/v1/todos/overdue", headers=auth_headers).json()
+        assert data["overdue_total"] == 2
+        open_list = client.get("/api/v1/todos", params={"is_done": False}, headers=auth_headers).json()
+        assert data["open"] == open_list
+        assert [tag["name"] for tag in data["overdue"][1]["tags"]] == ["Test Tag"]
+    
+    def test_dashboard_limits(self, client, auth_headers, todos):
+        """Test overdue is capped and the open page continues with the list cursor"""
+        params = {"overdue_limit": 1, "limit": 2}
+        data = client.get("/api/v1/todos/dashboard", params=params, headers=auth_headers).json()
+        assert [todo["id"] for todo in data["overdue"]] == [todos[0]]
+        assert data["overdue_total"] == 2
+        assert len(data["open"]["items"]) == 2
+        assert data["open"]["total"] == 4
+        assert data["open"]["has_more"] is True
+        
+        rest = client.get(
+            "/api/v1/todos", params={"is_done": False, "cursor": data["open"]["next_cursor"]}, headers=auth_headers
+        ).json()
+        seen = [todo["id"] for todo in data["open"]["items"] + rest["items"]]
+        assert sorted(seen) == sorted([todos[0], todos[1], todos[2], todos[4]])
+    
+    def test_dashboard_single_select(self, client, auth_headers, todos):
+        """Test all sections are fetched by one SELECT plus one tags query"""
+        from sqlalchemy import event
+        from tests.conftest import async_engine
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "todo" in statement:
+                statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            assert client.get("/api/v1/todos/dashboard", headers=auth_headers).status_code == 200
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        assert len(statements) == 2
+
+
+class TestTagFilter:
+    """Tests for tag_ids/tag_mode on GET /todos"""
+    
+    @pytest.fixture
+    def tagged(self, client, auth_headers, test_tag):
+        """Todos tagged with A only, B only, A and B, and untagged"""
+        other = client.post("/api/v1/tags", json={"name": "Other"}, headers=auth_headers).json()["id"]
+        items = [
+            {"title": "Only A", "tag_ids": [test_tag.id]},
+            {"title": "Only B", "tag_ids": [other]},
+            {"title": "Both", "tag_ids": [test_tag.id, other]},
+            {"title": "None"},
+        ]
+        ids = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers).json()["ids"]
+        return ids, test_tag.id, other
+    
+    def titles(self, client, auth_headers, **params):
+        response = client.get("/api/v1/todos", params={"sort": "title", **params}, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == len(data["items"])
+        return [item["title"] for item in data["items"]]
+    
+    def test_tag_mode_any(self, client, auth_headers, tagged):
+        """Test any matches todos with at least one of the tags"""
+        _, a, b = tagged
+        assert self.titles(client, auth_headers, tag_ids=f"{a}") == ["Both", "Only A"]
+        assert self.titles(client, auth_headers, tag_ids=f"{a},{b}") == ["Both", "Only A", "Only B"]
+    
+    def test_tag_mode_all(self, client, auth_headers, tagged):
+        """Test all matches todos carrying every tag (duplicates ignored)"""
+        _, a, b = tagged
+        assert self.titles(client, auth_headers, tag_ids=f"{a},{b},{a}", tag_mode="all") == ["Both"]
+    
+    def test_tag_filter_combines(self, client, auth_headers, tagged):
+        """Test the tag filter combines with is_done, search and cursor pagination"""
+        ids, a, b = tagged
+        client.post(f"/api/v1/todos/{ids[2]}/complete", headers=auth_headers)
+        assert self.titles(client, auth_headers, tag_ids=f"{a},{b}", is_done=False) == ["Only A", "Only B"]
+        assert self.titles(client, auth_headers, tag_ids=f"{a}", q="both") == ["Both"]
+        
+        page = client.get(
+            "/api/v1/todos", params={"tag_ids": f"{a},{b}", "limit": 2}, headers=auth_headers
+        ).json()
+        rest = client.get(
+            "/api/v1/todos", params={"tag_ids": f"{a},{b}", "limit": 2, "cursor": page["next_cursor"]},
+            headers=auth_headers
+        ).json()
+        assert len(page["items"]) + len(rest["items"]) == 3
+        assert rest["has_more"] is False
+    
+    def test_tag_filter_invalid(self, client, auth_headers, tagged):
+        """Test malformed tag_ids, unknown modes and include_archived are rejected"""
+        assert client.get("/api/v1/todos", params={"tag_ids": "1,x"}, headers=auth_headers).status_code == 422
+        assert client.get("/api/v1/todos", params={"tag_mode": "some"}, headers=auth_headers).status_code == 422
+        params = {"tag_ids": "1", "include_archived": True}
+        assert client.get("/api/v1/todos", params=params, headers=auth_headers).status_code == 400
+
+
+class TestExport:
+    """Tests for GET /todos/export"""
+    
+    @pytest.fixture
+    def exported(self, client, auth_headers, test_tag):
+        """Three todos (one tagged, one with a comma in the title) and one trashed todo"""
+        items = [
+            {"title": "First, with comma", "description": "Dòng\nmới", "tag_ids": [test_tag.id]},
+            {"title": "Second", "due_date": "2030-01-02"},
+            {"title": "Third"},
+            {"title": "Trashed"},
+        ]
+        ids = client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers).json()["ids"]
+        client.delete(f"/api/v1/todos/{ids[3]}", headers=auth_headers)
+        return ids
+    
+    def test_export_ndjson(self, client, auth_headers, exported, test_tag):
+        """Test NDJSON export has one record per live todo with tag names"""
+        import json
+        response = client.get("/api/v1/todos/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "todos.ndjson" in response.headers["content-disposition"]
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [record["id"] for record in records] == exported[:3]
+        assert records[0]["tags"] == [test_tag.name]
+        assert records[0]["description"] == "Dòng\nmới"
+        assert records[1]["due_date"] == "2030-01-02"
+        assert records[2]["tags"] == []
+    
+    def test_export_csv(self, client, auth_headers, exported, test_tag):
+        """Test CSV export has a header row and quotes values correctly"""
+        import csv
+        import io
+        response = client.get("/api/v1/todos/export", params={"format": "csv"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["First, with comma", "Second", "Third"]
+        assert rows[0]["tags"] == test_tag.name
+        assert rows[1]["due_date"] == "2030-01-02"
+        assert rows[2]["description"] == ""
+    
+    def test_export_in_batches(self, client, auth_headers, exported, test_user):
+        """Test batches smaller than the result still export every todo once"""
+        import asyncio
+        from app.services.todo_export import iter_todo_batches
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        async def collect():
+            async with TestingAsyncSessionLocal() as db:
+                return [[row["id"] for row in rows] async for rows in iter_todo_batches(db, test_user.id, batch_size=2)]
+        
+        assert asyncio.run(collect()) == [exported[:2], exported[2:3]]
+    
+    def test_export_invalid_format(self, client, auth_headers):
+        """Test unknown formats are rejected"""
+        assert client.get("/api/v1/todos/export", params={"format": "xml"}, headers=auth_headers).status_code == 422
+
+
+class TestImport:
+    """Tests for POST /todos/import"""
+    
+    def post(self, client, auth_headers, body, **params):
+        response = client.post(
+            "/api/v1/todos/import", params=params, content=body.encode("utf-8"), headers=auth_headers
+        )
+        assert response.status_code == 200
+        return response.json()
+    
+    def test_import_ndjson(self, client, auth_headers, test_tag):
+        """Test NDJSON rows are created with tags resolved or created by name"""
+        body = "\n".join([
+            '{"title": "Imported one", "tags": ["Test Tag", "New tag"], "due_date": "2030-01-02"}',
+            '',
+            '{"title": "Imported two", "is_done": true, "tag_ids": [%d]}' % test_tag.id,
+        ])
+        assert self.post(client, auth_headers, body) == {
+            "imported": 2, "failed": 0, "errors": [], "errors_truncated": False
+        }
+        todos = client.get("/api/v1/todos", params={"sort": "title"}, headers=auth_headers).json()["items"]
+        assert [todo["title"] for todo in todos] == ["Imported one", "Imported two"]
+        assert sorted(tag["name"] for tag in todos[0]["tags"]) == ["New tag", "Test Tag"]
+        assert todos[1]["is_done"] is True
+        assert len(client.get("/api/v1/tags", headers=auth_headers).json()) == 2
+    
+    def test_import_reports_row_errors(self, client, auth_headers):
+        """Test invalid rows are reported by line while valid rows are imported"""
+        body = "\n".join([
+            '{"title": "Valid row"}',
+            '{"title": "x"}',
+            'not json',
+            '[1, 2]',
+            '{"title": "Unknown tag", "tag_ids": [999]}',
+            '{"title": "Also valid"}',
+        ])
+        result = self.post(client, auth_headers, body)
+        assert result["imported"] == 2
+        assert result["failed"] == 4
+        assert [error["line"] for error in result["errors"]] == [2, 3, 4, 5]
+        assert result["errors"][0]["error"].startswith("title")
+        assert "999" in result["errors"][3]["error"]
+    
+    def test_import_csv_round_trip(self, client, auth_headers, test_tag):
+        """Test a CSV export can be imported back, including quoted multi-line cells"""
+        items = [
+            {"title": "First, with comma", "description": "Line 1\nLine \"2\"", "tag_ids": [test_tag.id]},
+            {"title": "Second", "due_date": "2030-01-02"},
+        ]
+        client.post("/api/v1/todos/bulk", json={"items": items}, headers=auth_headers)
+        exported = client.get("/api/v1/todos/export", params={"format": "csv"}, headers=auth_headers).text
+        
+        result = self.post(client, auth_headers, exported, format="csv")
+        assert result == {"imported": 2, "failed": 0, "errors": [], "errors_truncated": False}
+        todos = client.get("/api/v1/todos", params={"q": "comma"}, headers=auth_headers).json()["items"]
+        assert len(todos) == 2
+        assert all(todo["description"] == "Line 1\nLine \"2\"" for todo in todos)
+        assert all([tag["id"] for tag in todo["tags"]] == [test_tag.id] for todo in todos)
+    
+    def test_import_csv_unclosed_quote_is_capped(self, client, auth_headers, monkeypatch):
+        """Test an unclosed quote only fails its own line once the record line cap is hit"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "TODO_IMPORT_MAX_RECORD_LINES", 3)
+        body = "\n".join(["title,description", 'Broken,"never closed', "After one,x", "After two,y", "After three,z"])
+        
+        result = self.post(client, auth_headers, body, format="csv")
+        assert (result["imported"], result["failed"]) == (3, 1)
+        assert result["errors"][0]["line"] == 2
+        assert "3" in result["errors"][0]["error"]
+        todos = client.get("/api/v1/todos", params={"sort": "title"}, headers=auth_headers).json()["items"]
+        assert [todo["title"] for todo in todos] == ["After one", "After three", "After two"]
+    
+    def test_import_reuses_tag_created_concurrently(self, client, auth_headers, test_user, db_session):
+        """Test a tag created by another request after the cache was loaded is reused, not duplicated"""
+        from app.models import Tag
+        
+        assert client.get("/api/v1/tags", headers=auth_headers).json() == []
+        db_session.add(Tag(name="Raced", owner_id=test_user.id))
+        db_session.commit()
+        
+        body = '{"title": "With raced tag", "tags": ["Raced", "Fresh"]}'
+        assert self.post(client, auth_headers, body)["imported"] == 1
+        tags = client.get("/api/v1/tags", headers=auth_headers).json()
+        assert sorted(tag["name"] for tag in tags) == ["Fresh", "Raced"]
+        todo = client.get("/api/v1/todos", headers=auth_headers).json()["items"][0]
+        assert sorted(tag["name"] for tag in todo["tags"]) == ["Fresh", "Raced"]
+    
+    def test_import_without_rows_creates_no_tags(self, client, auth_headers):
+        """Test tags are created in the chunk transaction and dropped when no row is written"""
+        body = '{"title": "Bad tag id", "tags": ["Orphan"], "tag_ids": [999]}'
+        assert self.post(client, auth_headers, body)["failed"] == 1
+        assert client.get("/api/v1/tags", headers=auth_headers).json() == []
+    
+    def test_import_streaming_chunks(self):
+        """Test lines split across body chunks and multi-byte characters are decoded"""
+        import asyncio
+        from app.services.todo_import import iter_lines
+        
+        async def chunks():
+            for chunk in ["Dòng một\r\nDò".encode("utf-8")[:-1], "Dò".encode("utf-8")[-1:], b"ng hai"]:
+                yield chunk
+        
+        async def collect():
+            return [line async for line in iter_lines(chunks())]
+        
+        assert asyncio.run(collect()) == ["Dòng một", "Dòng hai"]
+    
+    def test_import_in_chunks(self, client, auth_headers, test_user):
+        """Test rows are written chunk by chunk with one tag lookup per chunk"""
+        import asyncio
+        from app.services.todo_import import import_todo_stream
+        from app.services.todo_service import AsyncToDoService
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        async def chunks():
+            for i in range(5):
+                yield f'{{"title": "Chunked {i}", "tags": ["Tag {i % 2}"]}}\n'.encode("utf-8")
+        
+        async def run():
+            async with TestingAsyncSessionLocal() as db:
+                return await import_todo_stream(
+                    chunks(), "ndjson", AsyncToDoService(db), owner_id=test_user.id, chunk_size=2
+                )
+        
+        assert asyncio.run(run()).imported == 5
+        assert client.get("/api/v1/todos", headers=auth_headers).json()["total"] == 5
+        assert sorted(tag["name"] for tag in client.get("/api/v1/tags", headers=auth_headers).json()) == [
+            "Tag 0", "Tag 1"
+        ]